@@ -5,6 +5,7 @@ from typing import List, Optional
 from pydantic import BaseSettings, Field, validator
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+APP_DIR = Path(__file__).resolve().parent
 DEFAULT_DB_PATH = BASE_DIR / 'app.db'
 DEFAULT_SQLITE_URL = f"sqlite:///{DEFAULT_DB_PATH.as_posix()}"
 SQLITE_PREFIX = "sqlite:///"
@@ -44,6 +45,11 @@ class Settings(BaseSettings):
         env="GEMINI_MODEL",
         description="Default Gemini model identifier.",
     )
+    gemini_base_url: str = Field(
+        default="https://generativelanguage.googleapis.com/v1beta/models",
+        env="GEMINI_BASE_URL",
+        description="Gemini models endpoint; point at `python -m app.fake_gemini` for offline load tests.",
+    )
     ai_cache_ttl_minutes: int = Field(
         default=60 * 24 * 7,
         env="AI_CACHE_TTL_MINUTES",
@@ -64,6 +70,106 @@ class Settings(BaseSettings):
         env="AI_REQUIRE_MODERATION",
         description="Whether to run moderation on AI-generated text.",
     )
+    ai_memory_cache_max_entries: int = Field(
+        default=1024,
+        env="AI_MEMORY_CACHE_MAX_ENTRIES",
+        description="Entries kept in the in-process AI cache tier before LRU eviction.",
+    )
+    ai_memory_cache_ttl_seconds: int = Field(
+        default=300,
+        env="AI_MEMORY_CACHE_TTL_SECONDS",
+        description="Seconds an AI cache entry is served from memory before re-reading the database.",
+    )
+    ai_memory_cache_negative_ttl_seconds: int = Field(
+        default=30,
+        env="AI_MEMORY_CACHE_NEGATIVE_TTL_SECONDS",
+        description="Seconds a database cache miss is remembered in memory.",
+    )
+    ai_sweep_interval_minutes: int = Field(
+        default=15,
+        env="AI_SWEEP_INTERVAL_MINUTES",
+        description="Minutes between sweeps of expired AI cache entries and date ideas.",
+    )
+    ai_sweep_max_batches: int = Field(
+        default=20,
+        env="AI_SWEEP_MAX_BATCHES",
+        description="Delete batches (500 rows each) a single sweep may run.",
+    )
+    ai_job_workers: int = Field(
+        default=4,
+        env="AI_JOB_WORKERS",
+        description="Worker threads generating insights and date ideas queued with Prefer: respond-async.",
+    )
+    ai_batch_concurrency: int = Field(
+        default=4,
+        env="AI_BATCH_CONCURRENCY",
+        description="Concurrent model calls while generating a batch of match insights.",
+    )
+    ai_batch_requests_per_minute: int = Field(
+        default=60,
+        env="AI_BATCH_REQUESTS_PER_MINUTE",
+        description="Per-provider rate limit for batch insight generation (0 disables).",
+    )
+    ai_prewarm_interval_seconds: int = Field(
+        default=30,
+        env="AI_PREWARM_INTERVAL_SECONDS",
+        description="Seconds between runs of the new-match insight pre-warmer.",
+    )
+    ai_http_timeout_seconds: float = Field(
+        default=20.0,
+        env="AI_HTTP_TIMEOUT_SECONDS",
+        description="Timeout for a single Gemini HTTP request.",
+    )
+    ai_http_max_connections: int = Field(
+        default=20,
+        env="AI_HTTP_MAX_CONNECTIONS",
+        description="Maximum concurrent connections to the Gemini API.",
+    )
+    ai_http_max_keepalive_connections: int = Field(
+        default=10,
+        env="AI_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+        description="Idle Gemini connections kept open for reuse.",
+    )
+    ai_http_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        env="AI_HTTP_KEEPALIVE_EXPIRY_SECONDS",
+        description="Seconds an idle Gemini connection stays in the pool.",
+    )
+    ai_http2: bool = Field(
+        default=True,
+        env="AI_HTTP2",
+        description="Use HTTP/2 for Gemini calls when the h2 package is installed.",
+    )
+    ai_latency_budget_seconds: float = Field(
+        default=4.0,
+        env="AI_LATENCY_BUDGET_SECONDS",
+        description="Seconds an interactive Gemini call may take before the fallback is served (0 disables).",
+    )
+    ai_provider_requests_per_second: float = Field(
+        default=5.0,
+        env="AI_PROVIDER_REQUESTS_PER_SECOND",
+        description="Sustained Gemini request rate; calls over it get the fallback (0 disables).",
+    )
+    ai_provider_burst: int = Field(
+        default=10,
+        env="AI_PROVIDER_BURST",
+        description="Gemini requests allowed in a burst above the sustained rate.",
+    )
+    ai_breaker_failure_threshold: int = Field(
+        default=5,
+        env="AI_BREAKER_FAILURE_THRESHOLD",
+        description="Consecutive failed or slow Gemini calls that open the circuit breaker.",
+    )
+    ai_breaker_slow_call_seconds: float = Field(
+        default=8.0,
+        env="AI_BREAKER_SLOW_CALL_SECONDS",
+        description="Gemini calls slower than this count as failures for the circuit breaker.",
+    )
+    ai_breaker_reset_seconds: float = Field(
+        default=30.0,
+        env="AI_BREAKER_RESET_SECONDS",
+        description="Seconds the breaker stays open before letting a trial call through.",
+    )
     media_root: str = Field(
         default="uploads",
         env="MEDIA_ROOT",
@@ -79,6 +185,56 @@ class Settings(BaseSettings):
         env="MAX_PHOTO_SIZE",
         description="Maximum allowed size for profile photo uploads in bytes.",
     )
+    background_jobs_enabled: bool = Field(
+        default=True,
+        env="BACKGROUND_JOBS_ENABLED",
+        description="Run periodic maintenance jobs (counter reconciliation, rollups) in-process.",
+    )
+    interest_reconcile_interval_minutes: int = Field(
+        default=60,
+        env="INTEREST_RECONCILE_INTERVAL_MINUTES",
+        description="Minutes between rebuilds of the denormalized event interest counters.",
+    )
+    rating_recompute_interval_minutes: int = Field(
+        default=60,
+        env="RATING_RECOMPUTE_INTERVAL_MINUTES",
+        description="Minutes between rebuilds of place rating aggregates from their reviews.",
+    )
+    trending_half_life_hours: float = Field(
+        default=6.0,
+        env="TRENDING_HALF_LIFE_HOURS",
+        description="Hours for an interest delta's weight in the trending score to halve.",
+    )
+    trending_window_hours: int = Field(
+        default=72,
+        env="TRENDING_WINDOW_HOURS",
+        description="Hourly interest rollups older than this are ignored and pruned.",
+    )
+    trending_cache_ttl_seconds: int = Field(
+        default=60,
+        env="TRENDING_CACHE_TTL_SECONDS",
+        description="Seconds a computed trending ranking is served before it is refreshed.",
+    )
+    recommendation_cache_ttl_seconds: int = Field(
+        default=300,
+        env="RECOMMENDATION_CACHE_TTL_SECONDS",
+        description="Seconds per-user event recommendations are cached.",
+    )
+    place_index_check_seconds: float = Field(
+        default=5.0,
+        env="PLACE_INDEX_CHECK_SECONDS",
+        description="Seconds the in-memory place indexes are served before checking the catalogue for changes.",
+    )
+    transit_data_path: str = Field(
+        default=str(APP_DIR / "data" / "waygo_fixed_route.json"),
+        env="TRANSIT_DATA_PATH",
+        description="Shuttle route file (stops, minute offsets, headways) used for travel-time ranking.",
+    )
+    transit_cache_dir: str = Field(
+        default=str(BASE_DIR / ".cache" / "transit"),
+        env="TRANSIT_CACHE_DIR",
+        description="Directory for the memory-mapped travel-time matrices.",
+    )
     cors_allow_origins: List[str] | str = Field(
         default=["http://localhost:5173", "http://127.0.0.1:5173"],
         env="CORS_ALLOW_ORIGINS",
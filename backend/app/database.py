@@ -2,7 +2,8 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, declarative_base, scoped_session, sessionmaker
 
 from .config import get_settings
 
@@ -39,3 +40,10 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def upsert_insert(session: Session, entity):
+    """Return an ``insert`` for the session's dialect that supports ``on_conflict_do_*``."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
@@ -0,0 +1,196 @@
+"""Run a local stand-in for the Gemini generateContent API.
+
+Usage: python -m app.fake_gemini [--port 8090] [--latency-ms 800] [--distribution lognormal] [--error-rate 0.05]
+
+Point the backend at it with GEMINI_BASE_URL=http://127.0.0.1:8090/v1beta/models
+and any non-empty GEMINI_API_KEY. Both generateContent and
+streamGenerateContent (``alt=sse``) are served, after a sampled delay, with
+canned replies chosen by prompt substring; a share of calls can fail with a
+Gemini-style error. GET /stats reports what the server has seen, e.g. to
+check how many calls caching and coalescing saved during a load test.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.ai_client import AIClient
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Replies keyed by a substring of the prompts AIService sends, so features parse them as they would real output.
+DEFAULT_CANNED = {
+    "Interpret the following natural language event query": json.dumps(
+        {
+            "summary": "Live music on campus this week",
+            "date_range": {"start": None, "end": None},
+            "location": None,
+            "category": "music",
+            "keywords": ["music"],
+        }
+    ),
+    "Provide 3 JSON ideas": json.dumps(
+        [
+            {"title": "Coffee tasting", "description": "Compare roasts at a local cafe.", "location": "Downtown"},
+            {"title": "Library study sprint", "description": "Trade notes, then grab a snack.", "location": "Library"},
+            {"title": "Sunset walk", "description": "Loop the campus green at dusk.", "location": "Campus Green"},
+        ]
+    ),
+    "why these people vibe well": (
+        "You both light up around coffee and new ideas, so conversation will come easily. "
+        "A slow afternoon on campus is the perfect place to start."
+    ),
+}
+DEFAULT_REPLY = "Sounds great! Want to grab coffee at the student union after class?"
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency_ms: float = 0.0
+    distribution: str = "fixed"
+    jitter_ms: float = 0.0  # uniform: replies take latency_ms +/- jitter_ms
+    sigma: float = 0.5  # lognormal: shape, with latency_ms as the median
+    error_rate: float = 0.0
+    error_status: int = 503
+    chunk_delay_ms: float = 20.0
+    words_per_chunk: int = 3
+    canned: dict[str, str] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Seconds to wait before answering."""
+        if self.distribution == "uniform":
+            millis = rng.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+        elif self.distribution == "lognormal" and self.latency_ms > 0:
+            millis = rng.lognormvariate(math.log(self.latency_ms), self.sigma)
+        else:
+            millis = self.latency_ms
+        return max(millis, 0.0) / 1000
+
+    def reply_for(self, prompt: str) -> str:
+        # Custom replies take precedence over the defaults for the same prompt.
+        for canned in (self.canned, DEFAULT_CANNED):
+            for needle, reply in canned.items():
+                if needle in prompt:
+                    return reply
+        return DEFAULT_REPLY
+
+
+def create_app(config: Optional[FakeGeminiConfig] = None) -> FastAPI:
+    config = config or FakeGeminiConfig()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="Fake Gemini")
+    app.state.stats = {"requests": 0, "streams": 0, "errors": 0}
+
+    @app.get("/stats")
+    def stats() -> dict:
+        return app.state.stats
+
+    @app.post("/v1beta/models/{target}")
+    async def models(target: str, request: Request, alt: Optional[str] = None):
+        model, _, method = target.partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return _error(404, f"Method {method or '<none>'} is not supported by the fake server")
+        body = await request.json()
+        prompt = "".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        app.state.stats["requests"] += 1
+        await asyncio.sleep(config.sample_latency(rng))
+        if rng.random() < config.error_rate:
+            app.state.stats["errors"] += 1
+            return _error(config.error_status, "The model is overloaded. Please try again later.")
+
+        text = config.reply_for(prompt)
+        if method == "generateContent":
+            return JSONResponse(_payload(model, [text], final=True))
+        app.state.stats["streams"] += 1
+        words = AIClient.chunk_text(text)
+        size = max(config.words_per_chunk, 1)
+        chunks = ["".join(words[start : start + size]) for start in range(0, len(words), size)]
+        if alt != "sse":
+            # Without alt=sse Gemini streams one JSON array of responses.
+            last = len(chunks) - 1
+            return JSONResponse([_payload(model, [chunk], final=idx == last) for idx, chunk in enumerate(chunks)])
+        return StreamingResponse(_sse(model, chunks, config.chunk_delay_ms / 1000), media_type="text/event-stream")
+
+    return app
+
+
+async def _sse(model: str, chunks: list[str], delay: float) -> AsyncIterator[str]:
+    for idx, chunk in enumerate(chunks):
+        if idx:
+            await asyncio.sleep(delay)
+        yield f"data: {json.dumps(_payload(model, [chunk], final=idx == len(chunks) - 1))}\r\n\r\n"
+
+
+def _payload(model: str, texts: list[str], *, final: bool) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text} for text in texts]}, "index": 0}
+    if final:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate], "modelVersion": model}
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    status_names = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED", 500: "INTERNAL"}
+    return JSONResponse(
+        {"error": {"code": status_code, "message": message, "status": status_names.get(status_code, "UNAVAILABLE")}},
+        status_code=status_code,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Reply delay (the median for lognormal)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Half-width of the uniform distribution")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Shape of the lognormal distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls that fail, 0..1")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--chunk-delay-ms", type=float, default=20.0, help="Gap between streamed chunks")
+    parser.add_argument("--words-per-chunk", type=int, default=3)
+    parser.add_argument(
+        "--canned",
+        help="JSON file mapping prompt substrings to replies (non-string replies are sent as JSON text)",
+    )
+    parser.add_argument("--seed", type=int, help="Seed latency and error sampling for repeatable runs")
+    args = parser.parse_args(argv)
+    if not 0 <= args.error_rate <= 1:
+        parser.error("--error-rate must be between 0 and 1")
+
+    canned: dict[str, str] = {}
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as handle:
+            canned = {
+                needle: reply if isinstance(reply, str) else json.dumps(reply)
+                for needle, reply in json.load(handle).items()
+            }
+
+    config = FakeGeminiConfig(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        jitter_ms=args.jitter_ms,
+        sigma=args.sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        chunk_delay_ms=args.chunk_delay_ms,
+        words_per_chunk=args.words_per_chunk,
+        canned=canned,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
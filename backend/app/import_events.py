@@ -0,0 +1,45 @@
+"""Bulk-import an ICS, CSV or NDJSON event feed.
+
+Usage: python -m app.import_events feed.ics [--format ics] [--batch-size 500]
+"""
+import argparse
+import sys
+import time
+
+import app.main  # noqa: F401  - creates tables and applies schema patches
+from app.database import SessionLocal
+from app.services.event_import import IMPORT_BATCH_SIZE, EventImportService
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Feed file to import, or '-' for stdin")
+    parser.add_argument("--format", choices=["ics", "csv", "ndjson"], help="Feed format (default: from extension)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or EventImportService.detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot infer the feed format; pass --format")
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        if args.path == "-":
+            stats = EventImportService.import_stream(db, sys.stdin, fmt, batch_size=args.batch_size)
+        else:
+            with open(args.path, encoding="utf-8", errors="replace", newline="") as handle:
+                stats = EventImportService.import_stream(db, handle, fmt, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Imported {fmt} feed in {elapsed:.2f}s: "
+        f"{stats.inserted} inserted, {stats.updated} updated, {stats.skipped} skipped, {stats.invalid} invalid"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
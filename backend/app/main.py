@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
@@ -10,9 +12,20 @@ from sqlalchemy.orm import Session
 
 from .config import get_settings
 from .database import Base, SessionLocal, engine
+from .models.event import SPAN_BUCKET_HOURS, SPAN_BUCKET_OVERFLOW
 from .models.user import User
 from .models.user_match import UserMatch  # Import to ensure table creation
+from .services.event_import import EventImportService
+from .services.ai_jobs import ai_jobs
+from .services.ai_service import ai_client
+from .services.ai_sweeper import AICacheSweeper
 from .services.events import EventService
+from .services.insight_prewarm import InsightPrewarmer
+from .services.places import PlaceService
+from .services.scheduler import scheduler
+from .services.tags import TagService
+from .services.transit import TransitService
+from .services.trending import TrendingService
 from app.routers import ai, auth, calendar, direct_messages, events, groups, matches, places, users
 
 # Configure logging
@@ -38,11 +51,27 @@ def apply_schema_patches() -> None:
         place_columns = get_columns(connection, "places")
         if "review_count" not in place_columns:
             connection.execute(text("ALTER TABLE places ADD COLUMN review_count INTEGER DEFAULT 0"))
+        if "rating_sum" not in place_columns:
+            connection.execute(text("ALTER TABLE places ADD COLUMN rating_sum FLOAT NOT NULL DEFAULT 0"))
+            connection.execute(
+                text("UPDATE places SET rating_sum = COALESCE(rating, 0) * COALESCE(review_count, 0)")
+            )
 
         if "latitude" not in place_columns:
             connection.execute(text("ALTER TABLE places ADD COLUMN latitude FLOAT"))
         if "longitude" not in place_columns:
             connection.execute(text("ALTER TABLE places ADD COLUMN longitude FLOAT"))
+        if "geohash" not in place_columns:
+            connection.execute(text("ALTER TABLE places ADD COLUMN geohash VARCHAR(9)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_places_geohash ON places (geohash)"))
+        connection.execute(text("UPDATE places SET rating = 0 WHERE rating IS NULL"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_places_rating_id ON places (rating, id)"))
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_place_reviews_place_created "
+                "ON place_reviews (place_id, created_at, id)"
+            )
+        )
         if "created_at" not in place_columns:
             connection.execute(
                 text(
@@ -57,6 +86,17 @@ def apply_schema_patches() -> None:
             )
 
         event_columns = get_columns(connection, "events")
+        if "interest_count" not in event_columns:
+            connection.execute(
+                text("ALTER TABLE events ADD COLUMN interest_count INTEGER NOT NULL DEFAULT 0")
+            )
+            connection.execute(
+                text(
+                    "UPDATE events SET interest_count = ("
+                    "SELECT COUNT(*) FROM event_interests "
+                    "WHERE event_interests.event_id = events.id AND event_interests.interested = 1)"
+                )
+            )
         if "created_at" not in event_columns:
             connection.execute(
                 text(
@@ -70,6 +110,34 @@ def apply_schema_patches() -> None:
                     "ALTER TABLE events ADD COLUMN updated_at DATETIME NOT NULL DEFAULT (datetime('now'))"
                 )
             )
+        if "span_bucket" not in event_columns:
+            connection.execute(
+                text(
+                    "ALTER TABLE events ADD COLUMN span_bucket INTEGER NOT NULL "
+                    f"DEFAULT {SPAN_BUCKET_OVERFLOW}"
+                )
+            )
+            hours = "(julianday(end_time) - julianday(start_time)) * 24"
+            cases = " ".join(
+                f"WHEN {hours} <= {limit} THEN {bucket}" for bucket, limit in enumerate(SPAN_BUCKET_HOURS)
+            )
+            connection.execute(
+                text(f"UPDATE events SET span_bucket = CASE {cases} ELSE {SPAN_BUCKET_OVERFLOW} END")
+            )
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_events_span_start ON events (span_bucket, start_time)")
+        )
+        if "content_hash" not in event_columns:
+            connection.execute(text("ALTER TABLE events ADD COLUMN content_hash VARCHAR(64)"))
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_events_content_hash ON events (content_hash)")
+        )
+
+        # Expiry sweeps range-scan these instead of reading whole tables.
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_ai_cache_entries_expires_at ON ai_cache_entries (expires_at)")
+        )
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_match_ideas_expires_at ON match_ideas (expires_at)"))
 
         user_columns = get_columns(connection, "users")
         if "password_hash" not in user_columns:
@@ -102,6 +170,11 @@ def apply_schema_patches() -> None:
                     "ALTER TABLE users ADD COLUMN updated_at DATETIME NOT NULL DEFAULT (datetime('now'))"
                 )
             )
+        if "calendar_token" not in user_columns:
+            connection.execute(text("ALTER TABLE users ADD COLUMN calendar_token VARCHAR"))
+        connection.execute(
+            text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_calendar_token ON users (calendar_token)")
+        )
 
 
 apply_schema_patches()
@@ -142,6 +215,16 @@ def seed_default_records() -> None:
     session: Session = SessionLocal()
     try:
         EventService.seed_defaults(session)
+        if EventImportService.backfill_content_hashes(session):
+            session.commit()
+        if TagService.needs_event_backfill(session):
+            TagService.rebuild_event_tags(session)
+            session.commit()
+        if PlaceService.backfill_geohashes(session):
+            session.commit()
+        if TagService.needs_place_backfill(session):
+            TagService.rebuild_place_tags(session)
+            session.commit()
         _ensure_demo_user(session)
     finally:
         session.close()
@@ -151,10 +234,62 @@ seed_default_records()
 media_path = Path(settings.media_root).resolve()
 media_path.mkdir(parents=True, exist_ok=True)
 
+def recompute_place_ratings(session: Session) -> int:
+    corrected = PlaceService.recompute_ratings(session)
+    if corrected:
+        # Commit before dropping the indexes so a concurrent reader cannot re-cache the old ratings.
+        session.commit()
+        PlaceService.invalidate_indexes()
+    return corrected
+
+
+def register_background_jobs() -> None:
+    scheduler.register(
+        "reconcile_interest_counts",
+        settings.interest_reconcile_interval_minutes * 60,
+        EventService.reconcile_interest_counts,
+    )
+    scheduler.register("refresh_trending", settings.trending_cache_ttl_seconds, TrendingService.refresh)
+    scheduler.register(
+        "recompute_place_ratings",
+        settings.rating_recompute_interval_minutes * 60,
+        recompute_place_ratings,
+    )
+    scheduler.register("sweep_expired_ai_rows", settings.ai_sweep_interval_minutes * 60, AICacheSweeper.run)
+    scheduler.register("prewarm_match_insights", settings.ai_prewarm_interval_seconds, InsightPrewarmer.run)
+
+
+def warm_transit_matrices() -> None:
+    session: Session = SessionLocal()
+    try:
+        TransitService.warm(session)
+    finally:
+        session.close()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    InsightPrewarmer.attach_loop(asyncio.get_running_loop())
+    if settings.background_jobs_enabled:
+        register_background_jobs()
+        await asyncio.to_thread(warm_transit_matrices)
+        scheduler.start()
+    try:
+        yield
+    finally:
+        InsightPrewarmer.attach_loop(None)
+        # Off the loop: a prewarm batch in flight needs it to finish.
+        await asyncio.to_thread(scheduler.stop)
+        ai_jobs.shutdown()
+        await ai_client.aclose()
+        ai_client.close()
+
+
 app = FastAPI(
     title="Campus Connect API",
     version="0.1.0",
     description="Backend services for campus social scheduling.",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -165,6 +300,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 # Global exception handler
@@ -1,9 +1,10 @@
 from .ai import AICacheEntry, MatchIdea, MatchInsight
 from .event import Event
-from .event_interest import EventInterest
+from .event_interest import EventInterest, EventInterestRollup
 from .group import Availability, Group, GroupMeeting, GroupMembership, GroupMessage
 from .direct_message import DirectMessage
 from .places import Place, PlaceReview
+from .tag import EventTag, PlaceTag, Tag
 from .user import User
 
 __all__ = [
@@ -11,6 +12,8 @@ __all__ = [
     "Availability",
     "Event",
     "EventInterest",
+    "EventInterestRollup",
+    "EventTag",
     "Group",
     "GroupMeeting",
     "GroupMembership",
@@ -20,5 +23,7 @@ __all__ = [
     "MatchInsight",
     "Place",
     "PlaceReview",
+    "PlaceTag",
+    "Tag",
     "User",
 ]
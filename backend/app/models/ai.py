@@ -35,7 +35,7 @@ class MatchIdea(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     location_hint: Mapped[str | None] = mapped_column(String, nullable=True)
     generated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     payload_fingerprint: Mapped[str] = mapped_column(String, nullable=False)
     context_snapshot: Mapped[dict] = mapped_column(JSON, nullable=False)
     source: Mapped[str] = mapped_column(String, nullable=False, default="ai")
@@ -50,4 +50,4 @@ class AICacheEntry(Base):
     cache_key: Mapped[str] = mapped_column(String, nullable=False)
     payload: Mapped[dict] = mapped_column(JSON, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
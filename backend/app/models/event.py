@@ -1,17 +1,46 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from hashlib import sha256
 
-from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy import DateTime, Index, Integer, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..database import Base
 
 
+# Upper bound (in hours) of each event duration bucket. Events longer than the
+# last bound fall into the overflow bucket ``len(SPAN_BUCKET_HOURS)``.
+SPAN_BUCKET_HOURS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+SPAN_BUCKET_OVERFLOW = len(SPAN_BUCKET_HOURS)
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def span_bucket_for(start_time: datetime | None, end_time: datetime | None) -> int:
+    if start_time is None or end_time is None:
+        return SPAN_BUCKET_OVERFLOW
+    hours = (end_time - start_time).total_seconds() / 3600
+    for bucket, limit in enumerate(SPAN_BUCKET_HOURS):
+        if hours <= limit:
+            return bucket
+    return SPAN_BUCKET_OVERFLOW
+
+
+def content_hash_for(title: str | None, start_time: datetime | None, location: str | None) -> str:
+    """Identity of an event for import dedupe: normalized title, UTC start and location."""
+    if start_time is not None:
+        if start_time.tzinfo is not None:
+            start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+        start_text = start_time.replace(microsecond=0).isoformat()
+    else:
+        start_text = ""
+    parts = [" ".join((title or "").lower().split()), start_text, " ".join((location or "").lower().split())]
+    return sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -23,9 +52,24 @@ class Event(Base):
     start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     tags: Mapped[str | None] = mapped_column(String)
+    # Denormalized count of interested users, maintained by EventService.set_interest.
+    interest_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Duration class used to bound start_time scans for overlap queries.
+    span_bucket: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=SPAN_BUCKET_OVERFLOW, server_default=str(SPAN_BUCKET_OVERFLOW)
+    )
+    # sha256 of title/start/location, see content_hash_for.
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow, nullable=False)
 
 
 Index("idx_events_time", Event.start_time, Event.end_time)
+Index("idx_events_span_start", Event.span_bucket, Event.start_time)
+
 
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def _assign_derived_columns(mapper, connection, target: Event) -> None:
+    target.span_bucket = span_bucket_for(target.start_time, target.end_time)
+    target.content_hash = content_hash_for(target.title, target.start_time, target.location)
@@ -14,3 +14,16 @@ class EventInterest(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     __table_args__ = (UniqueConstraint("event_id", "user_id", name="uq_event_user_interest"),)
+
+
+class EventInterestRollup(Base):
+    """Net interest change per event for one UTC hour, used for trending."""
+
+    __tablename__ = "event_interest_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    bucket_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    delta = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("event_id", "bucket_start", name="uq_event_interest_rollup_bucket"),)
@@ -2,11 +2,43 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, event
 from sqlalchemy.orm import relationship
 
 from app.database import Base  # correct import for your Base class
 
+GEOHASH_PRECISION = 9  # ~5m cells; nearby queries search on shorter prefixes
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_for(latitude: float | None, longitude: float | None, precision: int = GEOHASH_PRECISION) -> str | None:
+    """Standard base-32 geohash; nearby points share long prefixes."""
+    if latitude is None or longitude is None:
+        return None
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        span, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (span[0] + span[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            span[0] = mid
+        else:
+            span[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
 class Place(Base):
     __tablename__ = "places"
 
@@ -14,12 +46,14 @@ class Place(Base):
     name = Column(String, nullable=False)
     description = Column(Text)
     location = Column(String)  # e.g. "Campus Center", "Downtown"
-    rating = Column(Float, default=0.0)  # stored average rating
+    rating = Column(Float, default=0.0)  # rating_sum / review_count, kept for ordering
     review_count = Column(Integer, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0, server_default="0")  # exact sum of review ratings
     tags = Column(String)  # comma-separated tags like "cafe, study, wifi"
     photo_url = Column(String, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    geohash = Column(String(GEOHASH_PRECISION), nullable=True, index=True)  # derived from latitude/longitude
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, onupdate=lambda: datetime.now(timezone.utc))
 
@@ -37,3 +71,13 @@ class PlaceReview(Base):
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
 
     place = relationship("Place", back_populates="reviews")
+
+
+Index("ix_places_rating_id", Place.rating, Place.id)
+Index("ix_place_reviews_place_created", PlaceReview.place_id, PlaceReview.created_at, PlaceReview.id)
+
+
+@event.listens_for(Place, "before_insert")
+@event.listens_for(Place, "before_update")
+def _assign_geohash(mapper, connection, target: Place) -> None:
+    target.geohash = geohash_for(target.latitude, target.longitude)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class Tag(Base):
+    """Normalized (lowercase, trimmed) tag vocabulary shared across features."""
+
+    __tablename__ = "tags"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False, unique=True, index=True)
+
+
+class EventTag(Base):
+    __tablename__ = "event_tags"
+
+    event_id: Mapped[int] = mapped_column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
+
+Index("ix_event_tags_tag_event", EventTag.tag_id, EventTag.event_id)
+
+
+class PlaceTag(Base):
+    __tablename__ = "place_tags"
+
+    place_id: Mapped[int] = mapped_column(Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
+
+Index("ix_place_tags_tag_place", PlaceTag.tag_id, PlaceTag.place_id)
@@ -19,6 +19,7 @@ class User(Base):
     photos = Column(JSON, nullable=True, default=list)
     pronouns = Column(String, nullable=True)
     location = Column(String, nullable=True)
+    calendar_token = Column(String, nullable=True, unique=True, index=True)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     def __repr__(self) -> str:
@@ -1,84 +1,183 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..schemas.ai import (
+    AICacheStatsResponse,
+    AIJobStatus,
+    AISweepResult,
     DateIdeaRequest,
     DateIdeasResponse,
     DirectChatRequest,
     DirectChatResponse,
+    MatchInsightBatchRequest,
+    MatchInsightBatchResponse,
     MatchInsightRequest,
     MatchInsightResponse,
 )
+from ..services.ai_cache import AIMemoryCache
+from ..services.ai_jobs import AIJob, ai_jobs
 from ..services.ai_service import AIService
+from ..services.ai_sweeper import AICacheSweeper
 
 router = APIRouter(tags=["ai"])
 
+INSIGHT_JOB = "match_insight"
+IDEAS_JOB = "date_ideas"
+
 
-@router.post("/matches/{match_id}/insight", response_model=MatchInsightResponse)
-def create_match_insight(
+@router.post(
+    "/matches/{match_id}/insight",
+    response_model=MatchInsightResponse,
+    responses={202: {"model": AIJobStatus, "description": "Queued (sent with Prefer: respond-async)"}},
+)
+async def create_match_insight(
     match_id: str,
     request: MatchInsightRequest,
+    prefer: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> MatchInsightResponse:
-    record, cached = AIService.upsert_match_insight(db, match_id, request)
-    if not cached:
-        db.commit()
-    return MatchInsightResponse(
-        match_id=record.match_id,
-        summary_text=record.summary_text,
-        generated_at=record.generated_at,
-        cached=cached,
-        moderation_applied=bool(record.moderation_labels),
-    )
+    if _respond_async(prefer):
+        record = await run_in_threadpool(AIService.cached_match_insight, db, match_id, request)
+        if record is not None:
+            return _insight_response(record, cached=True)
+        job = ai_jobs.submit(
+            INSIGHT_JOB,
+            match_id,
+            db.get_bind(),
+            lambda session: AIService.upsert_match_insight(session, match_id, request, background=True),
+        )
+        return _accepted(job)
+    record, cached = await AIService.upsert_match_insight_async(db, match_id, request)
+    return await _committed(db, not cached, _insight_response, record, cached=cached)
+
+
+@router.post("/matches/insights/batch", response_model=MatchInsightBatchResponse)
+async def create_match_insights_batch(
+    request: MatchInsightBatchRequest,
+    db: Session = Depends(get_db),
+) -> MatchInsightBatchResponse:
+    """Insights for many matches at once; fresh ones are reused, the rest generated concurrently."""
+    items = [(item.match_id, MatchInsightRequest(**item.dict(exclude={"match_id"}))) for item in request.items]
+    results = await AIService.generate_match_insights_batch_async(db, items)
+    generated = sum(1 for _, cached in results if not cached)
 
+    def respond() -> MatchInsightBatchResponse:
+        return MatchInsightBatchResponse(
+            insights=[_insight_response(record, cached=cached) for record, cached in results],
+            generated=generated,
+        )
 
-@router.get("/matches/{match_id}/insight", response_model=MatchInsightResponse)
-def read_match_insight(
+    return await _committed(db, bool(generated), respond)
+
+
+@router.get(
+    "/matches/{match_id}/insight",
+    response_model=MatchInsightResponse,
+    responses={202: {"model": AIJobStatus, "description": "First insight still being generated"}},
+)
+async def read_match_insight(
     match_id: str,
     refresh: bool = Query(False),
     db: Session = Depends(get_db),
 ) -> MatchInsightResponse:
-    record, cached = AIService.get_match_insight(db, match_id, refresh=refresh)
-    if not cached:
-        db.commit()
-    return MatchInsightResponse(
-        match_id=record.match_id,
-        summary_text=record.summary_text,
-        generated_at=record.generated_at,
-        cached=cached,
-        moderation_applied=bool(record.moderation_labels),
-    )
+    pending = ai_jobs.active(INSIGHT_JOB, match_id)
+    if pending is not None and not await run_in_threadpool(AIService.has_match_insight, db, match_id):
+        return _accepted(pending)
+    record, cached = await AIService.get_match_insight_async(db, match_id, refresh=refresh)
+    return await _committed(db, not cached, _insight_response, record, cached=cached)
 
 
-@router.post("/ideas", response_model=DateIdeasResponse)
-def generate_date_ideas(
+@router.post(
+    "/ideas",
+    response_model=DateIdeasResponse,
+    responses={202: {"model": AIJobStatus, "description": "Queued (sent with Prefer: respond-async)"}},
+)
+async def generate_date_ideas(
     request: DateIdeaRequest,
+    prefer: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> DateIdeasResponse:
-    records, cached = AIService.generate_date_ideas(db, request)
-    if not cached:
-        db.commit()
-    generated_at = records[0].generated_at if records else None
-    return DateIdeasResponse(
-        match_id=request.match_id,
-        ideas=records,
-        cached=cached,
-        generated_at=generated_at,
-    )
+    if _respond_async(prefer):
+        records = await run_in_threadpool(AIService.cached_date_ideas, db, request)
+        if records:
+            return await _committed(db, False, _ideas_response, request.match_id, records, cached=True)
+        job = ai_jobs.submit(
+            IDEAS_JOB,
+            request.match_id,
+            db.get_bind(),
+            lambda session: AIService.generate_date_ideas(session, request, background=True),
+        )
+        return _accepted(job)
+    records, cached = await AIService.generate_date_ideas_async(db, request)
+    return await _committed(db, not cached, _ideas_response, request.match_id, records, cached=cached)
 
 
-@router.get("/ideas", response_model=DateIdeasResponse)
-def list_date_ideas(
+@router.get(
+    "/ideas",
+    response_model=DateIdeasResponse,
+    responses={202: {"model": AIJobStatus, "description": "First ideas still being generated"}},
+)
+async def list_date_ideas(
     match_id: str = Query(..., description="Match identifier to retrieve cached ideas for"),
     refresh: bool = Query(False),
     db: Session = Depends(get_db),
 ) -> DateIdeasResponse:
-    records, cached = AIService.list_date_ideas(db, match_id, refresh=refresh)
-    if not cached:
-        db.commit()
+    pending = ai_jobs.active(IDEAS_JOB, match_id)
+    if pending is not None and not await run_in_threadpool(AIService.has_date_ideas, db, match_id):
+        return _accepted(pending)
+    records, cached = await AIService.list_date_ideas_async(db, match_id, refresh=refresh)
+    return await _committed(db, not cached, _ideas_response, match_id, records, cached=cached)
+
+
+@router.get("/ai/jobs/{job_id}", response_model=AIJobStatus, name="ai_job_status")
+def read_ai_job(job_id: str) -> AIJobStatus:
+    job = ai_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_status(job)
+
+
+async def _committed(db: Session, commit: bool, build, *args, **kwargs):
+    """Commit when something was generated, then build the response, both off the event loop.
+
+    Building reads the rows, which reload from the database once the commit expires them.
+    """
+
+    def run():
+        if commit:
+            db.commit()
+        return build(*args, **kwargs)
+
+    return await run_in_threadpool(run)
+
+
+def _respond_async(prefer: str | None) -> bool:
+    """True when the client asked for asynchronous processing (RFC 7240)."""
+    if not prefer:
+        return False
+    return any(token.split(";")[0].strip().lower() == "respond-async" for token in prefer.split(","))
+
+
+def _insight_response(record, *, cached: bool) -> MatchInsightResponse:
+    return MatchInsightResponse(
+        match_id=record.match_id,
+        summary_text=record.summary_text,
+        generated_at=record.generated_at,
+        cached=cached,
+        moderation_applied=bool(record.moderation_labels),
+    )
+
+
+def _ideas_response(match_id: str, records, *, cached: bool) -> DateIdeasResponse:
     generated_at = records[0].generated_at if records else None
     return DateIdeasResponse(
         match_id=match_id,
@@ -88,7 +187,61 @@ def list_date_ideas(
     )
 
 
+def _job_status(job: AIJob) -> AIJobStatus:
+    if job.kind == INSIGHT_JOB:
+        result_url = f"/matches/{job.match_id}/insight"
+    else:
+        result_url = f"/ideas?match_id={job.match_id}"
+    return AIJobStatus(
+        job_id=job.id,
+        kind=job.kind,
+        match_id=job.match_id,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        status_url=f"/ai/jobs/{job.id}",
+        result_url=result_url,
+    )
+
+
+def _accepted(job: AIJob) -> JSONResponse:
+    body = _job_status(job)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(body),
+        headers={"Location": body.status_url},
+    )
+
+
 @router.post("/chat/direct", response_model=DirectChatResponse)
-def chat_with_ai(request: DirectChatRequest) -> DirectChatResponse:
-    reply = AIService.generate_direct_reply(request)
+async def chat_with_ai(request: DirectChatRequest) -> DirectChatResponse:
+    reply = await AIService.generate_direct_reply_async(request)
     return DirectChatResponse(reply_text=reply)
+
+
+@router.post("/chat/direct/stream", response_class=StreamingResponse)
+async def stream_chat_with_ai(request: DirectChatRequest) -> StreamingResponse:
+    """Server-sent events: ``token`` chunks, then ``done`` (or ``moderated``) with the full reply."""
+
+    async def events():
+        async for event, data in AIService.stream_direct_reply_async(request):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/ai/cache/stats", response_model=AICacheStatsResponse)
+def ai_cache_stats() -> AICacheStatsResponse:
+    """Counters for this worker's in-process AI cache tier and its last expiry sweep."""
+    last_sweep = AICacheSweeper.last_result
+    return AICacheStatsResponse(
+        **AIMemoryCache.stats().__dict__,
+        last_sweep=AISweepResult(**last_sweep.__dict__) if last_sweep else None,
+        swept_total=AICacheSweeper.total_removed,
+    )
@@ -1,17 +1,21 @@
 """Calendar and meetup detection endpoints."""
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..dependencies.auth import get_optional_user
+from ..dependencies.auth import get_current_user, get_optional_user
 from ..models.user import User
 from ..schemas.calendar import (
+    CalendarFeedResponse,
     CalendarInviteRequest,
     CalendarInviteResponse,
     MeetupDetectionResponse,
 )
 from ..services.calendar_service import CalendarService
+from ..services.http_cache import etag_matches
 
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
@@ -141,3 +145,66 @@ def download_calendar_invite(
             "Content-Type": "text/calendar; charset=utf-8",
         },
     )
+
+
+@router.post("/feeds", response_model=CalendarFeedResponse)
+def create_calendar_feed(
+    request: Request,
+    rotate: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> CalendarFeedResponse:
+    """
+    Return the caller's subscribable feed URL.
+    Pass ``rotate=true`` to revoke the old URL and issue a new one.
+    """
+    token = CalendarService.ensure_feed_token(db, current_user, rotate=rotate)
+    db.commit()
+    return CalendarFeedResponse(token=token, url=str(request.url_for("calendar_feed", token=token)))
+
+
+@router.get("/feeds/{token}.ics", name="calendar_feed")
+def calendar_feed(
+    token: str,
+    db: Session = Depends(get_db),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+):
+    """
+    Serve a user's interested events and group meetings as a live ICS feed.
+    Calendar apps poll this URL; unchanged feeds answer 304 without rendering.
+    """
+    user = db.query(User).filter(User.calendar_token == token).first()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Calendar feed not found")
+
+    state = CalendarService.feed_state(db, user)
+    headers = {
+        "ETag": state.etag,
+        "Last-Modified": format_datetime(state.last_modified, usegmt=True),
+        "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+    if _not_modified(state, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    events, meetings = CalendarService.feed_rows(db, user)
+    return StreamingResponse(
+        CalendarService.iter_feed(events, meetings),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
+
+
+def _not_modified(state, if_none_match: str | None, if_modified_since: str | None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    if if_none_match is not None:
+        return etag_matches(if_none_match, state.etag)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return state.last_modified <= since
+    return False
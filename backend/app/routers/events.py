@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -10,14 +12,21 @@ from ..models import Event
 from ..schemas.ai import EventNLPResponse
 from ..schemas.events import (
     EventCreate,
+    EventImportResult,
+    EventInterestBulkRequest,
+    EventInterestBulkResult,
     EventInterestRead,
     EventInterestRequest,
     EventQueryFilters,
     EventRead,
+    EventRecommendationRead,
     EventUpdate,
 )
 from ..services.ai_service import AIService
-from ..services.events import EventService
+from ..services.event_import import EventImportService, iter_text_lines
+from ..services.events import DEFAULT_EVENT_PAGE_SIZE, MAX_EVENT_PAGE_SIZE, EventService
+from ..services.recommendations import RecommendationService
+from ..services.trending import TrendingService
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -26,6 +35,7 @@ router = APIRouter(prefix="/events", tags=["events"])
 def create_event(payload: EventCreate, db: Session = Depends(get_db)) -> EventRead:
     event = EventService.create_event(db, payload)
     db.commit()
+    RecommendationService.invalidate_events()
     db.refresh(event)
     return event
 
@@ -39,17 +49,54 @@ router.add_api_route(
 )
 
 
+@router.post("/import", response_model=EventImportResult)
+def import_events(
+    file: UploadFile = File(..., description="ICS, CSV or NDJSON event feed"),
+    feed_format: Literal["ics", "csv", "ndjson"] | None = Query(
+        None,
+        alias="format",
+        description="Feed format; inferred from the file name or content type when omitted.",
+    ),
+    db: Session = Depends(get_db),
+) -> EventImportResult:
+    fmt = feed_format or EventImportService.detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unable to infer feed format; pass format=ics|csv|ndjson",
+        )
+    stats = EventImportService.import_stream(db, iter_text_lines(file.file), fmt)
+    return EventImportResult(format=fmt, **stats.__dict__)
+
+
 @router.get("/", response_model=list[EventRead])
 def list_events(
+    response: Response,
     start_time: datetime | None = Query(None),
     end_time: datetime | None = Query(None),
     location: str | None = Query(None),
     category: str | None = Query(None),
     viewer_id: str | None = Query(None),
+    overlap: bool = Query(
+        False,
+        description="Match events overlapping [start_time, end_time) instead of events starting inside it.",
+    ),
     upcoming: bool | None = Query(
         None,
         description="Legacy flag: when true, return future events only.",
     ),
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=MAX_EVENT_PAGE_SIZE,
+        description="Page size. When set (or a cursor is given) results are paginated and "
+        "the next page cursor is returned in the X-Next-Cursor header.",
+    ),
+    cursor: str | None = Query(None, description="Opaque cursor from a previous page."),
+    fields: Literal["full", "summary"] = Query(
+        "full",
+        description="Use 'summary' to omit long text columns such as description.",
+    ),
     db: Session = Depends(get_db),
 ) -> list[EventRead]:
     now = datetime.now(timezone.utc)
@@ -61,9 +108,22 @@ def list_events(
         end_time=end_time,
         location=location,
         category=category,
+        overlap=overlap,
     )
-    events = EventService.list_events(db, filters=filters, viewer_id=viewer_id)
-    return events
+    if limit is None and cursor is None and fields == "full":
+        return EventService.list_events(db, filters=filters, viewer_id=viewer_id)
+
+    page = EventService.list_events_page(
+        db,
+        filters=filters,
+        viewer_id=viewer_id,
+        limit=limit or DEFAULT_EVENT_PAGE_SIZE,
+        cursor=cursor,
+        summary=fields == "summary",
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.events
 
 router.add_api_route(
     "",
@@ -74,29 +134,54 @@ router.add_api_route(
 )
 
 
+@router.get("/trending", response_model=list[EventRead])
+def trending_events(
+    limit: int = Query(20, ge=1, le=50),
+    viewer_id: str | None = Query(None),
+    db: Session = Depends(get_db),
+) -> list[EventRead]:
+    events = TrendingService.trending_events(db, limit=limit)
+    EventService.annotate_viewer_interest(db, events, viewer_id)
+    return events
+
+
+@router.get("/recommended", response_model=list[EventRecommendationRead])
+def recommended_events(
+    user_id: str = Query(..., description="User to personalize recommendations for"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+) -> list[EventRecommendationRead]:
+    return RecommendationService.recommend_events(db, user_id, limit=limit)
+
+
 @router.get("/nlp-search", response_model=EventNLPResponse)
-def nlp_event_search(
+async def nlp_event_search(
     q: str = Query(..., description="Natural-language search query"),
     refresh: bool = Query(False),
     viewer_id: str | None = Query(None),
     db: Session = Depends(get_db),
 ) -> EventNLPResponse:
-    filters, events, cached, interpreted = AIService.interpret_event_query(
+    filters, events, cached, interpreted = await AIService.interpret_event_query_async(
         db,
         q,
         refresh=refresh,
         viewer_id=viewer_id,
     )
-    if not cached:
-        db.commit()
-    return EventNLPResponse(
-        query=q,
-        filters=filters,
-        events=events,
-        cached=cached,
-        interpreted_query=interpreted,
-        generated_at=datetime.now(timezone.utc),
-    )
+
+    def respond() -> EventNLPResponse:
+        # Runs in the threadpool: the commit and reading the (expired) events both hit the database.
+        if not cached:
+            db.commit()
+        return EventNLPResponse(
+            query=q,
+            filters=filters,
+            events=events,
+            cached=cached,
+            interpreted_query=interpreted,
+            generated_at=datetime.now(timezone.utc),
+        )
+
+    return await run_in_threadpool(respond)
 
 
 @router.get("/{event_id}", response_model=EventRead)
@@ -117,6 +202,7 @@ def update_event(
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     db.commit()
+    RecommendationService.invalidate_events()
     db.refresh(event)
     return event
 
@@ -128,6 +214,7 @@ def delete_event(event_id: int, db: Session = Depends(get_db)) -> None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     db.delete(event)
     db.commit()
+    RecommendationService.invalidate_events()
     return None
 
 
@@ -145,9 +232,37 @@ def set_interest(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     interest = EventService.set_interest(db, event_id, payload)
     db.commit()
+    RecommendationService.invalidate_user(payload.user_id)
     return EventInterestRead(event_id=event_id, user_id=payload.user_id, interested=interest.interested)
 
 
+@router.post("/interests/bulk", response_model=EventInterestBulkResult)
+def set_interests_bulk(
+    payload: EventInterestBulkRequest,
+    db: Session = Depends(get_db),
+) -> EventInterestBulkResult:
+    """Mark or unmark many events for one user in a single statement.
+
+    Unknown event ids are reported in ``missing`` rather than failing the batch.
+    """
+    result = EventService.set_interests_bulk(
+        db,
+        payload.user_id,
+        [(item.event_id, item.interested) for item in payload.items],
+    )
+    db.commit()
+    RecommendationService.invalidate_user(payload.user_id)
+    return EventInterestBulkResult(
+        user_id=payload.user_id,
+        interests=[
+            EventInterestRead(event_id=event_id, user_id=payload.user_id, interested=interested)
+            for event_id, interested in result.interests.items()
+        ],
+        changed=result.changed,
+        missing=result.missing,
+    )
+
+
 @router.get("/{event_id}/interest", response_model=EventInterestRead)
 def get_interest(
     event_id: int,
@@ -178,6 +293,7 @@ def legacy_toggle_interest(
         EventInterestRequest(user_id=payload.user_id, interested=desired),
     )
     db.commit()
+    RecommendationService.invalidate_user(payload.user_id)
     count = EventService.interest_count(db, event_id)
     return {
         "event_id": event_id,
@@ -6,6 +6,7 @@ import uuid
 
 from ..database import get_db
 from ..schemas.user import UserMatchResponse, SwipeAction, SwipeResponse, UserMatchCandidate
+from ..services.insight_prewarm import InsightPrewarmer
 from ..services.matching import MatchingService
 from ..models.user import User
 from ..models.user_match import UserMatch
@@ -86,6 +87,7 @@ def record_swipe(
         
         if reciprocal_swipe:
             is_mutual = True
+            InsightPrewarmer.enqueue(user_id, swipe.target_user_id)
             message = "It's a match! 🎉"
         else:
             message = "Swipe recorded. Waiting for them to swipe back!"
@@ -1,31 +1,58 @@
-from math import atan2, cos, radians, sin, sqrt
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app import models, schemas
 from app.database import get_db
+from app.services.http_cache import etag_matches
+from app.services.places import DEFAULT_PLACE_PAGE_SIZE, MAX_PLACE_PAGE_SIZE, PlaceService
+from app.services.tags import TagService
+from app.services.transit import TransitService
 
 router = APIRouter(
     prefix="/places",
     tags=["places"],
 )
 
+# Candidates considered when re-ranking by travel time instead of distance or rating.
+TRAVEL_RANK_CANDIDATES = 25
+
 @router.post("/", response_model=schemas.PlaceOut, status_code=status.HTTP_201_CREATED)
 def create_place(place: schemas.PlaceCreate, db: Session = Depends(get_db)):
-    payload = place.dict()
-    tags = payload.pop("tags", None)
-    payload["tags"] = ",".join(tags) if tags else None
-    db_place = models.Place(**payload)
-    db.add(db_place)
+    db_place = PlaceService.create_place(db, place)
     db.commit()
+    # Only once the place is visible to other sessions, or a reader could re-cache the old catalogue.
+    PlaceService.invalidate_indexes()
+    TransitService.invalidate()
     db.refresh(db_place)
     return db_place
 
 @router.get("/", response_model=List[schemas.PlaceOut])
-def get_all_places(db: Session = Depends(get_db)):
-    return db.query(models.Place).all()
+def get_all_places(
+    response: Response,
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=MAX_PLACE_PAGE_SIZE,
+        description="Page size. When set (or a cursor is given) results are paginated and "
+        "the next page cursor is returned in the X-Next-Cursor header.",
+    ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header."),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Places by rating: the whole catalogue, or one keyset page when ``limit``/``cursor`` is given."""
+    etag = PlaceService.catalogue_etag(db, limit, cursor)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    if limit is None and cursor is None:
+        return PlaceService.list_places(db)
+    page = PlaceService.list_places_page(db, limit=limit or DEFAULT_PLACE_PAGE_SIZE, cursor=cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.places
 
 @router.get("/top", response_model=List[schemas.PlaceOut])
 def get_top_places(db: Session = Depends(get_db), limit: int = 5):
@@ -38,16 +65,35 @@ def get_nearby_places(
     lng: float = Query(..., ge=-180, le=180),
     radius_km: float = Query(1.5, gt=0),
     limit: int = Query(10, ge=1, le=50),
+    rank_by: Literal["distance", "travel_time"] = Query("distance"),
     db: Session = Depends(get_db),
 ) -> List[schemas.PlaceOut]:
-    candidates = db.query(models.Place).filter(models.Place.latitude.isnot(None), models.Place.longitude.isnot(None)).all()
-    results: list[tuple[float, models.Place]] = []
-    for place in candidates:
-        distance = _haversine(lat, lng, place.latitude, place.longitude)
-        if distance <= radius_km:
-            results.append((distance, place))
-    results.sort(key=lambda item: (item[0], -item[1].rating))
-    return [place for _, place in results[:limit]]
+    if rank_by == "distance":
+        return PlaceService.nearby(db, lat, lng, radius_km=radius_km, limit=limit)
+    # Re-rank the closest candidates: the nearest places are not always the quickest to reach.
+    places = PlaceService.nearby(db, lat, lng, radius_km=radius_km, limit=TRAVEL_RANK_CANDIDATES)
+    minutes = TransitService.minutes_from_point(db, lat, lng, places)
+    if not minutes:
+        return places[:limit]
+    order = {place.id: index for index, place in enumerate(places)}
+    places.sort(key=lambda place: (minutes.get(place.id, float("inf")), order[place.id]))
+    return places[:limit]
+
+
+@router.get("/nearest", response_model=List[schemas.PlaceDistanceOut])
+def get_nearest_places(
+    *,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100),
+    radius_km: Optional[float] = Query(None, gt=0, description="Optional cap; omit for pure k-nearest."),
+    db: Session = Depends(get_db),
+) -> List[schemas.PlaceDistanceOut]:
+    ranked = PlaceService.nearest(db, lat, lng, k=k, radius_km=radius_km)
+    return [
+        schemas.PlaceDistanceOut(**schemas.PlaceOut.from_orm(place).dict(), distance_km=round(distance, 3))
+        for place, distance in ranked
+    ]
 
 
 @router.get("/recommend", response_model=List[schemas.PlaceOut])
@@ -56,38 +102,41 @@ def recommend_places(
     limit: int = Query(5, ge=1, le=20),
     db: Session = Depends(get_db),
 ):
-    tags = [tag.strip().lower() for tag in interests.split(",") if tag.strip()]
-    if not tags:
-        return []
-    results = db.query(models.Place).all()
-    matches: list[tuple[int, models.Place]] = []
-    for place in results:
-        place_tags = (place.tags or "").lower().split(",")
-        overlap = len({tag for tag in place_tags if tag.strip() in tags})
-        if overlap:
-            matches.append((overlap, place))
-    matches.sort(key=lambda item: (-item[0], -item[1].rating))
-    return [place for _, place in matches[:limit]]
+    return PlaceService.recommend(db, interests, limit=limit)
 
 
 @router.get("/date-ideas", response_model=List[schemas.DateIdeaSuggestion])
 def date_ideas(
     interests: Optional[str] = Query(None, description="Comma separated interests."),
     limit: int = Query(3, ge=1, le=10),
+    from_place_id: Optional[int] = Query(None, description="Rank by shuttle travel time from this place."),
     db: Session = Depends(get_db),
 ):
-    interest_list = [tag.strip().lower() for tag in (interests.split(",") if interests else []) if tag.strip()]
-    places = db.query(models.Place).order_by(models.Place.rating.desc()).limit(25).all()
+    interest_list = TagService.normalize_all(interests)
+    minutes: dict[int, float] = {}
+    if from_place_id is None:
+        places = PlaceService.top_rated(db, interest_list, limit=limit)
+    else:
+        places = PlaceService.top_rated(db, interest_list, limit=TRAVEL_RANK_CANDIDATES)
+        places = [place for place in places if place.id != from_place_id]
+        minutes = TransitService.travel_minutes(db, from_place_id, [place.id for place in places])
+        if minutes:
+            # Stable sort keeps the rating order among equally quick places.
+            places.sort(key=lambda place: minutes.get(place.id, float("inf")))
+        places = places[:limit]
     suggestions: list[schemas.DateIdeaSuggestion] = []
     for place in places:
-        if len(suggestions) >= limit:
-            break
-        tag_text = (place.tags or "").lower()
-        if interest_list and not any(tag in tag_text for tag in interest_list):
-            continue
         reason = "Great for " + (", ".join(interest_list[:2]) if interest_list else "a relaxed hangout")
         idea = f"Meet at {place.name} and explore {place.location or 'campus'} afterwards."
-        suggestions.append(schemas.DateIdeaSuggestion(place=place, idea=idea, reason=reason))
+        travel = minutes.get(place.id)
+        suggestions.append(
+            schemas.DateIdeaSuggestion(
+                place=place,
+                idea=idea,
+                reason=reason,
+                travel_minutes=round(travel, 1) if travel is not None else None,
+            )
+        )
     return suggestions
 
 
@@ -101,51 +150,63 @@ def create_review(
     payload: schemas.PlaceReviewCreate,
     db: Session = Depends(get_db),
 ):
-    place = db.get(models.Place, place_id)
-    if not place:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
-    review = models.PlaceReview(
-        place_id=place.id,
+    review = PlaceService.add_review(
+        db,
+        place_id,
         reviewer_name=payload.reviewer_name,
         rating=payload.rating,
         comment=payload.comment,
     )
-    db.add(review)
-    _update_place_rating(place, payload.rating)
     db.commit()
+    PlaceService.invalidate_indexes()
     db.refresh(review)
     return review
 
 
 @router.get("/{place_id}/reviews", response_model=List[schemas.PlaceReviewRead])
-def list_reviews(place_id: int, db: Session = Depends(get_db)):
+def list_reviews(
+    place_id: int,
+    response: Response,
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=MAX_PLACE_PAGE_SIZE,
+        description="Page size. When set (or a cursor is given) results are paginated and "
+        "the next page cursor is returned in the X-Next-Cursor header.",
+    ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header."),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """A place's reviews, newest first: all of them, or one keyset page when ``limit``/``cursor`` is given."""
     place = db.get(models.Place, place_id)
     if not place:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
-    return db.query(models.PlaceReview).filter(models.PlaceReview.place_id == place_id).order_by(models.PlaceReview.created_at.desc()).all()
+    etag = PlaceService.place_etag(place, "reviews", limit, cursor)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    if limit is None and cursor is None:
+        return PlaceService.list_reviews(db, place_id)
+    page = PlaceService.list_reviews_page(db, place_id, limit=limit or DEFAULT_PLACE_PAGE_SIZE, cursor=cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.reviews
 
 
 @router.get("/{place_id}", response_model=schemas.PlaceOut)
-def retrieve_place(place_id: int, db: Session = Depends(get_db)):
+def retrieve_place(
+    place_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     place = db.get(models.Place, place_id)
     if not place:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
+    etag = PlaceService.place_etag(place)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return place
 
-
-def _haversine(lat1: float, lon1: float, lat2: float | None, lon2: float | None) -> float:
-    if lat2 is None or lon2 is None:
-        return float("inf")
-    r = 6371  # km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return r * c
-
-
-def _update_place_rating(place: models.Place, new_rating: float) -> None:
-    count = (place.review_count or 0) + 1
-    total = (place.rating or 0.0) * (place.review_count or 0) + new_rating
-    place.review_count = count
-    place.rating = round(total / count, 2)
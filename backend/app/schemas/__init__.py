@@ -2,6 +2,7 @@ from .places import (
     DateIdeaSuggestion,
     PlaceBase,
     PlaceCreate,
+    PlaceDistanceOut,
     PlaceOut,
     PlaceReviewCreate,
     PlaceReviewRead,
@@ -11,6 +12,7 @@ __all__ = [
     "DateIdeaSuggestion",
     "PlaceBase",
     "PlaceCreate",
+    "PlaceDistanceOut",
     "PlaceOut",
     "PlaceReviewCreate",
     "PlaceReviewRead",
@@ -7,6 +7,8 @@ from pydantic import BaseModel, Field, validator
 
 from .events import EventRead
 
+MAX_BATCH_INSIGHT_ITEMS = 50
+
 
 class ParticipantProfile(BaseModel):
     name: str
@@ -31,6 +33,14 @@ class MatchInsightRequest(BaseModel):
     location: Optional[str] = None
 
 
+class MatchInsightBatchItem(MatchInsightRequest):
+    match_id: str = Field(..., min_length=1)
+
+
+class MatchInsightBatchRequest(BaseModel):
+    items: List[MatchInsightBatchItem] = Field(..., min_items=1, max_items=MAX_BATCH_INSIGHT_ITEMS)
+
+
 class MatchInsightResponse(BaseModel):
     match_id: str
     summary_text: str
@@ -42,6 +52,11 @@ class MatchInsightResponse(BaseModel):
         orm_mode = True
 
 
+class MatchInsightBatchResponse(BaseModel):
+    insights: List[MatchInsightResponse]
+    generated: int
+
+
 class DateIdeaWindow(BaseModel):
     start: datetime
     end: datetime
@@ -115,3 +130,33 @@ class DirectChatRequest(BaseModel):
 
 class DirectChatResponse(BaseModel):
     reply_text: str
+
+
+class AIJobStatus(BaseModel):
+    job_id: str
+    kind: str
+    match_id: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    status_url: str
+    result_url: str
+
+
+class AISweepResult(BaseModel):
+    ai_cache_entries: int
+    match_ideas: int
+    batches: int
+    finished_at: datetime
+
+
+class AICacheStatsResponse(BaseModel):
+    hits: int
+    negative_hits: int
+    misses: int
+    evictions: int
+    size: int
+    last_sweep: Optional[AISweepResult] = None
+    swept_total: int = 0
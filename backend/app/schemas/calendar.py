@@ -29,3 +29,9 @@ class CalendarInviteResponse(BaseModel):
     ics_content: str = Field(description="iCalendar format content")
     filename: str = Field(description="Suggested filename for download")
     event_summary: str = Field(description="Human-readable summary")
+
+
+class CalendarFeedResponse(BaseModel):
+    """Subscription details for a user's personal calendar feed."""
+    token: str = Field(description="Secret token embedded in the feed URL")
+    url: str = Field(description="Feed URL to add to a calendar app")
@@ -5,6 +5,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, validator
 
+MAX_BULK_INTEREST_ITEMS = 500
+
 
 class EventBase(BaseModel):
     title: str
@@ -56,11 +58,32 @@ class EventRead(EventBase):
         orm_mode = True
 
 
+class EventRecommendationRead(BaseModel):
+    event: EventRead
+    score: float
+    matched_tags: List[str] = Field(default_factory=list)
+    friends_interested: int = 0
+
+    class Config:
+        orm_mode = True
+
+
 class EventQueryFilters(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     location: Optional[str] = None
     category: Optional[str] = None
+    # When true, start_time/end_time select events overlapping the range
+    # instead of bounding the event start.
+    overlap: bool = False
+
+
+class EventImportResult(BaseModel):
+    format: str
+    inserted: int
+    updated: int
+    skipped: int
+    invalid: int
 
 
 class EventInterestRequest(BaseModel):
@@ -72,3 +95,20 @@ class EventInterestRead(BaseModel):
     event_id: int
     user_id: str
     interested: bool
+
+
+class EventInterestBulkItem(BaseModel):
+    event_id: int
+    interested: bool = True
+
+
+class EventInterestBulkRequest(BaseModel):
+    user_id: str
+    items: List[EventInterestBulkItem] = Field(..., min_items=1, max_items=MAX_BULK_INTEREST_ITEMS)
+
+
+class EventInterestBulkResult(BaseModel):
+    user_id: str
+    interests: List[EventInterestRead]
+    changed: int
+    missing: List[int]
@@ -52,11 +52,25 @@ class PlaceOut(PlaceBase):
     rating: float = 0.0
     review_count: int = 0
 
+    @validator("rating", pre=True, always=True)
+    def _round_rating(cls, value):
+        # The stored average is exact (rating_sum / review_count); present it rounded.
+        return round(value or 0.0, 2)
+
+    @validator("review_count", pre=True, always=True)
+    def _default_review_count(cls, value):
+        return value or 0
+
     class Config:
         orm_mode = True
 
 
+class PlaceDistanceOut(PlaceOut):
+    distance_km: float
+
+
 class DateIdeaSuggestion(BaseModel):
     place: PlaceOut
     idea: str
     reason: str
+    travel_minutes: Optional[float] = None
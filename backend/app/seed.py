@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 from app.database import SessionLocal
 from app.models.event import Event
 from app.models.places import Place
+from app.services.tags import TagService
 
 
 sys.path.append(str(Path(__file__).resolve().parent))
@@ -297,6 +298,9 @@ for payload in event_payloads:
     )
     db.add(event)
 
+db.flush()
+TagService.rebuild_event_tags(db)
+TagService.rebuild_place_tags(db)
 db.commit()
 db.close()
 
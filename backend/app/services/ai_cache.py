@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..config import get_settings
+
+settings = get_settings()
+
+# Sentinel payload remembering that the database had no usable entry.
+_MISSING = object()
+
+
+@dataclass
+class _MemoryEntry:
+    payload: object
+    expires_at: float  # time.monotonic() deadline
+
+
+@dataclass(frozen=True)
+class AICacheStats:
+    hits: int
+    negative_hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class AIMemoryCache:
+    """Process-local LRU tier in front of ``ai_cache_entries``.
+
+    Entries are keyed by ``(category, cache_key)`` and expire after
+    ``ai_memory_cache_ttl_seconds`` or when the database row would, whichever
+    comes first, so other workers' refreshes show up within that window.
+    Database misses are remembered briefly (negative caching) so a burst of
+    identical cold queries costs one SELECT. The table stays the shared tier.
+    """
+
+    _entries: "OrderedDict[tuple[str, str], _MemoryEntry]" = OrderedDict()
+    _hits = 0
+    _negative_hits = 0
+    _misses = 0
+    _evictions = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def lookup(cls, category: str, cache_key: str) -> tuple[bool, dict | None]:
+        """Return ``(found, payload)``; ``found`` with a ``None`` payload is a cached miss."""
+        key = (category, cache_key)
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del cls._entries[key]
+                cls._misses += 1
+                return False, None
+            cls._entries.move_to_end(key)
+            if entry.payload is _MISSING:
+                cls._negative_hits += 1
+                return True, None
+            cls._hits += 1
+            return True, entry.payload
+
+    @classmethod
+    def store(cls, category: str, cache_key: str, payload: dict, *, ttl_seconds: float | None = None) -> None:
+        ttl = settings.ai_memory_cache_ttl_seconds
+        if ttl_seconds is not None:
+            ttl = min(ttl, ttl_seconds)
+        if ttl > 0:
+            cls._put((category, cache_key), payload, ttl)
+
+    @classmethod
+    def store_missing(cls, category: str, cache_key: str) -> None:
+        if settings.ai_memory_cache_negative_ttl_seconds > 0:
+            cls._put((category, cache_key), _MISSING, settings.ai_memory_cache_negative_ttl_seconds)
+
+    @classmethod
+    def discard(cls, category: str, cache_key: str) -> None:
+        with cls._lock:
+            cls._entries.pop((category, cache_key), None)
+
+    @classmethod
+    def stats(cls) -> AICacheStats:
+        with cls._lock:
+            return AICacheStats(
+                hits=cls._hits,
+                negative_hits=cls._negative_hits,
+                misses=cls._misses,
+                evictions=cls._evictions,
+                size=len(cls._entries),
+            )
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+            cls._hits = cls._negative_hits = cls._misses = cls._evictions = 0
+
+    @classmethod
+    def _put(cls, key: tuple[str, str], payload: object, ttl: float) -> None:
+        with cls._lock:
+            cls._entries[key] = _MemoryEntry(payload=payload, expires_at=time.monotonic() + ttl)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > settings.ai_memory_cache_max_entries:
+                cls._entries.popitem(last=False)
+                cls._evictions += 1
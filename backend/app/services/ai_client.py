@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import importlib.util
+import json
 import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import Optional
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
 import httpx
 
 from ..config import Settings, get_settings
+from .circuit_breaker import CircuitBreaker
+from .rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +39,43 @@ class ModerationResult:
 
 
 class AIClient:
-    """Wrapper around Gemini endpoints with graceful fallbacks."""
+    """Wrapper around Gemini endpoints with graceful fallbacks.
+
+    Calls go through long-lived ``httpx`` clients so connections to the
+    provider are pooled and kept alive between requests. The async client
+    is bound to the event loop that created it and is recreated if a
+    different loop (e.g. a new test client) uses it.
+
+    Provider calls are guarded so a slow or failing Gemini degrades to the
+    mock quickly instead of holding requests for the full HTTP timeout: a
+    circuit breaker skips the provider after repeated failures or slow
+    calls, a token bucket caps the request rate, and interactive calls are
+    cut off after ``ai_latency_budget_seconds``.
+    """
 
     def __init__(self, settings: Settings | None = None):
         self.settings = settings or get_settings()
+        self.breaker = CircuitBreaker(
+            failure_threshold=self.settings.ai_breaker_failure_threshold,
+            slow_call_seconds=self.settings.ai_breaker_slow_call_seconds,
+            reset_seconds=self.settings.ai_breaker_reset_seconds,
+        )
+        self.limiter: TokenBucket | None = None
+        if self.settings.ai_provider_requests_per_second > 0:
+            self.limiter = TokenBucket(
+                rate_per_second=self.settings.ai_provider_requests_per_second,
+                capacity=max(1.0, float(self.settings.ai_provider_burst)),
+            )
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self) -> str:
+        """Name of the backend that will serve calls, for per-provider limits."""
+        return "gemini" if self.settings.gemini_api_key else "mock"
 
     def generate_text(
         self,
@@ -40,17 +84,206 @@ class AIClient:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 400,
+        background: bool = False,
+        on_late_result: Callable[[str], None] | None = None,
     ) -> str:
-        if self.settings.gemini_api_key:
+        """Gemini's reply, or the mock when the provider is unavailable, over budget or failing.
+
+        A call that outlives ``ai_latency_budget_seconds`` keeps running in
+        the background; when it succeeds its text is passed to
+        ``on_late_result`` so the caller can cache it. ``background`` callers
+        (job workers) wait for rate-limit capacity and the full reply.
+        """
+        if not self._admit(background=background):
+            return self._fallback(prompt)
+        if background:
             try:
-                return self._call_gemini(prompt, system_prompt, temperature)
+                return self._timed(self._call_gemini, prompt, system_prompt, temperature)
             except Exception as exc:  # pragma: no cover - network failure path
                 logger.warning("Gemini call failed, falling back to mock: %s", exc)
+                return self._fallback(prompt)
+        future = self._budget_executor().submit(
+            self._timed, self._call_gemini, prompt, system_prompt, temperature
+        )
+        budget = self.settings.ai_latency_budget_seconds
+        try:
+            return future.result(timeout=budget if budget > 0 else None)
+        except FutureTimeoutError:
+            logger.warning("Gemini call exceeded its %.1fs budget, serving fallback", budget)
+            future.add_done_callback(partial(self._deliver_late, on_late_result))
+        except Exception as exc:  # pragma: no cover - network failure path
+            logger.warning("Gemini call failed, falling back to mock: %s", exc)
         return self._fallback(prompt)
 
+    async def generate_text_async(
+        self,
+        prompt: str,
+        *,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 400,
+        background: bool = False,
+        on_late_result: Callable[[str], None] | None = None,
+    ) -> str:
+        """Async ``generate_text``.
+
+        ``background`` callers (batch jobs) wait for rate-limit capacity and
+        are not held to the latency budget. ``on_late_result`` runs in the
+        default executor, off the event loop.
+        """
+        if not await self._admit_async(background=background):
+            return self._fallback(prompt)
+        task = asyncio.ensure_future(
+            self._timed_async(self._call_gemini_async(prompt, system_prompt, temperature))
+        )
+        budget = 0 if background else self.settings.ai_latency_budget_seconds
+        try:
+            if budget > 0:
+                return await asyncio.wait_for(asyncio.shield(task), budget)
+            return await task
+        except asyncio.TimeoutError:
+            logger.warning("Gemini call exceeded its %.1fs budget, serving fallback", budget)
+            loop = asyncio.get_running_loop()
+            task.add_done_callback(
+                lambda done: loop.run_in_executor(None, self._deliver_late, on_late_result, done)
+            )
+        except Exception as exc:  # pragma: no cover - network failure path
+            logger.warning("Gemini call failed, falling back to mock: %s", exc)
+        return self._fallback(prompt)
+
+    async def stream_text_async(
+        self,
+        prompt: str,
+        *,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 400,
+    ) -> AsyncIterator[str]:
+        """Yield the reply in chunks as Gemini produces them (word chunks of the mock otherwise).
+
+        Unlike ``generate_text`` a provider failure is raised, since part of
+        the reply may already have been relayed.
+        """
+        if not self._admit():
+            for chunk in self.chunk_text(self._fallback(prompt)):
+                yield chunk
+            return
+        # The breaker judges streams by time to first chunk; long replies are not slow ones.
+        started = time.monotonic()
+        first_chunk: float | None = None
+        failed = False
+        try:
+            async with self._async_http().stream(
+                "POST",
+                self._gemini_url("streamGenerateContent", alt="sse"),
+                json=self._gemini_payload(prompt, system_prompt, temperature),
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = self._chunk_from_event(json.loads(line[len("data:"):]))
+                    if text:
+                        if first_chunk is None:
+                            first_chunk = time.monotonic() - started
+                        yield text
+        except Exception:
+            failed = True
+            self.breaker.record_failure()
+            raise
+        finally:
+            # Also reached when the consumer stops early (e.g. the client disconnected).
+            # A stream abandoned before its first chunk says nothing about the
+            # provider, so it only hands back a half-open trial slot.
+            if not failed and first_chunk is not None:
+                self.breaker.record_success(first_chunk)
+            elif not failed:
+                self.breaker.release()
+
+    @staticmethod
+    def chunk_text(text: str) -> list[str]:
+        """Split ``text`` into word-sized chunks that concatenate back to it."""
+        return re.findall(r"\s*\S+|\s+$", text)
+
     def moderate_text(self, content: str) -> ModerationResult:
         return self._heuristic_moderation(content)
 
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client, self._async_client, self._async_loop = self._async_client, None, None
+        if client is not None:
+            await client.aclose()
+
+    # --- Provider guards ----------------------------------------------------------
+    def _admit(self, *, background: bool = False) -> bool:
+        """Whether a provider call may start now; only ``background`` callers wait for the limiter."""
+        if not self.settings.gemini_api_key:
+            return False
+        # Take the rate-limit token first so a refused call never holds the breaker's trial slot.
+        if self.limiter is not None:
+            if background:
+                self.limiter.acquire_blocking()
+            elif not self.limiter.try_acquire():
+                logger.debug("Gemini rate limit reached, serving fallback")
+                return False
+        return self.breaker.allow()
+
+    async def _admit_async(self, *, background: bool) -> bool:
+        if not background:
+            return self._admit()
+        if not self.settings.gemini_api_key:
+            return False
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        return self.breaker.allow()
+
+    def _timed(self, call: Callable[..., str], *args: Any) -> str:
+        started = time.monotonic()
+        try:
+            result = call(*args)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success(time.monotonic() - started)
+        return result
+
+    async def _timed_async(self, call: Awaitable[str]) -> str:
+        started = time.monotonic()
+        try:
+            result = await call
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success(time.monotonic() - started)
+        return result
+
+    @staticmethod
+    def _deliver_late(on_late_result: Callable[[str], None] | None, done: Future | asyncio.Future) -> None:
+        if on_late_result is None or done.cancelled() or done.exception() is not None:
+            return
+        try:
+            on_late_result(done.result())
+        except Exception as exc:
+            logger.warning("Storing a late Gemini result failed: %s", exc)
+
+    def _budget_executor(self) -> ThreadPoolExecutor:
+        # Sync calls run here so the caller can stop waiting while the request finishes.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.settings.ai_http_max_connections, thread_name_prefix="ai-call"
+                )
+            return self._executor
+
     # --- Provider implementations -------------------------------------------------
     def _call_gemini(
         self,
@@ -58,8 +291,35 @@ class AIClient:
         system_prompt: Optional[str],
         temperature: float,
     ) -> str:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.settings.gemini_model}:generateContent"
-        payload = {
+        response = self._sync_http().post(
+            self._gemini_url("generateContent"),
+            json=self._gemini_payload(prompt, system_prompt, temperature),
+        )
+        response.raise_for_status()
+        return self._parse_gemini(response.json())
+
+    async def _call_gemini_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+    ) -> str:
+        response = await self._async_http().post(
+            self._gemini_url("generateContent"),
+            json=self._gemini_payload(prompt, system_prompt, temperature),
+        )
+        response.raise_for_status()
+        return self._parse_gemini(response.json())
+
+    def _gemini_url(self, method: str, **params: str) -> str:
+        query = "".join(f"&{name}={value}" for name, value in params.items())
+        return (
+            f"{self.settings.gemini_base_url.rstrip('/')}/"
+            f"{self.settings.gemini_model}:{method}?key={self.settings.gemini_api_key}{query}"
+        )
+
+    def _gemini_payload(self, prompt: str, system_prompt: Optional[str], temperature: float) -> dict:
+        return {
             "contents": [
                 {
                     "role": "user",
@@ -70,14 +330,53 @@ class AIClient:
             ],
             "generationConfig": {"temperature": temperature},
         }
-        response = httpx.post(f"{url}?key={self.settings.gemini_api_key}", json=payload, timeout=20)
-        response.raise_for_status()
-        data = response.json()
+
+    @staticmethod
+    def _parse_gemini(data: dict) -> str:
         candidates = data.get("candidates") or []
         if not candidates:
             raise RuntimeError("Gemini returned no candidates")
         return candidates[0]["content"]["parts"][0]["text"].strip()
 
+    @staticmethod
+    def _chunk_from_event(data: dict) -> str:
+        candidates = data.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    # --- HTTP clients -------------------------------------------------------------
+    def _client_options(self) -> dict:
+        settings = self.settings
+        return {
+            "timeout": httpx.Timeout(settings.ai_http_timeout_seconds),
+            "limits": httpx.Limits(
+                max_connections=settings.ai_http_max_connections,
+                max_keepalive_connections=settings.ai_http_max_keepalive_connections,
+                keepalive_expiry=settings.ai_http_keepalive_expiry_seconds,
+            ),
+        }
+
+    def _sync_http(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._client_options())
+            return self._client
+
+    def _async_http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async_client is None or self._async_loop is not loop:
+                # A pool opened on another (possibly closed) loop cannot be reused here.
+                self._async_client = httpx.AsyncClient(http2=self._http2_enabled(), **self._client_options())
+                self._async_loop = loop
+            return self._async_client
+
+    def _http2_enabled(self) -> bool:
+        # httpx negotiates HTTP/2 only with the optional ``h2`` package installed.
+        return self.settings.ai_http2 and importlib.util.find_spec("h2") is not None
+
     # --- Fallbacks ----------------------------------------------------------------
     @staticmethod
     def _default_system_prompt() -> str:
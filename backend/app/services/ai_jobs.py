@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MAX_TRACKED_JOBS = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class AIJob:
+    id: str
+    kind: str
+    match_id: str
+    status: str = QUEUED
+    error: str | None = None
+    created_at: datetime = field(default_factory=_utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+
+class AIJobQueue:
+    """In-process worker pool for slow AI generation.
+
+    Each job runs in a pool thread with its own session bound to the same
+    engine as the request that submitted it, and commits on success. A
+    second submission for a match whose job is still queued or running gets
+    the existing job back. Finished jobs are kept (up to ``MAX_TRACKED_JOBS``)
+    so clients can poll their status; results live in the regular tables.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._jobs: "OrderedDict[str, AIJob]" = OrderedDict()
+        self._active: dict[tuple[str, str], AIJob] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, match_id: str, bind: Engine, work: Callable[[Session], Any]) -> AIJob:
+        with self._lock:
+            existing = self._active.get((kind, match_id))
+            if existing is not None:
+                return existing
+            job = AIJob(id=uuid.uuid4().hex, kind=kind, match_id=match_id)
+            self._jobs[job.id] = job
+            self._active[(kind, match_id)] = job
+            self._trim()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-job")
+            executor = self._executor
+        executor.submit(self._run, job, sessionmaker(bind=bind, autoflush=False, future=True), work)
+        return job
+
+    def get(self, job_id: str) -> AIJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self, kind: str, match_id: str) -> AIJob | None:
+        with self._lock:
+            return self._active.get((kind, match_id))
+
+    def shutdown(self, *, wait: bool = False) -> None:
+        """Stop the pool; with ``wait`` every submitted job finishes first. Later submits start a new pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _run(self, job: AIJob, session_factory: sessionmaker, work: Callable[[Session], Any]) -> None:
+        job.status = RUNNING
+        job.started_at = _utcnow()
+        session = session_factory()
+        try:
+            work(session)
+            session.commit()
+            job.status = SUCCEEDED
+        except Exception as exc:
+            session.rollback()
+            logger.warning("AI job %s (%s) failed: %s", job.id, job.kind, exc)
+            job.error = getattr(exc, "detail", None) or str(exc)
+            job.status = FAILED
+        finally:
+            session.close()
+            job.finished_at = _utcnow()
+            with self._lock:
+                if self._active.get((job.kind, job.match_id)) is job:
+                    del self._active[(job.kind, job.match_id)]
+
+    def _trim(self) -> None:
+        # Forget the oldest finished jobs; active ones are always kept.
+        excess = len(self._jobs) - MAX_TRACKED_JOBS
+        for job_id in [job_id for job_id, job in self._jobs.items() if not job.active][: max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+ai_jobs = AIJobQueue(max_workers=settings.ai_job_workers)
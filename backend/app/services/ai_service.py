@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import re
+import threading
 from datetime import datetime, timedelta, timezone
 from hashlib import sha256
-from typing import Sequence
+from typing import AsyncIterator, Callable, Sequence
 
 from fastapi import HTTPException, status
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
 from ..config import get_settings
+from ..database import upsert_insert
 from ..demo_personas import DemoPersona, DemoPersonaRegistry
 from ..models import AICacheEntry, Event, MatchIdea, MatchInsight, Place
 from ..schemas.ai import (
@@ -22,119 +26,250 @@ from ..schemas.ai import (
     MatchInsightRequest,
 )
 from ..schemas.events import EventQueryFilters
+from .ai_cache import AIMemoryCache
 from .ai_client import AIClient, ModerationResult
 from .events import EventService
+from .rate_limit import TokenBucket
+from .single_flight import SingleFlight
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
+
+_INSIGHT_UPSERT_COLUMNS = (
+    "summary_text",
+    "generated_at",
+    "input_fingerprint",
+    "context_snapshot",
+    "moderation_labels",
+)
+_IDEA_UPSERT_COLUMNS = (
+    "title",
+    "description",
+    "location_hint",
+    "generated_at",
+    "expires_at",
+    "payload_fingerprint",
+    "context_snapshot",
+    "source",
+)
+# Receives model output that arrived after the latency budget (see AIClient.generate_text).
+LateResult = Callable[[str], None]
+
 ai_client = AIClient(settings)
+# Shared by sync (threadpool) and async callers; sync callers must not run on the event loop thread.
+generation_flight = SingleFlight()
+# The ``*_async`` methods hand every database phase to a worker thread with
+# ``asyncio.to_thread`` and await only the model call on the event loop.
 
 
 class AIService:
     """Domain-specific helpers for AI-powered features."""
 
+    # Per-provider token buckets for batch generation.
+    _limiters: dict[str, TokenBucket] = {}
+    _limiter_lock = threading.Lock()
+
     @classmethod
     def upsert_match_insight(
         cls,
         db: Session,
         match_id: str,
         payload: MatchInsightRequest,
+        *,
+        background: bool = False,
     ) -> tuple[MatchInsight, bool]:
-        fingerprint = cls._fingerprint(payload.dict())
-        record = cls._get_match_insight(db, match_id)
-        if record and record.input_fingerprint == fingerprint:
-            if not cls._is_expired(record.generated_at, hours=settings.ai_insight_ttl_hours):
-                return record, True
+        record, fingerprint, fresh = cls._cached_match_insight(db, match_id, payload)
+        if fresh:
+            return record, True
+        summary, moderation_meta = cls._generate_and_moderate(
+            cls._build_match_prompt(payload),
+            background=background,
+            on_late_result=cls._late_writer(db, cls._late_insight_store(match_id, payload, fingerprint)),
+        )
+        return cls._store_match_insight(db, match_id, payload, fingerprint, summary, moderation_meta), False
 
-        prompt = cls._build_match_prompt(payload)
-        summary, moderation_meta = cls._generate_and_moderate(prompt)
+    @classmethod
+    async def upsert_match_insight_async(
+        cls,
+        db: Session,
+        match_id: str,
+        payload: MatchInsightRequest,
+    ) -> tuple[MatchInsight, bool]:
+        record, fingerprint, fresh = await asyncio.to_thread(cls._cached_match_insight, db, match_id, payload)
+        if fresh:
+            return record, True
+        summary, moderation_meta = await cls._generate_and_moderate_async(
+            cls._build_match_prompt(payload),
+            on_late_result=cls._late_writer(db, cls._late_insight_store(match_id, payload, fingerprint)),
+        )
+        record = await asyncio.to_thread(
+            cls._store_match_insight, db, match_id, payload, fingerprint, summary, moderation_meta
+        )
+        return record, False
 
-        snapshot = cls._snapshot_payload(payload.dict())
-        if record is None:
-            record = MatchInsight(
-                match_id=match_id,
-                summary_text=summary,
-                context_snapshot=snapshot,
-                input_fingerprint=fingerprint,
-                moderation_labels=moderation_meta,
+    @classmethod
+    def cached_match_insight(cls, db: Session, match_id: str, payload: MatchInsightRequest) -> MatchInsight | None:
+        """The stored insight if it can be served for ``payload`` without generating."""
+        record, _, fresh = cls._cached_match_insight(db, match_id, payload)
+        return record if fresh else None
+
+    @classmethod
+    async def generate_match_insights_batch_async(
+        cls,
+        db: Session,
+        items: Sequence[tuple[str, MatchInsightRequest]],
+    ) -> list[tuple[MatchInsight, bool]]:
+        """Insights for many matches: reuse fresh ones, generate the rest concurrently.
+
+        Generation is bounded by ``ai_batch_concurrency`` and the provider's
+        token bucket; new summaries are written with one bulk upsert. Returns
+        ``(record, cached)`` once per distinct match id, in first-seen order
+        (the last payload wins for repeated ids).
+        """
+        requests = dict(items)
+        existing = await asyncio.to_thread(cls._match_insights_by_id, db, list(requests))
+        fingerprints = {match_id: cls._fingerprint(payload.dict()) for match_id, payload in requests.items()}
+        stale = [
+            match_id
+            for match_id in requests
+            if not cls._insight_is_fresh(existing.get(match_id), fingerprints[match_id])
+        ]
+
+        semaphore = asyncio.Semaphore(settings.ai_batch_concurrency)
+        limiter = cls._provider_limiter(ai_client.provider)
+
+        async def generate(match_id: str) -> dict:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire()
+                summary, moderation_meta = await cls._generate_and_moderate_async(
+                    cls._build_match_prompt(requests[match_id]), background=True
+                )
+            return {
+                "match_id": match_id,
+                "summary_text": summary,
+                "generated_at": datetime.now(timezone.utc),
+                "input_fingerprint": fingerprints[match_id],
+                "context_snapshot": cls._snapshot_payload(requests[match_id].dict()),
+                "moderation_labels": moderation_meta,
+            }
+
+        rows = await asyncio.gather(*(generate(match_id) for match_id in stale))
+        if rows:
+            existing.update(await asyncio.to_thread(cls._store_match_insights, db, rows))
+        generated = set(stale)
+        return [(existing[match_id], match_id not in generated) for match_id in requests]
+
+    @classmethod
+    def _match_insights_by_id(cls, db: Session, match_ids: list[str]) -> dict[str, MatchInsight]:
+        records = db.execute(select(MatchInsight).where(MatchInsight.match_id.in_(match_ids))).scalars()
+        return {record.match_id: record for record in records}
+
+    @classmethod
+    def _store_match_insights(cls, db: Session, rows: list[dict]) -> dict[str, MatchInsight]:
+        """Bulk-upsert generated insights and return the stored rows by match id."""
+        statement = upsert_insert(db, MatchInsight).values(rows)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[MatchInsight.match_id],
+                set_={column: statement.excluded[column] for column in _INSIGHT_UPSERT_COLUMNS},
             )
-            db.add(record)
-        else:
-            record.summary_text = summary
-            record.generated_at = datetime.now(timezone.utc)
-            record.context_snapshot = snapshot
-            record.input_fingerprint = fingerprint
-            record.moderation_labels = moderation_meta
-        db.flush()
-        return record, False
+        )
+        refreshed = db.execute(
+            select(MatchInsight)
+            .where(MatchInsight.match_id.in_([row["match_id"] for row in rows]))
+            .execution_options(populate_existing=True)
+        ).scalars()
+        return {record.match_id: record for record in refreshed}
+
+    @classmethod
+    def _provider_limiter(cls, provider: str) -> TokenBucket | None:
+        if provider == "mock" or settings.ai_batch_requests_per_minute <= 0:
+            return None
+        with cls._limiter_lock:
+            limiter = cls._limiters.get(provider)
+            if limiter is None:
+                rate = settings.ai_batch_requests_per_minute / 60.0
+                limiter = TokenBucket(rate_per_second=rate, capacity=max(1.0, float(settings.ai_batch_concurrency)))
+                cls._limiters[provider] = limiter
+            return limiter
+
+    @classmethod
+    def has_match_insight(cls, db: Session, match_id: str) -> bool:
+        return cls._get_match_insight(db, match_id) is not None
 
     @classmethod
     def get_match_insight(cls, db: Session, match_id: str, *, refresh: bool = False) -> tuple[MatchInsight, bool]:
-        record = cls._get_match_insight(db, match_id)
-        if record is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No insight cached for this match. Submit a POST with participant context first.",
-            )
+        record, stale_payload = cls._match_insight_for_read(db, match_id, refresh=refresh)
+        if stale_payload is None:
+            return record, True
+        return cls.upsert_match_insight(db, match_id, stale_payload)
 
-        needs_refresh = refresh or cls._is_expired(record.generated_at, hours=settings.ai_insight_ttl_hours)
-        if not needs_refresh:
+    @classmethod
+    async def get_match_insight_async(
+        cls, db: Session, match_id: str, *, refresh: bool = False
+    ) -> tuple[MatchInsight, bool]:
+        record, stale_payload = await asyncio.to_thread(cls._match_insight_for_read, db, match_id, refresh=refresh)
+        if stale_payload is None:
             return record, True
+        return await cls.upsert_match_insight_async(db, match_id, stale_payload)
 
-        payload = MatchInsightRequest(**record.context_snapshot)
-        return cls.upsert_match_insight(db, match_id, payload)
+    @classmethod
+    def generate_date_ideas(
+        cls, db: Session, payload: DateIdeaRequest, *, background: bool = False
+    ) -> tuple[list[MatchIdea], bool]:
+        fingerprint = cls._fingerprint(payload.dict())
+        existing = cls._fresh_match_ideas(db, payload.match_id, fingerprint)
+        if existing:
+            return existing, True
+        places = cls._list_places(db)
+        raw = cls._generate(
+            cls._build_ideas_prompt(payload, places),
+            max_tokens=500,
+            background=background,
+            on_late_result=cls._late_writer(db, cls._late_ideas_store(payload, fingerprint)),
+        )
+        return cls._store_date_ideas(db, payload, fingerprint, cls._ideas_from_raw(raw, payload, places)), False
 
     @classmethod
-    def generate_date_ideas(cls, db: Session, payload: DateIdeaRequest) -> tuple[list[MatchIdea], bool]:
+    async def generate_date_ideas_async(cls, db: Session, payload: DateIdeaRequest) -> tuple[list[MatchIdea], bool]:
         fingerprint = cls._fingerprint(payload.dict())
-        existing = cls._get_match_ideas(db, payload.match_id)
-        if (
-            existing
-            and existing[0].payload_fingerprint == fingerprint
-            and not cls._ideas_expired(existing)
-        ):
+        existing = await asyncio.to_thread(cls._fresh_match_ideas, db, payload.match_id, fingerprint)
+        if existing:
             return existing, True
+        places = await asyncio.to_thread(cls._list_places, db)
+        raw = await cls._generate_async(
+            cls._build_ideas_prompt(payload, places),
+            max_tokens=500,
+            on_late_result=cls._late_writer(db, cls._late_ideas_store(payload, fingerprint)),
+        )
+        ideas = cls._ideas_from_raw(raw, payload, places)
+        return await asyncio.to_thread(cls._store_date_ideas, db, payload, fingerprint, ideas), False
 
-        ideas_payloads = cls._create_date_ideas_payload(payload, cls._list_places(db))
-        if not ideas_payloads:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unable to craft ideas")
+    @classmethod
+    def cached_date_ideas(cls, db: Session, payload: DateIdeaRequest) -> list[MatchIdea]:
+        """Stored ideas if they can be served for ``payload`` without generating."""
+        return cls._fresh_match_ideas(db, payload.match_id, cls._fingerprint(payload.dict()))
 
-        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.ai_idea_ttl_days)
-        snapshot = cls._snapshot_payload(payload.dict())
-        db.execute(delete(MatchIdea).where(MatchIdea.match_id == payload.match_id))
-        db.flush()
-
-        records: list[MatchIdea] = []
-        for idx, idea in enumerate(ideas_payloads):
-            record = MatchIdea(
-                match_id=payload.match_id,
-                idea_rank=idx,
-                title=idea["title"],
-                description=idea["description"],
-                location_hint=idea.get("location"),
-                expires_at=expires_at,
-                payload_fingerprint=fingerprint,
-                context_snapshot=snapshot,
-            )
-            db.add(record)
-            records.append(record)
-        db.flush()
-        return records, False
+    @classmethod
+    def has_date_ideas(cls, db: Session, match_id: str) -> bool:
+        return bool(cls._get_match_ideas(db, match_id))
 
     @classmethod
     def list_date_ideas(cls, db: Session, match_id: str, *, refresh: bool = False) -> tuple[list[MatchIdea], bool]:
-        ideas = cls._get_match_ideas(db, match_id)
-        if not ideas:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No ideas cached for this match. Submit a POST to /ideas first.",
-            )
-
-        needs_refresh = refresh or cls._ideas_expired(ideas)
-        if not needs_refresh:
+        ideas, stale_payload = cls._match_ideas_for_read(db, match_id, refresh=refresh)
+        if stale_payload is None:
             return ideas, True
+        return cls.generate_date_ideas(db, stale_payload)
 
-        request_payload = DateIdeaRequest(**ideas[0].context_snapshot)
-        return cls.generate_date_ideas(db, request_payload)
+    @classmethod
+    async def list_date_ideas_async(
+        cls, db: Session, match_id: str, *, refresh: bool = False
+    ) -> tuple[list[MatchIdea], bool]:
+        ideas, stale_payload = await asyncio.to_thread(cls._match_ideas_for_read, db, match_id, refresh=refresh)
+        if stale_payload is None:
+            return ideas, True
+        return await cls.generate_date_ideas_async(db, stale_payload)
 
     @classmethod
     def interpret_event_query(
@@ -148,22 +283,32 @@ class AIService:
         cache_key = cls._fingerprint({"query": query})
         cached = cls._get_cache(db, "event_search", cache_key)
         if cached and not refresh:
-            filters = cls._filters_from_payload(cached.payload.get("filters", {}))
-            interpreted = cached.payload.get("interpreted_query", query)
-            events = cls._filter_events(db, filters, viewer_id=viewer_id)
-            return filters, events, True, interpreted
-
-        filters_dict = cls._call_llm_for_filters(query) or cls._heuristic_filters(query)
-        filters = cls._filters_from_payload(filters_dict)
-        interpreted_query = filters_dict.get("summary") or query
-        cls._set_cache(
-            db,
-            category="event_search",
-            cache_key=cache_key,
-            payload={"filters": filters_dict, "interpreted_query": interpreted_query},
+            return cls._event_query_result(db, query, cached, cached=True, viewer_id=viewer_id)
+        late = cls._late_writer(db, cls._late_event_query_store(query, cache_key))
+        filters_dict = cls._call_llm_for_filters(query, on_late_result=late) or cls._heuristic_filters(query)
+        return cls._store_event_query(db, query, cache_key, filters_dict, viewer_id=viewer_id)
+
+    @classmethod
+    async def interpret_event_query_async(
+        cls,
+        db: Session,
+        query: str,
+        *,
+        refresh: bool = False,
+        viewer_id: str | None = None,
+    ) -> tuple[EventFilters, list[Event], bool, str]:
+        cache_key = cls._fingerprint({"query": query})
+        cached = await asyncio.to_thread(cls._get_cache, db, "event_search", cache_key)
+        if cached and not refresh:
+            return await asyncio.to_thread(
+                cls._event_query_result, db, query, cached, cached=True, viewer_id=viewer_id
+            )
+        late = cls._late_writer(db, cls._late_event_query_store(query, cache_key))
+        filters_dict = await cls._call_llm_for_filters_async(query, on_late_result=late)
+        filters_dict = filters_dict or cls._heuristic_filters(query)
+        return await asyncio.to_thread(
+            cls._store_event_query, db, query, cache_key, filters_dict, viewer_id=viewer_id
         )
-        events = cls._filter_events(db, filters, viewer_id=viewer_id)
-        return filters, events, False, interpreted_query
 
     @classmethod
     def generate_direct_reply(cls, payload: DirectChatRequest) -> str:
@@ -173,6 +318,63 @@ class AIService:
             reply, _ = cls._generate_and_moderate(prompt)
         except Exception:  # pragma: no cover - guardrail for unexpected provider issues
             return cls._mock_direct_reply(payload, persona)
+        return cls._finish_direct_reply(payload, persona, reply)
+
+    @classmethod
+    async def generate_direct_reply_async(cls, payload: DirectChatRequest) -> str:
+        persona = DemoPersonaRegistry.get(payload.partner_id or payload.partner_name)
+        prompt = cls._compose_direct_prompt(payload, persona)
+        try:
+            reply, _ = await cls._generate_and_moderate_async(prompt)
+        except Exception:  # pragma: no cover - guardrail for unexpected provider issues
+            return cls._mock_direct_reply(payload, persona)
+        return cls._finish_direct_reply(payload, persona, reply)
+
+    @classmethod
+    async def stream_direct_reply_async(cls, payload: DirectChatRequest) -> AsyncIterator[tuple[str, dict]]:
+        """Yield ``(event, data)`` pairs: ``token`` chunks, then ``done`` or ``moderated``.
+
+        Moderation re-checks the accumulated reply before each chunk is
+        relayed, so a flagged reply stops at the chunk that tripped it.
+        """
+        persona = DemoPersonaRegistry.get(payload.partner_id or payload.partner_name)
+        prompt = cls._compose_direct_prompt(payload, persona)
+        reply = ""
+        async for chunk in cls._direct_reply_chunks(payload, persona, prompt):
+            if settings.ai_require_moderation:
+                moderation = ai_client.moderate_text(reply + chunk)
+                if moderation.flagged:
+                    yield "moderated", {"reply_text": "[content removed for safety]", **moderation.metadata}
+                    return
+            reply += chunk
+            yield "token", {"text": chunk}
+        yield "done", {"reply_text": reply.strip()}
+
+    @classmethod
+    async def _direct_reply_chunks(
+        cls, payload: DirectChatRequest, persona: DemoPersona | None, prompt: str
+    ) -> AsyncIterator[str]:
+        stream = ai_client.stream_text_async(prompt, max_tokens=200)
+        try:
+            first = await anext(stream, "")
+        except Exception as exc:  # pragma: no cover - network failure path
+            logger.warning("Gemini stream failed, falling back to mock: %s", exc)
+            first = ""
+        if not first or first.lstrip().startswith("[mock-ai-"):
+            await stream.aclose()
+            for chunk in AIClient.chunk_text(cls._mock_direct_reply(payload, persona)):
+                yield chunk
+            return
+        yield first
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as exc:  # pragma: no cover - network failure path
+            # Keep what was already relayed rather than switching voices mid-reply.
+            logger.warning("Gemini stream interrupted: %s", exc)
+
+    @classmethod
+    def _finish_direct_reply(cls, payload: DirectChatRequest, persona: DemoPersona | None, reply: str) -> str:
         if reply.startswith("[mock-ai-"):
             return cls._mock_direct_reply(payload, persona)
         return reply.strip()
@@ -199,6 +401,63 @@ class AIService:
             .scalar_one_or_none()
         )
 
+    @classmethod
+    def _cached_match_insight(
+        cls, db: Session, match_id: str, payload: MatchInsightRequest
+    ) -> tuple[MatchInsight | None, str, bool]:
+        """Return the stored insight, the payload fingerprint and whether the insight can be reused."""
+        fingerprint = cls._fingerprint(payload.dict())
+        record = cls._get_match_insight(db, match_id)
+        return record, fingerprint, cls._insight_is_fresh(record, fingerprint)
+
+    @classmethod
+    def _insight_is_fresh(cls, record: MatchInsight | None, fingerprint: str) -> bool:
+        return (
+            record is not None
+            and record.input_fingerprint == fingerprint
+            and not cls._is_expired(record.generated_at, hours=settings.ai_insight_ttl_hours)
+        )
+
+    @classmethod
+    def _match_insight_for_read(
+        cls, db: Session, match_id: str, *, refresh: bool
+    ) -> tuple[MatchInsight, MatchInsightRequest | None]:
+        """Return the stored insight and, when it must be regenerated, the payload to use."""
+        record = cls._get_match_insight(db, match_id)
+        if record is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No insight cached for this match. Submit a POST with participant context first.",
+            )
+        needs_refresh = refresh or cls._is_expired(record.generated_at, hours=settings.ai_insight_ttl_hours)
+        return record, MatchInsightRequest(**record.context_snapshot) if needs_refresh else None
+
+    @classmethod
+    def _store_match_insight(
+        cls,
+        db: Session,
+        match_id: str,
+        payload: MatchInsightRequest,
+        fingerprint: str,
+        summary: str,
+        moderation_meta: dict | None,
+    ) -> MatchInsight:
+        # An upsert, because a late result written from another session may
+        # have inserted this match's row since the caller looked it up.
+        statement = upsert_insert(db, MatchInsight).values(
+            match_id=match_id,
+            summary_text=summary,
+            generated_at=datetime.now(timezone.utc),
+            input_fingerprint=fingerprint,
+            context_snapshot=cls._snapshot_payload(payload.dict()),
+            moderation_labels=moderation_meta,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[MatchInsight.match_id],
+            set_={column: statement.excluded[column] for column in _INSIGHT_UPSERT_COLUMNS},
+        ).returning(MatchInsight)
+        return db.scalars(statement, execution_options={"populate_existing": True}).one()
+
     @classmethod
     def _build_match_prompt(cls, payload: MatchInsightRequest) -> str:
         participant_lines = []
@@ -218,8 +477,116 @@ class AIService:
         )
 
     @classmethod
-    def _generate_and_moderate(cls, prompt: str) -> tuple[str, dict | None]:
-        raw_text = ai_client.generate_text(prompt, max_tokens=200)
+    def _generate(
+        cls,
+        prompt: str,
+        *,
+        max_tokens: int,
+        background: bool = False,
+        on_late_result: LateResult | None = None,
+    ) -> str:
+        """Model output for ``prompt``; concurrent identical requests share one provider call.
+
+        ``on_late_result`` receives the output of a call that overran the
+        latency budget (only the leading caller's callback is used).
+        Background calls get their own flight so they never share an
+        interactive caller's fallback.
+        """
+        key = cls._fingerprint({"prompt": prompt, "max_tokens": max_tokens, "background": background})
+        return generation_flight.do(
+            key,
+            lambda: ai_client.generate_text(
+                prompt, max_tokens=max_tokens, background=background, on_late_result=on_late_result
+            ),
+        )
+
+    @classmethod
+    async def _generate_async(
+        cls,
+        prompt: str,
+        *,
+        max_tokens: int,
+        background: bool = False,
+        on_late_result: LateResult | None = None,
+    ) -> str:
+        key = cls._fingerprint({"prompt": prompt, "max_tokens": max_tokens, "background": background})
+        return await generation_flight.do_async(
+            key,
+            lambda: ai_client.generate_text_async(
+                prompt, max_tokens=max_tokens, background=background, on_late_result=on_late_result
+            ),
+        )
+
+    @classmethod
+    def _generate_and_moderate(
+        cls, prompt: str, *, background: bool = False, on_late_result: LateResult | None = None
+    ) -> tuple[str, dict | None]:
+        return cls._moderate(
+            cls._generate(prompt, max_tokens=200, background=background, on_late_result=on_late_result)
+        )
+
+    @classmethod
+    async def _generate_and_moderate_async(
+        cls, prompt: str, *, background: bool = False, on_late_result: LateResult | None = None
+    ) -> tuple[str, dict | None]:
+        return cls._moderate(
+            await cls._generate_async(
+                prompt, max_tokens=200, background=background, on_late_result=on_late_result
+            )
+        )
+
+    # --- Late results ------------------------------------------------------------
+    @staticmethod
+    def _late_writer(db: Session, store: Callable[[Session, str], None]) -> LateResult:
+        """Callback running ``store`` for a late model output in its own session on ``db``'s engine."""
+        bind = db.get_bind()
+
+        def write(raw: str) -> None:
+            with Session(bind=bind, autoflush=False) as session:
+                store(session, raw)
+                session.commit()
+
+        return write
+
+    @classmethod
+    def _late_insight_store(
+        cls, match_id: str, payload: MatchInsightRequest, fingerprint: str
+    ) -> Callable[[Session, str], None]:
+        def store(session: Session, raw: str) -> None:
+            record = cls._get_match_insight(session, match_id)
+            # A newer payload may have replaced the fallback summary meanwhile.
+            if record is None or record.input_fingerprint == fingerprint:
+                summary, moderation_meta = cls._moderate(raw)
+                cls._store_match_insight(session, match_id, payload, fingerprint, summary, moderation_meta)
+
+        return store
+
+    @classmethod
+    def _late_ideas_store(cls, payload: DateIdeaRequest, fingerprint: str) -> Callable[[Session, str], None]:
+        def store(session: Session, raw: str) -> None:
+            existing = cls._get_match_ideas(session, payload.match_id)
+            if not existing or existing[0].payload_fingerprint == fingerprint:
+                places = cls._list_places(session)
+                cls._store_date_ideas(session, payload, fingerprint, cls._ideas_from_raw(raw, payload, places))
+
+        return store
+
+    @classmethod
+    def _late_event_query_store(cls, query: str, cache_key: str) -> Callable[[Session, str], None]:
+        def store(session: Session, raw: str) -> None:
+            filters_dict = cls._parse_filters(raw)
+            if filters_dict:
+                cls._set_cache(
+                    session,
+                    category="event_search",
+                    cache_key=cache_key,
+                    payload=cls._event_query_payload(query, filters_dict),
+                )
+
+        return store
+
+    @staticmethod
+    def _moderate(raw_text: str) -> tuple[str, dict | None]:
         moderation: ModerationResult | None = None
         sanitized = raw_text
         if settings.ai_require_moderation:
@@ -238,18 +605,73 @@ class AIService:
         )
 
     @classmethod
-    def _create_date_ideas_payload(
-        cls,
-        payload: DateIdeaRequest,
-        places: Sequence[Place],
-    ) -> list[dict]:
-        prompt = cls._build_ideas_prompt(payload, places)
-        raw = ai_client.generate_text(prompt, max_tokens=500)
+    def _ideas_from_raw(cls, raw: str, payload: DateIdeaRequest, places: Sequence[Place]) -> list[dict]:
         parsed = cls._parse_ideas(raw)
         if not parsed:
             parsed = cls._fallback_ideas(payload, places)
         return parsed[:3]
 
+    @classmethod
+    def _fresh_match_ideas(cls, db: Session, match_id: str, fingerprint: str) -> list[MatchIdea]:
+        existing = cls._get_match_ideas(db, match_id)
+        if existing and existing[0].payload_fingerprint == fingerprint and not cls._ideas_expired(existing):
+            return existing
+        return []
+
+    @classmethod
+    def _match_ideas_for_read(
+        cls, db: Session, match_id: str, *, refresh: bool
+    ) -> tuple[list[MatchIdea], DateIdeaRequest | None]:
+        ideas = cls._get_match_ideas(db, match_id)
+        if not ideas:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No ideas cached for this match. Submit a POST to /ideas first.",
+            )
+        needs_refresh = refresh or cls._ideas_expired(ideas)
+        return ideas, DateIdeaRequest(**ideas[0].context_snapshot) if needs_refresh else None
+
+    @classmethod
+    def _store_date_ideas(
+        cls,
+        db: Session,
+        payload: DateIdeaRequest,
+        fingerprint: str,
+        ideas_payloads: list[dict],
+    ) -> list[MatchIdea]:
+        if not ideas_payloads:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unable to craft ideas")
+
+        now = datetime.now(timezone.utc)
+        snapshot = cls._snapshot_payload(payload.dict())
+        rows = [
+            {
+                "match_id": payload.match_id,
+                "idea_rank": idx,
+                "title": idea["title"],
+                "description": idea["description"],
+                "location_hint": idea.get("location"),
+                "generated_at": now,
+                "expires_at": now + timedelta(days=settings.ai_idea_ttl_days),
+                "payload_fingerprint": fingerprint,
+                "context_snapshot": snapshot,
+                "source": "ai",
+            }
+            for idx, idea in enumerate(ideas_payloads)
+        ]
+        # Upsert by rank (a late result may be written from another session
+        # at the same time), then drop ranks the new list no longer has.
+        statement = upsert_insert(db, MatchIdea).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[MatchIdea.match_id, MatchIdea.idea_rank],
+            set_={column: statement.excluded[column] for column in _IDEA_UPSERT_COLUMNS},
+        ).returning(MatchIdea)
+        records = db.scalars(statement, execution_options={"populate_existing": True}).all()
+        db.execute(
+            delete(MatchIdea).where(MatchIdea.match_id == payload.match_id, MatchIdea.idea_rank >= len(rows))
+        )
+        return sorted(records, key=lambda record: record.idea_rank)
+
     @classmethod
     def _build_ideas_prompt(cls, payload: DateIdeaRequest, places: Sequence[Place]) -> str:
         interests = ", ".join(payload.shared_interests) or "exploring campus"
@@ -301,18 +723,64 @@ class AIService:
 
     # --- Event helpers -----------------------------------------------------------
     @classmethod
-    def _call_llm_for_filters(cls, query: str) -> dict:
-        prompt = (
+    def _call_llm_for_filters(cls, query: str, *, on_late_result: LateResult | None = None) -> dict:
+        return cls._parse_filters(
+            cls._generate(cls._filters_prompt(query), max_tokens=300, on_late_result=on_late_result)
+        )
+
+    @classmethod
+    async def _call_llm_for_filters_async(cls, query: str, *, on_late_result: LateResult | None = None) -> dict:
+        return cls._parse_filters(
+            await cls._generate_async(cls._filters_prompt(query), max_tokens=300, on_late_result=on_late_result)
+        )
+
+    @staticmethod
+    def _filters_prompt(query: str) -> str:
+        return (
             "Interpret the following natural language event query. "
             "Return JSON with keys summary, date_range {start,end}, location, category, keywords (list of strings).\n"
             f"Query: {query}"
         )
-        raw = ai_client.generate_text(prompt, max_tokens=300)
+
+    @staticmethod
+    def _parse_filters(raw: str) -> dict:
         try:
             return json.loads(raw)
         except json.JSONDecodeError:
             return {}
 
+    @classmethod
+    def _event_query_result(
+        cls,
+        db: Session,
+        query: str,
+        payload: dict,
+        *,
+        cached: bool,
+        viewer_id: str | None,
+    ) -> tuple[EventFilters, list[Event], bool, str]:
+        filters = cls._filters_from_payload(payload.get("filters", {}))
+        interpreted = payload.get("interpreted_query", query)
+        return filters, cls._filter_events(db, filters, viewer_id=viewer_id), cached, interpreted
+
+    @classmethod
+    def _store_event_query(
+        cls,
+        db: Session,
+        query: str,
+        cache_key: str,
+        filters_dict: dict,
+        *,
+        viewer_id: str | None,
+    ) -> tuple[EventFilters, list[Event], bool, str]:
+        payload = cls._event_query_payload(query, filters_dict)
+        cls._set_cache(db, category="event_search", cache_key=cache_key, payload=payload)
+        return cls._event_query_result(db, query, payload, cached=False, viewer_id=viewer_id)
+
+    @staticmethod
+    def _event_query_payload(query: str, filters_dict: dict) -> dict:
+        return {"filters": filters_dict, "interpreted_query": filters_dict.get("summary") or query}
+
     @classmethod
     def _heuristic_filters(cls, query: str) -> dict:
         lowered = query.lower()
@@ -406,12 +874,21 @@ class AIService:
             end_time=filters.date_range.end if filters.date_range else None,
             location=filters.location,
             category=filters.category,
+            overlap=True,
         )
         return EventService.list_events(db, filters=query_filters, viewer_id=viewer_id)
 
     # --- Cache helpers -----------------------------------------------------------
     @classmethod
-    def _get_cache(cls, db: Session, category: str, cache_key: str) -> AICacheEntry | None:
+    def _get_cache(cls, db: Session, category: str, cache_key: str) -> dict | None:
+        """Cached payload from the in-process tier, falling back to ``ai_cache_entries``.
+
+        Expired rows are treated as misses rather than deleted here, so reads
+        never write; ``_set_cache`` replaces them.
+        """
+        found, payload = AIMemoryCache.lookup(category, cache_key)
+        if found:
+            return payload
         entry = (
             db.execute(
                 select(AICacheEntry).where(
@@ -421,24 +898,31 @@ class AIService:
             )
             .scalar_one_or_none()
         )
-        if entry and cls._ensure_utc(entry.expires_at) < datetime.now(timezone.utc):
-            db.delete(entry)
-            db.flush()
+        remaining = (cls._ensure_utc(entry.expires_at) - datetime.now(timezone.utc)).total_seconds() if entry else 0
+        if remaining <= 0:
+            AIMemoryCache.store_missing(category, cache_key)
             return None
-        return entry
+        AIMemoryCache.store(category, cache_key, entry.payload, ttl_seconds=remaining)
+        return entry.payload
 
     @classmethod
     def _set_cache(cls, db: Session, *, category: str, cache_key: str, payload: dict) -> None:
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.ai_cache_ttl_minutes)
+        ttl = timedelta(minutes=settings.ai_cache_ttl_minutes)
+        now = datetime.now(timezone.utc)
+        statement = upsert_insert(db, AICacheEntry).values(
+            category=category,
+            cache_key=cache_key,
+            payload=payload,
+            created_at=now,
+            expires_at=now + ttl,
+        )
         db.execute(
-            delete(AICacheEntry).where(
-                AICacheEntry.category == category,
-                AICacheEntry.cache_key == cache_key,
+            statement.on_conflict_do_update(
+                index_elements=[AICacheEntry.category, AICacheEntry.cache_key],
+                set_={column: statement.excluded[column] for column in ("payload", "created_at", "expires_at")},
             )
         )
-        entry = AICacheEntry(category=category, cache_key=cache_key, payload=payload, expires_at=expires_at)
-        db.add(entry)
-        db.flush()
+        AIMemoryCache.store(category, cache_key, payload, ttl_seconds=ttl.total_seconds())
 
     # --- Generic helpers ---------------------------------------------------------
     @staticmethod
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import AICacheEntry, MatchIdea
+
+settings = get_settings()
+
+SWEEP_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    ai_cache_entries: int
+    match_ideas: int
+    batches: int
+    finished_at: datetime
+
+    @property
+    def removed(self) -> int:
+        return self.ai_cache_entries + self.match_ideas
+
+
+class AICacheSweeper:
+    """Deletes expired ``ai_cache_entries`` and ``match_ideas`` rows.
+
+    Each batch deletes at most ``SWEEP_BATCH_SIZE`` ids found through the
+    ``expires_at`` index and commits, so the SQLite write lock is held only
+    briefly. A run stops after ``ai_sweep_max_batches`` batches; whatever is
+    left is picked up next time. The first idea of each match is kept: its
+    context snapshot is what GET /ideas regenerates expired ideas from.
+    """
+
+    last_result: SweepResult | None = None
+    total_removed = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def run(cls, db: Session) -> SweepResult:
+        now = datetime.now(timezone.utc)
+        budget = settings.ai_sweep_max_batches
+        cache_removed, cache_batches = cls._sweep(db, AICacheEntry, now, budget)
+        ideas_removed, ideas_batches = cls._sweep(
+            db, MatchIdea, now, budget - cache_batches, MatchIdea.idea_rank > 0
+        )
+        result = SweepResult(
+            ai_cache_entries=cache_removed,
+            match_ideas=ideas_removed,
+            batches=cache_batches + ideas_batches,
+            finished_at=datetime.now(timezone.utc),
+        )
+        with cls._lock:
+            cls.last_result = result
+            cls.total_removed += result.removed
+        return result
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls.last_result = None
+            cls.total_removed = 0
+
+    @staticmethod
+    def _sweep(db: Session, model, now: datetime, max_batches: int, *criteria) -> tuple[int, int]:
+        removed = batches = 0
+        expired = select(model.id).where(model.expires_at < now, *criteria).limit(SWEEP_BATCH_SIZE)
+        while batches < max_batches:
+            count = db.execute(
+                delete(model).where(model.id.in_(expired)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            batches += 1
+            removed += count
+            if count < SWEEP_BATCH_SIZE:
+                break
+        return removed, batches
@@ -2,9 +2,29 @@
 Calendar invite generation service for detected meetups.
 Generates .ics files for calendar imports.
 """
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Iterator, Optional
 import re
+import secrets
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Event, EventInterest, Group, GroupMeeting, GroupMembership
+from ..models.user import User
+from .http_cache import make_etag
+
+FEED_PRODID = "-//Campus Connect//Personal Feed//EN"
+_ICAL_LINE_OCTETS = 75
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class FeedState:
+    """Validators for a user's calendar feed, computed without loading rows."""
+    etag: str
+    last_modified: datetime
 
 
 class CalendarService:
@@ -85,6 +105,191 @@ class CalendarService:
         
         return "\r\n".join(lines)
     
+    @staticmethod
+    def ensure_feed_token(db: Session, user: User, *, rotate: bool = False) -> str:
+        """Return the user's feed token, minting a new one when missing or rotated."""
+        if user.calendar_token and not rotate:
+            return user.calendar_token
+        user.calendar_token = secrets.token_urlsafe(24)
+        db.add(user)
+        db.flush()
+        return user.calendar_token
+
+    @staticmethod
+    def feed_state(db: Session, user: User) -> FeedState:
+        """
+        Compute the feed's ETag and Last-Modified from aggregate queries.
+
+        Counts are folded into the ETag so removals (un-marking an event,
+        leaving a group) change it even when no timestamp moves forward.
+        """
+        interest_changed, interest_total = db.execute(
+            select(func.max(EventInterest.updated_at), func.count(EventInterest.id)).where(
+                EventInterest.user_id == user.id
+            )
+        ).one()
+        event_changed, event_total = db.execute(
+            select(func.max(Event.updated_at), func.count(Event.id))
+            .join(EventInterest, EventInterest.event_id == Event.id)
+            .where(EventInterest.user_id == user.id)
+            .where(EventInterest.interested.is_(True))
+        ).one()
+        meeting_changed, meeting_total = db.execute(
+            select(func.max(GroupMeeting.created_at), func.count(GroupMeeting.id))
+            .join(GroupMembership, GroupMembership.group_id == GroupMeeting.group_id)
+            .where(GroupMembership.user_id == user.id)
+        ).one()
+
+        stamps = [
+            CalendarService._as_utc(value)
+            for value in (interest_changed, event_changed, meeting_changed)
+            if value is not None
+        ]
+        last_modified = max(stamps, default=_EPOCH).replace(microsecond=0)
+        etag = make_etag(
+            user.calendar_token,
+            last_modified.isoformat(),
+            interest_total,
+            event_total,
+            meeting_total,
+        )
+        return FeedState(etag=etag, last_modified=last_modified)
+
+    @staticmethod
+    def feed_rows(db: Session, user: User) -> tuple[list[tuple], list[tuple]]:
+        """Fetch the plain column tuples the feed is rendered from."""
+        events = db.execute(
+            select(
+                Event.id,
+                Event.title,
+                Event.description,
+                Event.location,
+                Event.start_time,
+                Event.end_time,
+                Event.updated_at,
+            )
+            .join(EventInterest, EventInterest.event_id == Event.id)
+            .where(EventInterest.user_id == user.id)
+            .where(EventInterest.interested.is_(True))
+            .order_by(Event.start_time, Event.id)
+        ).all()
+        meetings = db.execute(
+            select(
+                GroupMeeting.id,
+                Group.name,
+                GroupMeeting.note,
+                GroupMeeting.scheduled_start,
+                GroupMeeting.scheduled_end,
+                GroupMeeting.created_at,
+            )
+            .join(Group, Group.id == GroupMeeting.group_id)
+            .join(GroupMembership, GroupMembership.group_id == GroupMeeting.group_id)
+            .where(GroupMembership.user_id == user.id)
+            .order_by(GroupMeeting.scheduled_start, GroupMeeting.id)
+        ).all()
+        return events, meetings
+
+    @staticmethod
+    def iter_feed(events: list[tuple], meetings: list[tuple]) -> Iterator[str]:
+        """
+        Yield a VCALENDAR document chunk by chunk, one VEVENT at a time.
+
+        Works from plain tuples so the stream does not depend on the
+        request's database session staying open.
+        """
+        yield CalendarService._ical_block(
+            [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                f"PRODID:{FEED_PRODID}",
+                "CALSCALE:GREGORIAN",
+                "METHOD:PUBLISH",
+                "X-WR-CALNAME:Campus Connect",
+            ]
+        )
+        for event_id, title, description, location, start, end, updated in events:
+            yield CalendarService._vevent(
+                uid=f"event-{event_id}@campus-connect.app",
+                title=title,
+                description=description,
+                location=location,
+                start=start,
+                end=end or start + timedelta(hours=1),
+                stamp=updated,
+            )
+        for meeting_id, group_name, note, start, end, created in meetings:
+            yield CalendarService._vevent(
+                uid=f"meeting-{meeting_id}@campus-connect.app",
+                title=f"{group_name} meetup",
+                description=note,
+                location=None,
+                start=start,
+                end=end,
+                stamp=created,
+            )
+        yield CalendarService._ical_block(["END:VCALENDAR"])
+
+    @staticmethod
+    def _vevent(
+        *,
+        uid: str,
+        title: str,
+        description: Optional[str],
+        location: Optional[str],
+        start: datetime,
+        end: datetime,
+        stamp: Optional[datetime],
+    ) -> str:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{CalendarService._ical_time(stamp or start)}",
+            f"DTSTART:{CalendarService._ical_time(start)}",
+            f"DTEND:{CalendarService._ical_time(end)}",
+            f"SUMMARY:{CalendarService._escape_ical(title)}",
+        ]
+        if description:
+            lines.append(f"DESCRIPTION:{CalendarService._escape_ical(description)}")
+        if location:
+            lines.append(f"LOCATION:{CalendarService._escape_ical(location)}")
+        lines.extend(["STATUS:CONFIRMED", "END:VEVENT"])
+        return CalendarService._ical_block(lines)
+
+    @staticmethod
+    def _ical_block(lines: list[str]) -> str:
+        return "".join(CalendarService._fold_ical(line) + "\r\n" for line in lines)
+
+    @staticmethod
+    def _fold_ical(line: str) -> str:
+        """Fold a content line at 75 octets without splitting UTF-8 sequences (RFC 5545 3.1)."""
+        if len(line.encode("utf-8")) <= _ICAL_LINE_OCTETS:
+            return line
+        parts: list[str] = []
+        current = ""
+        size = 0
+        limit = _ICAL_LINE_OCTETS
+        for char in line:
+            width = len(char.encode("utf-8"))
+            if size + width > limit:
+                parts.append(current)
+                current, size = "", 0
+                limit = _ICAL_LINE_OCTETS - 1  # continuation lines start with a space
+            current += char
+            size += width
+        parts.append(current)
+        return "\r\n ".join(parts)
+
+    @staticmethod
+    def _ical_time(moment: datetime) -> str:
+        return CalendarService._as_utc(moment).strftime("%Y%m%dT%H%M%SZ")
+
+    @staticmethod
+    def _as_utc(moment: datetime) -> datetime:
+        # SQLite hands back naive datetimes; they are stored as UTC.
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc)
+
     @staticmethod
     def _escape_ical(text: str) -> str:
         """Escape special characters for iCalendar format."""
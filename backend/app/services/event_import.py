@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import csv
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import IO, Iterable, Iterator, Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Event, EventTag
+from ..models.event import content_hash_for, span_bucket_for
+from ..schemas.events import EventCreate
+from .recommendations import RecommendationService
+from .tags import TagService
+
+ImportFormat = Literal["ics", "csv", "ndjson"]
+
+IMPORT_BATCH_SIZE = 500
+_COMPARED_FIELDS = ("description", "category", "end_time", "tags")
+
+
+@dataclass
+class ImportStats:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    invalid: int = 0
+
+
+class EventImportService:
+    """Streams event feeds into the catalogue in batched transactions.
+
+    Rows are identified by ``Event.content_hash`` (title, start, location).
+    Unknown hashes are inserted, known hashes with changed details are
+    updated, and identical rows or repeats within the feed are skipped. The
+    hash is not unique (events created through the API may repeat one); an
+    import always matches the oldest event with that hash.
+    """
+
+    @classmethod
+    def import_stream(
+        cls,
+        db: Session,
+        lines: Iterable[str],
+        fmt: ImportFormat,
+        *,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> ImportStats:
+        stats = ImportStats()
+        seen: set[str] = set()
+        batch: list[dict] = []
+        for record in cls.parse(lines, fmt):
+            row = cls._to_row(record)
+            if row is None:
+                stats.invalid += 1
+                continue
+            if row["content_hash"] in seen:
+                stats.skipped += 1
+                continue
+            seen.add(row["content_hash"])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cls._flush_batch(db, batch, stats)
+                batch = []
+        if batch:
+            cls._flush_batch(db, batch, stats)
+        if stats.inserted or stats.updated:
+            RecommendationService.invalidate_events()
+        return stats
+
+    @classmethod
+    def parse(cls, lines: Iterable[str], fmt: ImportFormat) -> Iterator[dict]:
+        if fmt == "ndjson":
+            return cls._iter_ndjson(lines)
+        if fmt == "csv":
+            return cls._iter_csv(lines)
+        if fmt == "ics":
+            return cls._iter_ics(lines)
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    @staticmethod
+    def detect_format(filename: str | None, content_type: str | None = None) -> ImportFormat | None:
+        name = (filename or "").lower()
+        kind = (content_type or "").lower()
+        if name.endswith(".ics") or "calendar" in kind:
+            return "ics"
+        if name.endswith(".csv") or "csv" in kind:
+            return "csv"
+        if name.endswith((".ndjson", ".jsonl")) or "ndjson" in kind:
+            return "ndjson"
+        return None
+
+    @staticmethod
+    def backfill_content_hashes(db: Session) -> int:
+        rows = db.execute(
+            select(Event.id, Event.title, Event.start_time, Event.location).where(Event.content_hash.is_(None))
+        ).all()
+        if rows:
+            db.execute(
+                update(Event),
+                [
+                    {"id": event_id, "content_hash": content_hash_for(title, start, location)}
+                    for event_id, title, start, location in rows
+                ],
+            )
+            db.flush()
+        return len(rows)
+
+    # --- Batching ----------------------------------------------------------------
+    @classmethod
+    def _flush_batch(cls, db: Session, batch: list[dict], stats: ImportStats) -> None:
+        hashes = [row["content_hash"] for row in batch]
+        # Newest first, so the oldest event with a hash is the one kept in the dict.
+        existing = {
+            found.content_hash: found
+            for found in db.execute(
+                select(Event.id, Event.content_hash, *(getattr(Event, name) for name in _COMPARED_FIELDS))
+                .where(Event.content_hash.in_(hashes))
+                .order_by(Event.id.desc())
+            )
+        }
+
+        inserts: list[dict] = []
+        updates: list[dict] = []
+        for row in batch:
+            current = existing.get(row["content_hash"])
+            if current is None:
+                inserts.append(row)
+            elif cls._differs(current, row):
+                updates.append({"id": current.id, **row})
+            else:
+                stats.skipped += 1
+
+        now = datetime.now(timezone.utc)
+        if inserts:
+            db.execute(insert(Event), [{**row, "created_at": now, "updated_at": now} for row in inserts])
+        if updates:
+            db.execute(update(Event), [{**row, "updated_at": now} for row in updates])
+
+        changed = inserts + updates
+        if changed:
+            ids = {row["content_hash"]: row["id"] for row in updates}
+            if inserts:
+                ids.update(
+                    db.execute(
+                        select(Event.content_hash, Event.id)
+                        .where(Event.content_hash.in_([row["content_hash"] for row in inserts]))
+                        .order_by(Event.id.desc())
+                    ).all()
+                )
+            tag_names = [name for row in changed for name in TagService.normalize_all(row["tags"])]
+            tag_ids = TagService.ensure_ids(db, tag_names)
+            if updates:
+                updated_ids = [ids[row["content_hash"]] for row in updates]
+                db.execute(delete(EventTag).where(EventTag.event_id.in_(updated_ids)))
+            links = [
+                {"event_id": ids[row["content_hash"]], "tag_id": tag_ids[name]}
+                for row in changed
+                for name in TagService.normalize_all(row["tags"])
+            ]
+            if links:
+                db.execute(insert(EventTag), links)
+        db.commit()
+        stats.inserted += len(inserts)
+        stats.updated += len(updates)
+
+    @classmethod
+    def _differs(cls, current, row: dict) -> bool:
+        for name in _COMPARED_FIELDS:
+            stored = getattr(current, name)
+            incoming = row[name]
+            if isinstance(stored, datetime) and isinstance(incoming, datetime):
+                stored, incoming = cls._naive_utc(stored), cls._naive_utc(incoming)
+            elif name == "tags":
+                # Events created through the API keep their tags as typed; imports store them normalized.
+                stored, incoming = TagService.normalize_all(stored), TagService.normalize_all(incoming)
+            if stored != incoming:
+                return True
+        return False
+
+    @staticmethod
+    def _naive_utc(moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _to_row(record: dict) -> dict | None:
+        try:
+            payload = EventCreate(**record)
+        except (ValidationError, TypeError):
+            return None
+        start = payload.start_time if payload.start_time.tzinfo else payload.start_time.replace(tzinfo=timezone.utc)
+        end = payload.end_time or (start + timedelta(hours=1))
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        tags = TagService.normalize_all(payload.tags)
+        return {
+            "title": payload.title,
+            "description": payload.description,
+            "location": payload.location,
+            "category": payload.category or "general",
+            "start_time": start,
+            "end_time": end,
+            "tags": ",".join(tags) if tags else None,
+            "span_bucket": span_bucket_for(start, end),
+            "content_hash": content_hash_for(payload.title, start, payload.location),
+        }
+
+    # --- Parsers -----------------------------------------------------------------
+    @staticmethod
+    def _iter_ndjson(lines: Iterable[str]) -> Iterator[dict]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield {}
+                continue
+            yield record if isinstance(record, dict) else {}
+
+    @staticmethod
+    def _iter_csv(lines: Iterable[str]) -> Iterator[dict]:
+        for record in csv.DictReader(lines):
+            yield {key.strip().lower(): value for key, value in record.items() if key and value not in (None, "")}
+
+    @classmethod
+    def _iter_ics(cls, lines: Iterable[str]) -> Iterator[dict]:
+        current: dict | None = None
+        for name, params, value in cls._unfold_ics(lines):
+            if name == "BEGIN" and value.upper() == "VEVENT":
+                current = {}
+            elif name == "END" and value.upper() == "VEVENT":
+                if current is not None:
+                    yield current
+                current = None
+            elif current is not None:
+                cls._apply_ics_property(current, name, params, value)
+
+    @staticmethod
+    def _unfold_ics(lines: Iterable[str]) -> Iterator[tuple[str, dict[str, str], str]]:
+        pending: str | None = None
+        for raw in lines:
+            line = raw.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and pending is not None:
+                pending += line[1:]
+                continue
+            if pending:
+                yield EventImportService._split_ics_line(pending)
+            pending = line
+        if pending:
+            yield EventImportService._split_ics_line(pending)
+
+    @staticmethod
+    def _split_ics_line(line: str) -> tuple[str, dict[str, str], str]:
+        head, _, value = line.partition(":")
+        name, *raw_params = head.split(";")
+        params = {}
+        for item in raw_params:
+            key, _, param_value = item.partition("=")
+            params[key.upper()] = param_value.strip('"')
+        return name.upper(), params, value
+
+    @classmethod
+    def _apply_ics_property(cls, record: dict, name: str, params: dict[str, str], value: str) -> None:
+        if name == "SUMMARY":
+            record["title"] = cls._unescape_ics(value)
+        elif name == "DESCRIPTION":
+            record["description"] = cls._unescape_ics(value)
+        elif name == "LOCATION":
+            record["location"] = cls._unescape_ics(value)
+        elif name == "CATEGORIES":
+            categories = [cls._unescape_ics(item) for item in re.split(r"(?<!\\),", value) if item.strip()]
+            record.setdefault("tags", []).extend(categories)
+            record.setdefault("category", categories[0] if categories else None)
+        elif name == "DTSTART":
+            record["start_time"] = cls._parse_ics_datetime(value, params)
+        elif name == "DTEND":
+            record["end_time"] = cls._parse_ics_datetime(value, params)
+        elif name == "DURATION" and record.get("start_time"):
+            duration = cls._parse_ics_duration(value)
+            if duration:
+                record["end_time"] = record["start_time"] + duration
+
+    @staticmethod
+    def _parse_ics_datetime(value: str, params: dict[str, str]) -> datetime | None:
+        value = value.strip()
+        try:
+            if params.get("VALUE") == "DATE" or len(value) == 8:
+                day = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+                return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+            if value.endswith("Z"):
+                return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            parsed = datetime.strptime(value, "%Y%m%dT%H%M%S")
+        except ValueError:
+            return None
+        tz_name = params.get("TZID")
+        if tz_name:
+            try:
+                return parsed.replace(tzinfo=ZoneInfo(tz_name)).astimezone(timezone.utc)
+            except ZoneInfoNotFoundError:
+                pass
+        return parsed.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _parse_ics_duration(value: str) -> timedelta | None:
+        match = re.fullmatch(r"P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", value.strip())
+        if not match:
+            return None
+        weeks, days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        return timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+    @staticmethod
+    def _unescape_ics(text: str) -> str:
+        return re.sub(r"\\([\\,;nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text).strip()
+
+
+def iter_text_lines(stream: IO[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a binary upload lazily, one line at a time."""
+    for raw in stream:
+        yield raw.decode(encoding, errors="replace")
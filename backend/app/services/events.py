@@ -1,12 +1,39 @@
 from __future__ import annotations
 
+import base64
+import binascii
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.orm.attributes import set_committed_value
 
+from ..database import upsert_insert
 from ..models import Event, EventInterest
+from ..models.event import SPAN_BUCKET_HOURS, SPAN_BUCKET_OVERFLOW
 from ..schemas.events import EventCreate, EventInterestRequest, EventQueryFilters, EventUpdate
+from .tags import TagService
+from .trending import TrendingService
+
+
+DEFAULT_EVENT_PAGE_SIZE = 50
+MAX_EVENT_PAGE_SIZE = 100
+
+
+@dataclass
+class EventPage:
+    events: list[Event]
+    next_cursor: str | None
+
+
+@dataclass
+class BulkInterestResult:
+    interests: dict[int, bool]
+    changed: int
+    missing: list[int]
 
 
 class EventService:
@@ -61,6 +88,7 @@ class EventService:
         )
         db.add(event)
         db.flush()
+        TagService.sync_event_tags(db, event.id, payload.tags)
         db.refresh(event)
         return event
 
@@ -78,6 +106,8 @@ class EventService:
             setattr(event, field, value)
         db.add(event)
         db.flush()
+        if "tags" in data:
+            TagService.sync_event_tags(db, event.id, data["tags"])
         db.refresh(event)
         return event
 
@@ -87,34 +117,114 @@ class EventService:
         filters: EventQueryFilters | None = None,
         viewer_id: str | None = None,
     ) -> list[Event]:
+        query = EventService._filtered_query(filters).order_by(Event.start_time.asc())
+        events = db.execute(query).scalars().all()
+        EventService.annotate_viewer_interest(db, events, viewer_id)
+        return events
+
+    @staticmethod
+    def list_events_page(
+        db: Session,
+        filters: EventQueryFilters | None = None,
+        viewer_id: str | None = None,
+        *,
+        limit: int = DEFAULT_EVENT_PAGE_SIZE,
+        cursor: str | None = None,
+        summary: bool = False,
+    ) -> EventPage:
+        """Return one keyset page ordered by ``(start_time, id)``.
+
+        ``summary`` skips loading the long ``description`` column so feed
+        payloads stay small.
+        """
+        limit = max(1, min(limit, MAX_EVENT_PAGE_SIZE))
+        query = EventService._filtered_query(filters)
+        if cursor:
+            after_start, after_id = EventService.decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    Event.start_time > after_start,
+                    and_(Event.start_time == after_start, Event.id > after_id),
+                )
+            )
+        if summary:
+            query = query.options(defer(Event.description))
+        query = query.order_by(Event.start_time.asc(), Event.id.asc()).limit(limit + 1)
+        events = db.execute(query).scalars().all()
+
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            last = events[-1]
+            next_cursor = EventService.encode_cursor(last.start_time, last.id)
+        if summary:
+            for event in events:
+                set_committed_value(event, "description", None)
+        EventService.annotate_viewer_interest(db, events, viewer_id)
+        return EventPage(events=events, next_cursor=next_cursor)
+
+    @staticmethod
+    def encode_cursor(start_time: datetime, event_id: int) -> str:
+        raw = f"{start_time.isoformat()}|{event_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+            start_raw, id_raw = raw.rsplit("|", 1)
+            return datetime.fromisoformat(start_raw), int(id_raw)
+        except (ValueError, UnicodeError, binascii.Error):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    @staticmethod
+    def _filtered_query(filters: EventQueryFilters | None):
         query = select(Event)
         if filters:
-            if filters.start_time:
-                query = query.where(Event.start_time >= filters.start_time)
-            if filters.end_time:
-                query = query.where(Event.start_time <= filters.end_time)
+            if filters.overlap and (filters.start_time or filters.end_time):
+                query = query.where(EventService._overlap_clause(filters.start_time, filters.end_time))
+            else:
+                if filters.start_time:
+                    query = query.where(Event.start_time >= filters.start_time)
+                if filters.end_time:
+                    query = query.where(Event.start_time <= filters.end_time)
             if filters.location:
                 query = query.where(Event.location.ilike(f"%{filters.location}%"))
             if filters.category:
                 query = query.where(Event.category.ilike(f"%{filters.category}%"))
-        query = query.order_by(Event.start_time.asc())
-        events = db.execute(query).scalars().all()
-        if not events:
-            return []
+        return query
 
-        ids = [event.id for event in events]
-        count_rows = (
-            db.execute(
-                select(EventInterest.event_id, func.count())
-                .where(EventInterest.event_id.in_(ids))
-                .where(EventInterest.interested.is_(True))
-                .group_by(EventInterest.event_id)
+    @staticmethod
+    def _overlap_clause(range_start: datetime | None, range_end: datetime | None):
+        """Match events where ``start < range_end`` and ``end > range_start``.
+
+        A bounded range is split per duration bucket so each branch is a
+        tight ``(span_bucket, start_time)`` index range instead of a scan.
+        """
+        if range_start is None:
+            return Event.start_time < range_end
+        if range_end is None:
+            return Event.end_time > range_start
+        branches = [
+            and_(
+                Event.span_bucket == bucket,
+                Event.start_time >= range_start - timedelta(hours=hours),
+                Event.start_time < range_end,
             )
-            .all()
-        )
-        counts = {event_id: total for event_id, total in count_rows}
+            for bucket, hours in enumerate(SPAN_BUCKET_HOURS)
+        ]
+        branches.append(and_(Event.span_bucket == SPAN_BUCKET_OVERFLOW, Event.start_time < range_end))
+        return and_(or_(*branches), Event.end_time > range_start)
+
+    @staticmethod
+    def annotate_viewer_interest(db: Session, events: list[Event], viewer_id: str | None) -> None:
+        if not events:
+            return
+
         viewer_map = set()
         if viewer_id:
+            ids = [event.id for event in events]
             viewer_rows = (
                 db.execute(
                     select(EventInterest.event_id)
@@ -128,33 +238,142 @@ class EventService:
             viewer_map = set(viewer_rows)
 
         for event in events:
-            setattr(event, "interest_count", counts.get(event.id, 0))
             setattr(event, "viewer_interest", event.id in viewer_map)
-        return events
 
     @staticmethod
     def set_interest(db: Session, event_id: int, payload: EventInterestRequest) -> EventInterest:
-        interest = (
+        """Persist a user's interest and keep ``Event.interest_count`` in step.
+
+        The counter only moves when the stored flag actually flips, and the flip
+        is detected by a conditional UPDATE so concurrent toggles of the same
+        row cannot both count the same transition.
+        """
+        delta = EventService._apply_interest_transition(db, event_id, payload.user_id, payload.interested)
+        if delta:
+            EventService._bump_interest_count(db, event_id, delta)
+            TrendingService.record_interest_delta(db, event_id, delta)
+        db.flush()
+        return (
             db.execute(
                 select(EventInterest)
                 .where(EventInterest.event_id == event_id)
                 .where(EventInterest.user_id == payload.user_id)
+                .execution_options(populate_existing=True)
             )
-            .scalar_one_or_none()
+            .scalar_one()
         )
-        if interest is None:
-            interest = EventInterest(
-                event_id=event_id,
-                user_id=payload.user_id,
-                interested=payload.interested,
+
+    @staticmethod
+    def set_interests_bulk(db: Session, user_id: str, items: list[tuple[int, bool]]) -> BulkInterestResult:
+        """Apply many ``(event_id, interested)`` pairs with a few set-based statements.
+
+        Each statement only touches rows whose flag actually changes and
+        returns them, so the transitions come from the writes themselves and
+        counters and trending rollups move exactly as ``set_interest`` would
+        move them. Later pairs win over earlier ones.
+        """
+        desired = dict(items)
+        known = set(db.execute(select(Event.id).where(Event.id.in_(desired))).scalars())
+        missing = sorted(set(desired) - known)
+        desired = {event_id: flag for event_id, flag in desired.items() if event_id in known}
+        if not desired:
+            return BulkInterestResult(interests={}, changed=0, missing=missing)
+
+        deltas: dict[int, int] = {}
+        joined = [event_id for event_id, flag in desired.items() if flag]
+        if joined:
+            # Every returned row is an insert or a false -> true flip: +1 either way.
+            stmt = upsert_insert(db, EventInterest).values(
+                [{"event_id": event_id, "user_id": user_id, "interested": True} for event_id in joined]
             )
-            db.add(interest)
-        else:
-            interest.interested = payload.interested
-            db.add(interest)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EventInterest.event_id, EventInterest.user_id],
+                set_={"interested": True, "updated_at": func.now()},
+                where=EventInterest.interested.is_(False),
+            ).returning(EventInterest.event_id)
+            deltas.update((event_id, 1) for event_id in db.execute(stmt).scalars())
+        left = [event_id for event_id, flag in desired.items() if not flag]
+        if left:
+            # Flip existing rows first (each one is -1), then insert the rest as
+            # plain "not interested" rows. A row another request inserts in
+            # between is flipped on the second pass, like set_interest's retry.
+            pending = set(left)
+            for _ in range(2):
+                flipped = set(
+                    db.execute(
+                        update(EventInterest)
+                        .where(EventInterest.user_id == user_id)
+                        .where(EventInterest.event_id.in_(pending))
+                        .where(EventInterest.interested.is_(True))
+                        .values(interested=False, updated_at=func.now())
+                        .returning(EventInterest.event_id)
+                        .execution_options(synchronize_session=False)
+                    ).scalars()
+                )
+                deltas.update((event_id, -1) for event_id in flipped)
+                pending -= flipped
+                if not pending:
+                    break
+                stmt = upsert_insert(db, EventInterest).values(
+                    [{"event_id": event_id, "user_id": user_id, "interested": False} for event_id in pending]
+                )
+                stmt = stmt.on_conflict_do_nothing(
+                    index_elements=[EventInterest.event_id, EventInterest.user_id]
+                ).returning(EventInterest.event_id)
+                pending -= set(db.execute(stmt).scalars())
+                if not pending:
+                    break
+
+        for delta in (1, -1):
+            ids = [event_id for event_id, value in deltas.items() if value == delta]
+            if ids:
+                EventService._bump_interest_count_many(db, ids, delta)
+        if deltas:
+            TrendingService.record_interest_deltas(db, deltas)
         db.flush()
-        db.refresh(interest)
-        return interest
+        return BulkInterestResult(interests=desired, changed=len(deltas), missing=missing)
+
+    @staticmethod
+    def _apply_interest_transition(db: Session, event_id: int, user_id: str, interested: bool) -> int:
+        for _ in range(2):
+            flipped = db.execute(
+                update(EventInterest)
+                .where(EventInterest.event_id == event_id)
+                .where(EventInterest.user_id == user_id)
+                .where(EventInterest.interested != interested)
+                .values(interested=interested)
+                .execution_options(synchronize_session="fetch")
+            ).rowcount
+            if flipped:
+                return 1 if interested else -1
+            if EventService.get_interest(db, event_id, user_id) is not None:
+                return 0
+            try:
+                with db.begin_nested():
+                    db.add(EventInterest(event_id=event_id, user_id=user_id, interested=interested))
+            except IntegrityError:
+                # Another request inserted the row first; retry as an update.
+                continue
+            return 1 if interested else 0
+        return 0
+
+    @staticmethod
+    def _bump_interest_count(db: Session, event_id: int, delta: int) -> None:
+        db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(interest_count=Event.interest_count + delta)
+            .execution_options(synchronize_session="fetch")
+        )
+
+    @staticmethod
+    def _bump_interest_count_many(db: Session, event_ids: list[int], delta: int) -> None:
+        db.execute(
+            update(Event)
+            .where(Event.id.in_(event_ids))
+            .values(interest_count=Event.interest_count + delta)
+            .execution_options(synchronize_session="fetch")
+        )
 
     @staticmethod
     def get_interest(db: Session, event_id: int, user_id: str) -> EventInterest | None:
@@ -169,14 +388,29 @@ class EventService:
 
     @staticmethod
     def interest_count(db: Session, event_id: int) -> int:
-        return (
-            db.execute(
-                select(func.count())
-                .where(EventInterest.event_id == event_id)
-                .where(EventInterest.interested.is_(True))
-            )
-            .scalar_one()
+        count = db.execute(select(Event.interest_count).where(Event.id == event_id)).scalar_one_or_none()
+        return count or 0
+
+    @staticmethod
+    def reconcile_interest_counts(db: Session) -> int:
+        """Rebuild every ``Event.interest_count`` from ``event_interests``.
+
+        Returns the number of events whose stored counter had drifted.
+        """
+        actual = (
+            select(func.count(EventInterest.id))
+            .where(EventInterest.event_id == Event.id)
+            .where(EventInterest.interested.is_(True))
+            .scalar_subquery()
+        )
+        result = db.execute(
+            update(Event)
+            .where(Event.interest_count != actual)
+            .values(interest_count=actual)
+            .execution_options(synchronize_session=False)
         )
+        db.flush()
+        return result.rowcount
 
     @classmethod
     def seed_defaults(cls, db: Session) -> None:
@@ -184,6 +418,7 @@ class EventService:
         if existing:
             return
         now = datetime.now(timezone.utc)
+        seeded: list[tuple[Event, list[str] | None]] = []
         for idx, template in enumerate(cls._SEED_EVENTS):
             start = now + timedelta(hours=template["offset_hours"])
             end = start + timedelta(hours=template["duration_hours"])
@@ -197,6 +432,10 @@ class EventService:
                 tags=cls._serialize_seed_tags(template.get("tags")),
             )
             db.add(event)
+            seeded.append((event, template.get("tags")))
+        db.flush()
+        for event, tags in seeded:
+            TagService.sync_event_tags(db, event.id, tags)
         db.commit()
 
     @staticmethod
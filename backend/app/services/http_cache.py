@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import hashlib
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag over the given validator parts (timestamps, counts, page params)."""
+    fingerprint = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
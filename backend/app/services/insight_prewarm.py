@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..schemas.ai import MAX_BATCH_INSIGHT_ITEMS, MatchInsightRequest, ParticipantProfile
+from .ai_service import AIService
+from .tags import TagService
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_PAIRS = 10_000
+
+
+class InsightPrewarmer:
+    """Pre-generates insights for new mutual matches.
+
+    ``record_swipe`` enqueues each pair that just became mutual; the
+    ``prewarm_match_insights`` scheduler job drains up to a batch of pairs,
+    builds requests from both profiles and hands them to the batch insight
+    generator, so the first view of a match reads a cached summary. Pairs
+    are stored under ``pair_match_id`` (the two user ids, sorted), which is
+    the id the matches page requests, so only the two users read them.
+
+    Generation runs on the app's event loop (see ``attach_loop``), where the
+    shared AI client keeps its connection pool; until a loop is attached
+    pairs stay queued.
+    """
+
+    _pending: dict[tuple[str, str], None] = {}
+    _lock = threading.Lock()
+    _loop: asyncio.AbstractEventLoop | None = None
+
+    @staticmethod
+    def pair_match_id(user_id: str, other_user_id: str) -> str:
+        return ":".join(sorted((user_id, other_user_id)))
+
+    @classmethod
+    def attach_loop(cls, loop: asyncio.AbstractEventLoop | None) -> None:
+        """Run prewarm batches on ``loop`` (the app's), or stop running them with ``None``."""
+        with cls._lock:
+            cls._loop = loop
+
+    @classmethod
+    def enqueue(cls, user_id: str, other_user_id: str) -> None:
+        pair = tuple(sorted((user_id, other_user_id)))
+        with cls._lock:
+            cls._pending[pair] = None
+            while len(cls._pending) > MAX_PENDING_PAIRS:
+                del cls._pending[next(iter(cls._pending))]
+
+    @classmethod
+    def pending(cls) -> list[tuple[str, str]]:
+        with cls._lock:
+            return list(cls._pending)
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._pending.clear()
+
+    @classmethod
+    def run(cls, db: Session) -> int:
+        """Generate insights for one batch of pending pairs; returns how many were generated."""
+        with cls._lock:
+            loop = cls._loop
+            if loop is None:
+                logger.debug("No app event loop attached; leaving %d pairs queued", len(cls._pending))
+                return 0
+            batch = list(cls._pending)[:MAX_BATCH_INSIGHT_ITEMS]
+            for pair in batch:
+                del cls._pending[pair]
+        if not batch:
+            return 0
+
+        user_ids = {user_id for pair in batch for user_id in pair}
+        users = {user.id: user for user in db.execute(select(User).where(User.id.in_(user_ids))).scalars()}
+        items = [
+            (cls.pair_match_id(first, second), cls.request_for_pair(users[first], users[second]))
+            for first, second in batch
+            if first in users and second in users
+        ]
+        if not items:
+            return 0
+        try:
+            # This is the scheduler thread; it waits while the app loop runs the batch.
+            results = asyncio.run_coroutine_threadsafe(
+                AIService.generate_match_insights_batch_async(db, items), loop
+            ).result()
+        except Exception:
+            for first, second in batch:
+                cls.enqueue(first, second)
+            raise
+        return sum(1 for _, cached in results if not cached)
+
+    @staticmethod
+    def request_for_pair(first: User, second: User) -> MatchInsightRequest:
+        interests = [TagService.normalize_all(user.interests or []) for user in (first, second)]
+        shared = [interest for interest in interests[0] if interest in set(interests[1])]
+        return MatchInsightRequest(
+            participants=[
+                ParticipantProfile(name=user.display_name, bio=user.bio, interests=user.interests or [])
+                for user in (first, second)
+            ],
+            shared_interests=shared,
+            location=first.location or second.location,
+        )
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import groupby
+from math import atan2, cos, radians, sin, sqrt
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Place, PlaceTag, Tag
+
+settings = get_settings()
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float | None, lon2: float | None) -> float:
+    if lat2 is None or lon2 is None:
+        return float("inf")
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def catalogue_stamp(db: Session) -> tuple:
+    """Newest ``updated_at`` and row count of ``places``; changes whenever any worker writes a place."""
+    return tuple(db.execute(select(func.max(Place.updated_at), func.count(Place.id))).one())
+
+
+def _still_current(db: Session, snapshot, version: int) -> bool:
+    """Whether ``snapshot`` may be served, probing the database once per ``place_index_check_seconds``.
+
+    ``invalidate`` only reaches this process; the probe catches writes made by
+    other workers.
+    """
+    if snapshot is None or snapshot.version != version:
+        return False
+    if time.monotonic() - snapshot.checked_at < settings.place_index_check_seconds:
+        return True
+    if catalogue_stamp(db) != snapshot.stamp:
+        return False
+    snapshot.checked_at = time.monotonic()
+    return True
+
+
+@dataclass
+class _CoordinateSnapshot:
+    version: int
+    ids: list[int]
+    lat_rad: np.ndarray
+    lng_rad: np.ndarray
+    ratings: np.ndarray
+    stamp: tuple = ()
+    checked_at: float = 0.0
+
+
+class PlaceCoordinateIndex:
+    """Cached coordinates of every geolocated place for k-nearest queries.
+
+    The whole catalogue is scored in one vectorized haversine call and
+    ``argpartition`` selects the top k. ``invalidate`` is called whenever
+    places or their ratings change, and the next query reloads the snapshot;
+    changes made by other workers are noticed through ``catalogue_stamp``.
+    """
+
+    _snapshot: _CoordinateSnapshot | None = None
+    _version = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def nearest(
+        cls,
+        db: Session,
+        lat: float,
+        lng: float,
+        *,
+        k: int,
+        radius_km: float | None = None,
+    ) -> list[tuple[int, float]]:
+        """Return ``(place_id, distance_km)`` for the ``k`` closest places, nearest first."""
+        snapshot = cls._load(db)
+        if not snapshot.ids or k <= 0:
+            return []
+        return cls._nearest_vectorized(snapshot, lat, lng, k, radius_km)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._version += 1
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._snapshot = None
+            cls._version = 0
+
+    @classmethod
+    def _load(cls, db: Session) -> _CoordinateSnapshot:
+        with cls._lock:
+            snapshot, version = cls._snapshot, cls._version
+        if _still_current(db, snapshot, version):
+            return snapshot
+
+        stamp = catalogue_stamp(db)
+        rows = db.execute(
+            select(Place.id, Place.latitude, Place.longitude, Place.rating)
+            .where(Place.latitude.is_not(None))
+            .where(Place.longitude.is_not(None))
+            .order_by(Place.id)
+        ).all()
+        snapshot = _CoordinateSnapshot(
+            version=version,
+            ids=[row[0] for row in rows],
+            lat_rad=np.radians(np.asarray([row[1] for row in rows], dtype=np.float64)),
+            lng_rad=np.radians(np.asarray([row[2] for row in rows], dtype=np.float64)),
+            ratings=np.asarray([row[3] or 0.0 for row in rows], dtype=np.float64),
+            stamp=stamp,
+            checked_at=time.monotonic(),
+        )
+        with cls._lock:
+            # Keep the snapshot only if nothing changed while it was loading.
+            if version == cls._version:
+                cls._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _nearest_vectorized(
+        snapshot: _CoordinateSnapshot,
+        lat: float,
+        lng: float,
+        k: int,
+        radius_km: float | None,
+    ) -> list[tuple[int, float]]:
+        lat0 = radians(lat)
+        dlat = snapshot.lat_rad - lat0
+        dlng = snapshot.lng_rad - radians(lng)
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat0) * np.cos(snapshot.lat_rad) * np.sin(dlng / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+        candidates = np.arange(distances.size)
+        if radius_km is not None:
+            candidates = np.flatnonzero(distances <= radius_km)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+        # lexsort sorts by the last key first: distance, then higher rating.
+        order = candidates[np.lexsort((-snapshot.ratings[candidates], distances[candidates]))]
+        return [(snapshot.ids[index], float(distances[index])) for index in order]
+
+
+@dataclass
+class _TagSnapshot:
+    version: int
+    # Tag name -> ascending place ids carrying that tag.
+    postings: dict[str, list[int]] = field(default_factory=dict)
+    ratings: dict[int, float] = field(default_factory=dict)
+    # Tag name -> place ids ordered best rated first (ties by id), plus the
+    # same ordering over the whole catalogue.
+    by_rating: dict[str, list[int]] = field(default_factory=dict)
+    all_by_rating: list[int] = field(default_factory=list)
+    stamp: tuple = ()
+    checked_at: float = 0.0
+
+    def rating_key(self, place_id: int) -> tuple[float, int]:
+        return -self.ratings.get(place_id, 0.0), place_id
+
+
+class PlaceTagIndex:
+    """In-memory inverted index from tag name to place ids.
+
+    Overlap with a set of interests is counted by merging the sorted posting
+    lists, and the best ``limit`` places by (overlap, rating) come off a heap,
+    so a request never touches places that share no tag with the query.
+    Each tag also keeps its places pre-sorted by rating, so "best rated
+    places for these interests" is a merge of a few ready-made lists. Like
+    the coordinate index it is per process, so it re-checks
+    ``catalogue_stamp`` every ``place_index_check_seconds``.
+    """
+
+    _snapshot: _TagSnapshot | None = None
+    _version = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def rank(cls, db: Session, tag_names: list[str], *, limit: int) -> list[tuple[int, int]]:
+        """Return ``(place_id, overlap)`` for the best ``limit`` matches."""
+        snapshot = cls._load(db)
+        postings = [snapshot.postings[name] for name in tag_names if name in snapshot.postings]
+        if not postings or limit <= 0:
+            return []
+        overlaps = ((place_id, sum(1 for _ in run)) for place_id, run in groupby(heapq.merge(*postings)))
+        best = heapq.nlargest(
+            limit,
+            overlaps,
+            key=lambda item: (item[1], snapshot.ratings.get(item[0], 0.0), -item[0]),
+        )
+        return best
+
+    @classmethod
+    def top_rated(cls, db: Session, tag_names: list[str], *, limit: int) -> list[int]:
+        """Best rated place ids carrying any of ``tag_names`` (any place when empty)."""
+        snapshot = cls._load(db)
+        if limit <= 0:
+            return []
+        if not tag_names:
+            return snapshot.all_by_rating[:limit]
+        ranked = [snapshot.by_rating[name] for name in dict.fromkeys(tag_names) if name in snapshot.by_rating]
+        if len(ranked) == 1:
+            return ranked[0][:limit]
+        result: list[int] = []
+        seen: set[int] = set()
+        for place_id in heapq.merge(*ranked, key=snapshot.rating_key):
+            if place_id not in seen:
+                seen.add(place_id)
+                result.append(place_id)
+                if len(result) == limit:
+                    break
+        return result
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._version += 1
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._snapshot = None
+            cls._version = 0
+
+    @classmethod
+    def _load(cls, db: Session) -> _TagSnapshot:
+        with cls._lock:
+            snapshot, version = cls._snapshot, cls._version
+        if _still_current(db, snapshot, version):
+            return snapshot
+
+        snapshot = _TagSnapshot(version=version, stamp=catalogue_stamp(db), checked_at=time.monotonic())
+        rows = db.execute(
+            select(Tag.name, PlaceTag.place_id).join(Tag, Tag.id == PlaceTag.tag_id).order_by(PlaceTag.place_id)
+        ).all()
+        for name, place_id in rows:
+            snapshot.postings.setdefault(name, []).append(place_id)
+        snapshot.ratings = {
+            place_id: rating or 0.0 for place_id, rating in db.execute(select(Place.id, Place.rating)).all()
+        }
+        snapshot.by_rating = {
+            name: sorted(place_ids, key=snapshot.rating_key) for name, place_ids in snapshot.postings.items()
+        }
+        snapshot.all_by_rating = sorted(snapshot.ratings, key=snapshot.rating_key)
+        with cls._lock:
+            if version == cls._version:
+                cls._snapshot = snapshot
+        return snapshot
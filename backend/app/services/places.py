@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from math import cos, radians
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Place, PlaceReview
+from ..models.places import GEOHASH_PRECISION, geohash_for
+from ..schemas.places import PlaceCreate
+from .place_index import PlaceCoordinateIndex, PlaceTagIndex, catalogue_stamp, haversine_km
+from .http_cache import make_etag
+from .tags import TagService
+
+KM_PER_DEGREE_LAT = 111.32
+DEFAULT_PLACE_PAGE_SIZE = 50
+MAX_PLACE_PAGE_SIZE = 100
+
+
+@dataclass
+class PlacePage:
+    places: list[Place]
+    next_cursor: str | None
+
+
+@dataclass
+class ReviewPage:
+    reviews: list[PlaceReview]
+    next_cursor: str | None
+
+
+class PlaceService:
+    """Place catalogue queries backed by the shared tag index."""
+
+    @staticmethod
+    def create_place(db: Session, payload: PlaceCreate) -> Place:
+        data = payload.dict()
+        tags = data.pop("tags", None)
+        place = Place(**data, tags=",".join(tags) if tags else None)
+        db.add(place)
+        db.flush()
+        TagService.sync_place_tags(db, place.id, tags)
+        return place
+
+    @staticmethod
+    def invalidate_indexes() -> None:
+        """Drop the in-memory place indexes after places or ratings change."""
+        PlaceCoordinateIndex.invalidate()
+        PlaceTagIndex.invalidate()
+
+    @staticmethod
+    def list_places(db: Session) -> list[Place]:
+        """Every place, in the same ``(rating DESC, id DESC)`` order as the pages."""
+        return list(db.execute(select(Place).order_by(Place.rating.desc(), Place.id.desc())).scalars())
+
+    @staticmethod
+    def list_places_page(
+        db: Session,
+        *,
+        limit: int = DEFAULT_PLACE_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> PlacePage:
+        """One keyset page of places ordered by ``(rating DESC, id DESC)``."""
+        limit = max(1, min(limit, MAX_PLACE_PAGE_SIZE))
+        query = select(Place)
+        if cursor:
+            after_rating, after_id = PlaceService._decode_cursor(cursor, float)
+            query = query.where(
+                or_(Place.rating < after_rating, and_(Place.rating == after_rating, Place.id < after_id))
+            )
+        places = db.execute(query.order_by(Place.rating.desc(), Place.id.desc()).limit(limit + 1)).scalars().all()
+        next_cursor = None
+        if len(places) > limit:
+            places = places[:limit]
+            next_cursor = PlaceService._encode_cursor(repr(places[-1].rating or 0.0), places[-1].id)
+        return PlacePage(places=list(places), next_cursor=next_cursor)
+
+    @staticmethod
+    def list_reviews(db: Session, place_id: int) -> list[PlaceReview]:
+        """Every review of a place, in the same ``(created_at DESC, id DESC)`` order as the pages."""
+        return list(
+            db.execute(
+                select(PlaceReview)
+                .where(PlaceReview.place_id == place_id)
+                .order_by(PlaceReview.created_at.desc(), PlaceReview.id.desc())
+            ).scalars()
+        )
+
+    @staticmethod
+    def list_reviews_page(
+        db: Session,
+        place_id: int,
+        *,
+        limit: int = DEFAULT_PLACE_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> ReviewPage:
+        """One keyset page of a place's reviews, newest first (``created_at DESC, id DESC``)."""
+        limit = max(1, min(limit, MAX_PLACE_PAGE_SIZE))
+        query = select(PlaceReview).where(PlaceReview.place_id == place_id)
+        if cursor:
+            after_created, after_id = PlaceService._decode_cursor(cursor, datetime.fromisoformat)
+            query = query.where(
+                or_(
+                    PlaceReview.created_at < after_created,
+                    and_(PlaceReview.created_at == after_created, PlaceReview.id < after_id),
+                )
+            )
+        query = query.order_by(PlaceReview.created_at.desc(), PlaceReview.id.desc()).limit(limit + 1)
+        reviews = db.execute(query).scalars().all()
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = PlaceService._encode_cursor(reviews[-1].created_at.isoformat(), reviews[-1].id)
+        return ReviewPage(reviews=list(reviews), next_cursor=next_cursor)
+
+    @staticmethod
+    def catalogue_etag(db: Session, *page_params: object) -> str:
+        """ETag for place listings: newest ``updated_at`` and row count, plus the page requested."""
+        return make_etag(*catalogue_stamp(db), *page_params)
+
+    @staticmethod
+    def place_etag(place: Place, *page_params: object) -> str:
+        """ETag for one place and its reviews; adding a review bumps ``updated_at``."""
+        return make_etag(place.id, place.updated_at, place.review_count, *page_params)
+
+    @staticmethod
+    def _encode_cursor(*values: object) -> str:
+        raw = "|".join(str(value) for value in values).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, parse_key: Callable[[str], object]) -> tuple:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+            key_raw, id_raw = raw.rsplit("|", 1)
+            return parse_key(key_raw), int(id_raw)
+        except (ValueError, UnicodeError, binascii.Error):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    @staticmethod
+    def add_review(db: Session, place_id: int, *, reviewer_name: str, rating: float, comment: str | None) -> PlaceReview:
+        """Store a review and fold its rating into the place in one UPDATE.
+
+        The increment happens in SQL, so concurrent reviews cannot overwrite
+        each other's aggregate the way a read-modify-write would.
+        """
+        review_count = func.coalesce(Place.review_count, 0)
+        updated = db.execute(
+            update(Place)
+            .where(Place.id == place_id)
+            .values(
+                review_count=review_count + 1,
+                rating_sum=Place.rating_sum + rating,
+                rating=(Place.rating_sum + rating) / (review_count + 1),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
+        review = PlaceReview(place_id=place_id, reviewer_name=reviewer_name, rating=rating, comment=comment)
+        db.add(review)
+        db.flush()
+        return review
+
+    @staticmethod
+    def recompute_ratings(db: Session) -> int:
+        """Rebuild rating aggregates from ``place_reviews`` for places that drifted.
+
+        Places without reviews keep their curated rating. Returns the number
+        of places corrected; the caller commits and then calls
+        ``invalidate_indexes`` when it is non-zero.
+        """
+        review_count = (
+            select(func.count(PlaceReview.id)).where(PlaceReview.place_id == Place.id).scalar_subquery()
+        )
+        rating_sum = (
+            select(func.coalesce(func.sum(PlaceReview.rating), 0.0))
+            .where(PlaceReview.place_id == Place.id)
+            .scalar_subquery()
+        )
+        has_reviews = select(PlaceReview.id).where(PlaceReview.place_id == Place.id).exists()
+        result = db.execute(
+            update(Place)
+            .where(has_reviews)
+            .where(
+                or_(
+                    func.coalesce(Place.review_count, 0) != review_count,
+                    func.abs(Place.rating_sum - rating_sum) > 1e-6,
+                )
+            )
+            .values(review_count=review_count, rating_sum=rating_sum, rating=rating_sum / review_count)
+            .execution_options(synchronize_session=False)
+        )
+        db.flush()
+        return result.rowcount
+
+    @staticmethod
+    def recommend(db: Session, interests: str | list[str], *, limit: int = 5) -> list[Place]:
+        """Places sharing the most tags with ``interests``, best rated first."""
+        ranked = PlaceTagIndex.rank(db, TagService.normalize_all(interests), limit=limit)
+        return PlaceService._load_in_order(db, [place_id for place_id, _ in ranked])
+
+    @staticmethod
+    def top_rated(db: Session, interests: str | list[str] | None = None, *, limit: int = 3) -> list[Place]:
+        """Best rated places, optionally restricted to those tagged with any interest.
+
+        Served from the per-tag rating lists in ``PlaceTagIndex``, which are
+        rebuilt after places or reviews change.
+        """
+        place_ids = PlaceTagIndex.top_rated(db, TagService.normalize_all(interests), limit=limit)
+        return PlaceService._load_in_order(db, place_ids)
+
+    @classmethod
+    def nearby(cls, db: Session, lat: float, lng: float, *, radius_km: float, limit: int = 10) -> list[Place]:
+        """Places within ``radius_km``, nearest first (ties broken by rating).
+
+        Candidates come from geohash prefix range scans covering the search
+        circle plus a latitude band; exact haversine then drops the corners.
+        """
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        query = select(Place).where(Place.latitude.between(lat - lat_delta, lat + lat_delta))
+        prefixes = cls._covering_prefixes(lat, lng, radius_km)
+        if prefixes is not None:
+            # "{" sorts after every geohash character, so each clause is an index range scan.
+            cells = [and_(Place.geohash >= prefix, Place.geohash < prefix + "{") for prefix in prefixes]
+            query = query.where(or_(*cells))
+        else:
+            query = query.where(Place.longitude.is_not(None))
+
+        results: list[tuple[float, Place]] = []
+        for place in db.execute(query).scalars():
+            distance = haversine_km(lat, lng, place.latitude, place.longitude)
+            if distance <= radius_km:
+                results.append((distance, place))
+        results.sort(key=lambda item: (item[0], -(item[1].rating or 0.0)))
+        return [place for _, place in results[:limit]]
+
+    @staticmethod
+    def nearest(
+        db: Session,
+        lat: float,
+        lng: float,
+        *,
+        k: int = 10,
+        radius_km: float | None = None,
+    ) -> list[tuple[Place, float]]:
+        """Exact k-nearest places with their distances, optionally capped by ``radius_km``."""
+        ranked = PlaceCoordinateIndex.nearest(db, lat, lng, k=k, radius_km=radius_km)
+        places = {place.id: place for place in PlaceService._load_in_order(db, [place_id for place_id, _ in ranked])}
+        return [(places[place_id], distance) for place_id, distance in ranked if place_id in places]
+
+    @staticmethod
+    def _load_in_order(db: Session, place_ids: list[int]) -> list[Place]:
+        if not place_ids:
+            return []
+        places = {place.id: place for place in db.execute(select(Place).where(Place.id.in_(place_ids))).scalars()}
+        return [places[place_id] for place_id in place_ids if place_id in places]
+
+    @staticmethod
+    def backfill_geohashes(db: Session) -> int:
+        rows = db.execute(
+            select(Place.id, Place.latitude, Place.longitude)
+            .where(Place.geohash.is_(None))
+            .where(Place.latitude.is_not(None))
+            .where(Place.longitude.is_not(None))
+        ).all()
+        if rows:
+            db.execute(
+                update(Place),
+                [{"id": place_id, "geohash": geohash_for(lat, lng)} for place_id, lat, lng in rows],
+            )
+            db.flush()
+        return len(rows)
+
+    @staticmethod
+    def _covering_prefixes(lat: float, lng: float, radius_km: float) -> list[str] | None:
+        """Geohash cells (3x3 around the centre) that together cover the search circle.
+
+        Uses the longest prefix whose cells are at least as large as the radius,
+        so every point in range lies in the centre cell or one of its neighbours.
+        Returns ``None`` when the radius exceeds even single-character cells.
+        """
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 1e-6))
+        for precision in range(GEOHASH_PRECISION, 0, -1):
+            bits = 5 * precision
+            cell_lat = 180.0 / 2 ** (bits // 2)
+            cell_lng = 360.0 / 2 ** ((bits + 1) // 2)
+            if cell_lat >= lat_delta and cell_lng >= lng_delta:
+                break
+        else:
+            return None
+
+        prefixes = {
+            geohash_for(min(max(lat + dlat, -90.0), 90.0), (lng + dlng + 180.0) % 360.0 - 180.0, precision)
+            for dlat in (-cell_lat, 0.0, cell_lat)
+            for dlng in (-cell_lng, 0.0, cell_lng)
+        }
+        return sorted(prefixes)
+
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from ..config import get_settings
+from ..models import Event, EventInterest, EventTag, GroupMembership, Tag, User
+from ..models.user_match import UserMatch
+from .tags import TagService
+
+settings = get_settings()
+
+TAG_WEIGHT = 1.0
+FRIEND_WEIGHT = 0.5
+MAX_CACHED_USERS = 1024
+MAX_CACHED_RESULTS = 50
+
+
+@dataclass
+class EventRecommendation:
+    event: Event
+    score: float
+    matched_tags: list[str]
+    friends_interested: int
+
+
+@dataclass
+class _CachedRecommendations:
+    interests_key: tuple[str, ...]
+    event_version: int
+    created_at: float
+    ranked: list[tuple[int, float, list[str], int]]
+
+
+class RecommendationService:
+    """Scores upcoming events for a user by tag overlap and friends' interest.
+
+    Results are cached per user and dropped when the user's interests or
+    event interests change (``invalidate_user``) or the event catalogue
+    changes (``invalidate_events``). Friend activity is picked up when the
+    cache TTL lapses.
+    """
+
+    _cache: "OrderedDict[str, _CachedRecommendations]" = OrderedDict()
+    _event_version = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def recommend_events(cls, db: Session, user_id: str, *, limit: int = 10) -> list[EventRecommendation]:
+        user = db.get(User, user_id)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        interests_key = tuple(sorted(TagService.normalize_all(user.interests or [])))
+        cached = cls._cached(user_id, interests_key)
+        if cached is None:
+            # Read the version first so an invalidation during scoring marks this entry stale.
+            with cls._lock:
+                event_version = cls._event_version
+            ranked = cls._score(db, user_id, interests_key)
+            with cls._lock:
+                cls._cache[user_id] = _CachedRecommendations(
+                    interests_key=interests_key,
+                    event_version=event_version,
+                    created_at=time.monotonic(),
+                    ranked=ranked,
+                )
+                cls._cache.move_to_end(user_id)
+                while len(cls._cache) > MAX_CACHED_USERS:
+                    cls._cache.popitem(last=False)
+        else:
+            ranked = cached.ranked
+
+        now = datetime.now(timezone.utc)
+        ids = [event_id for event_id, *_ in ranked]
+        events = {
+            event.id: event
+            for event in db.execute(select(Event).where(Event.id.in_(ids)).where(Event.end_time > now)).scalars()
+        }
+        results = [
+            EventRecommendation(event=events[event_id], score=score, matched_tags=tags, friends_interested=friends)
+            for event_id, score, tags, friends in ranked
+            if event_id in events
+        ]
+        return results[:limit]
+
+    @classmethod
+    def invalidate_user(cls, user_id: str) -> None:
+        with cls._lock:
+            cls._cache.pop(user_id, None)
+
+    @classmethod
+    def invalidate_events(cls) -> None:
+        with cls._lock:
+            cls._event_version += 1
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._cache.clear()
+            cls._event_version = 0
+
+    @classmethod
+    def _cached(cls, user_id: str, interests_key: tuple[str, ...]) -> _CachedRecommendations | None:
+        with cls._lock:
+            entry = cls._cache.get(user_id)
+            if entry is None:
+                return None
+            fresh = (
+                entry.interests_key == interests_key
+                and entry.event_version == cls._event_version
+                and time.monotonic() - entry.created_at <= settings.recommendation_cache_ttl_seconds
+            )
+            if not fresh:
+                cls._cache.pop(user_id, None)
+                return None
+            cls._cache.move_to_end(user_id)
+            return entry
+
+    @classmethod
+    def _score(
+        cls,
+        db: Session,
+        user_id: str,
+        interests_key: tuple[str, ...],
+    ) -> list[tuple[int, float, list[str], int]]:
+        now = datetime.now(timezone.utc)
+        matched: dict[int, list[str]] = {}
+        tag_ids = TagService.lookup_ids(db, list(interests_key))
+        if tag_ids:
+            rows = db.execute(
+                select(EventTag.event_id, Tag.name)
+                .join(Tag, Tag.id == EventTag.tag_id)
+                .join(Event, Event.id == EventTag.event_id)
+                .where(EventTag.tag_id.in_(tag_ids.values()))
+                .where(Event.end_time > now)
+            ).all()
+            for event_id, name in rows:
+                matched.setdefault(event_id, []).append(name)
+
+        friend_counts: dict[int, int] = {}
+        friend_ids = cls._friend_ids(db, user_id)
+        if friend_ids:
+            rows = db.execute(
+                select(EventInterest.event_id, func.count())
+                .join(Event, Event.id == EventInterest.event_id)
+                .where(EventInterest.user_id.in_(friend_ids))
+                .where(EventInterest.interested.is_(True))
+                .where(Event.end_time > now)
+                .group_by(EventInterest.event_id)
+            ).all()
+            friend_counts = {event_id: total for event_id, total in rows}
+
+        candidates = set(matched) | set(friend_counts)
+        if not candidates:
+            return []
+        already_interested = set(
+            db.execute(
+                select(EventInterest.event_id)
+                .where(EventInterest.user_id == user_id)
+                .where(EventInterest.interested.is_(True))
+                .where(EventInterest.event_id.in_(candidates))
+            ).scalars()
+        )
+
+        scored = []
+        for event_id in candidates - already_interested:
+            tags = sorted(matched.get(event_id, []))
+            friends = friend_counts.get(event_id, 0)
+            score = TAG_WEIGHT * len(tags) + FRIEND_WEIGHT * friends
+            scored.append((event_id, score, tags, friends))
+        return heapq.nlargest(MAX_CACHED_RESULTS, scored, key=lambda item: (item[1], -item[0]))
+
+    @staticmethod
+    def _friend_ids(db: Session, user_id: str) -> set[str]:
+        """Mutual right-swipes plus members of the user's groups."""
+        reciprocal = aliased(UserMatch)
+        mutual = db.execute(
+            select(UserMatch.target_user_id)
+            .join(
+                reciprocal,
+                (reciprocal.user_id == UserMatch.target_user_id) & (reciprocal.target_user_id == UserMatch.user_id),
+            )
+            .where(UserMatch.user_id == user_id)
+            .where(UserMatch.swiped_right.is_(True))
+            .where(reciprocal.swiped_right.is_(True))
+        ).scalars()
+        my_groups = select(GroupMembership.group_id).where(GroupMembership.user_id == user_id)
+        group_mates = db.execute(
+            select(GroupMembership.user_id)
+            .where(GroupMembership.group_id.in_(my_groups))
+            .where(GroupMembership.user_id != user_id)
+        ).scalars()
+        return set(mutual) | set(group_mates)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from ..database import session_scope
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[Session], Any]
+    last_run_at: float | None = None
+    last_result: Any = None
+    last_error: str | None = None
+    runs: int = 0
+
+
+@dataclass
+class PeriodicScheduler:
+    """Runs maintenance jobs on a single daemon thread.
+
+    Each job receives its own committed session. Jobs are first run one
+    interval after startup so app boot (and the test client) stays fast.
+    """
+
+    tick_seconds: float = 1.0
+    jobs: dict[str, PeriodicJob] = field(default_factory=dict)
+    _thread: threading.Thread | None = field(default=None, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def register(self, name: str, interval_seconds: float, func: Callable[[Session], Any]) -> PeriodicJob:
+        job = PeriodicJob(name=name, interval_seconds=interval_seconds, func=func)
+        self.jobs[name] = job
+        return job
+
+    def run_now(self, name: str) -> Any:
+        job = self.jobs[name]
+        with self._lock:
+            try:
+                with session_scope() as session:
+                    result = job.func(session)
+            except Exception as exc:
+                job.last_error = str(exc)
+                logger.warning("Periodic job %s failed: %s", name, exc)
+                raise
+            finally:
+                job.last_run_at = time.monotonic()
+                job.runs += 1
+            job.last_result = result
+            job.last_error = None
+            return result
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        started = time.monotonic()
+        for job in self.jobs.values():
+            job.last_run_at = job.last_run_at or started
+        self._thread = threading.Thread(target=self._loop, name="periodic-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            now = time.monotonic()
+            for name, job in list(self.jobs.items()):
+                if now - (job.last_run_at or now) < job.interval_seconds:
+                    continue
+                try:
+                    self.run_now(name)
+                except Exception:
+                    continue
+
+
+scheduler = PeriodicScheduler()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models import Event, EventTag, Place, PlaceTag, Tag
+
+
+class TagService:
+    """Maintains the shared tag vocabulary and its link tables."""
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.strip().lower().split())
+
+    @classmethod
+    def normalize_all(cls, names: Iterable[str] | str | None) -> list[str]:
+        if not names:
+            return []
+        if isinstance(names, str):
+            names = names.split(",")
+        normalized: list[str] = []
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            cleaned = cls.normalize(name)
+            if cleaned and cleaned not in normalized:
+                normalized.append(cleaned)
+        return normalized
+
+    @classmethod
+    def lookup_ids(cls, db: Session, names: Iterable[str] | str | None) -> dict[str, int]:
+        normalized = cls.normalize_all(names)
+        if not normalized:
+            return {}
+        rows = db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(normalized))).all()
+        return {name: tag_id for name, tag_id in rows}
+
+    @classmethod
+    def ensure_ids(cls, db: Session, names: Iterable[str] | str | None) -> dict[str, int]:
+        normalized = cls.normalize_all(names)
+        existing = cls.lookup_ids(db, normalized)
+        missing = [name for name in normalized if name not in existing]
+        if missing:
+            db.execute(insert(Tag), [{"name": name} for name in missing])
+            existing.update(cls.lookup_ids(db, missing))
+        return existing
+
+    @classmethod
+    def sync_event_tags(cls, db: Session, event_id: int, tags: Iterable[str] | str | None) -> None:
+        cls._sync_links(db, EventTag.event_id, event_id, tags)
+
+    @classmethod
+    def sync_place_tags(cls, db: Session, place_id: int, tags: Iterable[str] | str | None) -> None:
+        cls._sync_links(db, PlaceTag.place_id, place_id, tags)
+
+    @classmethod
+    def rebuild_event_tags(cls, db: Session) -> int:
+        """Backfill ``event_tags`` from the legacy comma-separated ``Event.tags``."""
+        rows = db.execute(select(Event.id, Event.tags).where(Event.tags.is_not(None))).all()
+        return cls._rebuild_links(db, EventTag.event_id, rows)
+
+    @classmethod
+    def rebuild_place_tags(cls, db: Session) -> int:
+        """Backfill ``place_tags`` from the legacy comma-separated ``Place.tags``."""
+        rows = db.execute(select(Place.id, Place.tags).where(Place.tags.is_not(None))).all()
+        return cls._rebuild_links(db, PlaceTag.place_id, rows)
+
+    @staticmethod
+    def needs_event_backfill(db: Session) -> bool:
+        return TagService._needs_backfill(db, EventTag, Event.tags)
+
+    @staticmethod
+    def needs_place_backfill(db: Session) -> bool:
+        return TagService._needs_backfill(db, PlaceTag, Place.tags)
+
+    @classmethod
+    def _sync_links(cls, db: Session, owner_column, owner_id: int, tags: Iterable[str] | str | None) -> None:
+        link_model = owner_column.class_
+        tag_ids = cls.ensure_ids(db, tags)
+        db.execute(delete(link_model).where(owner_column == owner_id))
+        if tag_ids:
+            db.execute(
+                insert(link_model),
+                [{owner_column.key: owner_id, "tag_id": tag_id} for tag_id in tag_ids.values()],
+            )
+
+    @classmethod
+    def _rebuild_links(cls, db: Session, owner_column, rows) -> int:
+        link_model = owner_column.class_
+        tag_ids = cls.ensure_ids(db, [name for _, tags in rows for name in cls.normalize_all(tags)])
+        db.execute(delete(link_model))
+        links = [
+            {owner_column.key: owner_id, "tag_id": tag_ids[name]}
+            for owner_id, tags in rows
+            for name in cls.normalize_all(tags)
+        ]
+        if links:
+            db.execute(insert(link_model), links)
+        db.flush()
+        return len(links)
+
+    @staticmethod
+    def _needs_backfill(db: Session, link_model, tags_column) -> bool:
+        has_links = db.execute(select(func.count()).select_from(link_model)).scalar_one()
+        if has_links:
+            return False
+        tagged = db.execute(
+            select(func.count()).select_from(tags_column.class_).where(tags_column.is_not(None))
+        ).scalar_one()
+        return bool(tagged)
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import session_scope
+from ..models import Place
+from .place_index import EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+@dataclass(frozen=True)
+class TransitStop:
+    id: int
+    name: str
+    lat: float
+    lng: float
+
+
+@dataclass(frozen=True)
+class TransitNetwork:
+    stops: list[TransitStop]
+    # (board stop id, alight stop id, minutes including the expected wait)
+    rides: list[tuple[int, int, float]]
+    walking_speed_kmh: float
+    max_walk_to_stop_km: float
+    source_digest: str
+
+
+@dataclass
+class _TransitMatrices:
+    version: int
+    place_index: dict[int, int]
+    places: object  # (N, 2) radians, in place_index order
+    stops: object  # (S, 2) radians
+    stop_to_place: object  # (S, N) float32 minutes, memory-mapped
+    walking_speed_kmh: float
+    max_walk_to_stop_km: float
+
+
+class TransitService:
+    """Door-to-door travel times over the campus shuttle network.
+
+    The route file lists stops with their minute offsets around the loop.
+    Stop-to-stop times (expected wait + ride, with walking transfers) come
+    from Floyd-Warshall; the stop-to-place matrix (best ride from each stop
+    to each place, including the final walk) is then built with numpy,
+    saved as an ``.npy`` file and memory-mapped. A trip from any origin is
+    the walk to each nearby stop plus that stop's row, so ranking a handful
+    of candidates costs O(stops) each and storage grows linearly with the
+    catalogue. While no matrix could be built, the service returns no times
+    and callers keep straight-line ordering.
+
+    Only one build runs at a time. With background jobs enabled, a request
+    that finds the matrices stale starts a rebuild thread and keeps serving
+    the previous matrices; otherwise (tests, scripts) it builds inline.
+    """
+
+    _matrices: _TransitMatrices | None = None
+    _version = 0
+    _lock = threading.Lock()
+    _build_lock = threading.Lock()
+    _builder: threading.Thread | None = None
+
+    @classmethod
+    def travel_minutes(cls, db: Session, from_place_id: int, to_place_ids: list[int]) -> dict[int, float]:
+        """Minutes from one place to each of ``to_place_ids`` (missing ids are omitted)."""
+        matrices = cls._load(db)
+        if matrices is None or from_place_id not in matrices.place_index:
+            return {}
+        origin = matrices.places[matrices.place_index[from_place_id]]
+        targets = [place_id for place_id in to_place_ids if place_id in matrices.place_index]
+        columns = [matrices.place_index[place_id] for place_id in targets]
+        minutes = cls._minutes_from(matrices, origin, matrices.places[columns], columns)
+        return dict(zip(targets, minutes.tolist()))
+
+    @classmethod
+    def minutes_from_point(cls, db: Session, lat: float, lng: float, places: list[Place]) -> dict[int, float]:
+        """Minutes from an arbitrary point: walk directly, or walk to a stop and ride.
+
+        Costs O(stops) per place, independent of the catalogue size.
+        """
+        matrices = cls._load(db)
+        if matrices is None:
+            return {}
+        located = [place for place in places if place.latitude is not None and place.longitude is not None]
+        if not located:
+            return {}
+        targets = np.radians(np.array([[place.latitude, place.longitude] for place in located]))
+        columns = [matrices.place_index.get(place.id) for place in located]
+        minutes = cls._minutes_from(matrices, np.radians(np.array([lat, lng])), targets, columns)
+        return {place.id: value for place, value in zip(located, minutes.tolist())}
+
+    @classmethod
+    def _minutes_from(cls, matrices: _TransitMatrices, origin, targets, columns: list[int | None]):
+        """Best of walking straight to each target or walking to a stop and riding.
+
+        ``columns`` are the targets' stop-to-place columns; ``None`` (a place
+        newer than the matrix) falls back to walking only.
+        """
+        speed = matrices.walking_speed_kmh
+        origin = np.asarray(origin, dtype=np.float64).reshape(1, 2)
+        best = cls._walk_minutes(origin, np.asarray(targets).reshape(-1, 2), speed)[0]
+        to_stops = cls._walk_minutes(origin, matrices.stops, speed)[0]
+        to_stops[_km_from_minutes(to_stops, speed) > matrices.max_walk_to_stop_km] = np.inf
+        for index, column in enumerate(columns):
+            if column is not None:
+                best[index] = min(best[index], float(np.min(to_stops + matrices.stop_to_place[:, column])))
+        return best
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._version += 1
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._matrices = None
+            cls._version = 0
+
+    @classmethod
+    def warm(cls, db: Session) -> None:
+        """Build or map the matrices at startup so the first request does not pay for it."""
+        cls.refresh(db)
+
+    @classmethod
+    def refresh(cls, db: Session) -> None:
+        """Build or map the matrices for the current catalogue unless they are up to date.
+
+        Callers queue on a lock, so a burst after an invalidation builds once.
+        A failed build is logged and leaves the previous matrices in place.
+        """
+        with cls._build_lock:
+            with cls._lock:
+                current = cls._matrices
+                if current is not None and current.version == cls._version:
+                    return
+                version = cls._version
+            try:
+                matrices = cls._map(db, version)
+            except (OSError, ValueError) as exc:
+                logger.warning("Transit matrices unavailable: %s", exc)
+                return
+            with cls._lock:
+                if cls._matrices is None or cls._matrices.version <= version:
+                    cls._matrices = matrices
+
+    # --- Network ---------------------------------------------------------------
+    @staticmethod
+    def network(path: str | Path | None = None) -> TransitNetwork:
+        raw = Path(path or settings.transit_data_path).read_bytes()
+        data = json.loads(raw)
+        stops: dict[int, TransitStop] = {}
+        rides: list[tuple[int, int, float]] = []
+        for route in data["routes"]:
+            route_stops = route["stops"]
+            cycle = float(route["cycle_minutes"])
+            for stop in route_stops:
+                stops.setdefault(stop["id"], TransitStop(stop["id"], stop["name"], stop["lat"], stop["lng"]))
+            # Every ordered pair on a route is one ride; loops wrap around.
+            for board in route_stops:
+                for alight in route_stops:
+                    if board is alight:
+                        continue
+                    minutes = alight["minute"] - board["minute"]
+                    if minutes < 0:
+                        if not route.get("loop"):
+                            continue
+                        minutes += cycle
+                    rides.append((board["id"], alight["id"], route["headway_minutes"] / 2 + minutes))
+        return TransitNetwork(
+            stops=sorted(stops.values(), key=lambda stop: stop.id),
+            rides=rides,
+            walking_speed_kmh=float(data.get("walking_speed_kmh", 4.8)),
+            max_walk_to_stop_km=float(data.get("max_walk_to_stop_km", 1.0)),
+            source_digest=hashlib.sha256(raw).hexdigest(),
+        )
+
+    @classmethod
+    def stop_matrix(cls, network: TransitNetwork):
+        """All-pairs stop times via Floyd-Warshall over rides and short walking transfers."""
+        positions = {stop.id: index for index, stop in enumerate(network.stops)}
+        coords = np.radians(np.array([[stop.lat, stop.lng] for stop in network.stops]))
+        walk = cls._walk_minutes(coords, coords, network.walking_speed_kmh)
+        within_reach = _km_from_minutes(walk, network.walking_speed_kmh) <= network.max_walk_to_stop_km
+        dist = np.where(within_reach, walk, np.inf)
+        for board, alight, minutes in network.rides:
+            i, j = positions[board], positions[alight]
+            dist[i, j] = min(dist[i, j], minutes)
+        np.fill_diagonal(dist, 0.0)
+        for k in range(len(network.stops)):
+            np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+        return dist
+
+    # --- Matrices --------------------------------------------------------------
+    @classmethod
+    def _load(cls, db: Session) -> _TransitMatrices | None:
+        with cls._lock:
+            matrices = cls._matrices
+            if matrices is not None and matrices.version == cls._version:
+                return matrices
+        if settings.background_jobs_enabled:
+            cls._refresh_in_background()
+            return matrices
+        cls.refresh(db)
+        with cls._lock:
+            return cls._matrices
+
+    @classmethod
+    def _refresh_in_background(cls) -> None:
+        with cls._lock:
+            if cls._builder is not None and cls._builder.is_alive():
+                return
+            cls._builder = threading.Thread(target=cls._refresh_in_own_session, name="transit-rebuild", daemon=True)
+            cls._builder.start()
+
+    @classmethod
+    def _refresh_in_own_session(cls) -> None:
+        with session_scope() as session:
+            cls.refresh(session)
+
+    @classmethod
+    def _map(cls, db: Session, version: int) -> _TransitMatrices:
+        network = cls.network()
+        rows = db.execute(
+            select(Place.id, Place.latitude, Place.longitude)
+            .where(Place.latitude.is_not(None))
+            .where(Place.longitude.is_not(None))
+            .order_by(Place.id)
+        ).all()
+        fingerprint = hashlib.sha256(
+            (network.source_digest + "|" + ";".join(f"{pid}:{lat!r}:{lng!r}" for pid, lat, lng in rows)).encode()
+        ).hexdigest()
+        # Files are named by fingerprint, so a rebuild never rewrites a file
+        # another process may have mapped.
+        cache_dir = Path(settings.transit_cache_dir)
+        stop_path = cache_dir / f"stop_to_place-{fingerprint[:16]}.npy"
+        if not stop_path.exists():
+            cls._build(network, rows, stop_path)
+
+        return _TransitMatrices(
+            version=version,
+            place_index={row[0]: index for index, row in enumerate(rows)},
+            places=_place_coords(rows),
+            stops=np.radians(np.array([[stop.lat, stop.lng] for stop in network.stops])),
+            stop_to_place=np.load(stop_path, mmap_mode="r"),
+            walking_speed_kmh=network.walking_speed_kmh,
+            max_walk_to_stop_km=network.max_walk_to_stop_km,
+        )
+
+    @classmethod
+    def _build(cls, network: TransitNetwork, rows, stop_path: Path) -> None:
+        stop_path.parent.mkdir(parents=True, exist_ok=True)
+        speed = network.walking_speed_kmh
+        stops = np.radians(np.array([[stop.lat, stop.lng] for stop in network.stops]))
+        stop_times = cls.stop_matrix(network)
+
+        from_stop = cls._walk_minutes(stops, _place_coords(rows), speed)  # (S, N)
+        from_stop[_km_from_minutes(from_stop, speed) > network.max_walk_to_stop_km] = np.inf
+        # Best time from boarding at each stop to each place: ride + walk from the alighting stop.
+        stop_to_place = np.full(from_stop.shape, np.inf)
+        for alight in range(len(network.stops)):
+            np.minimum(stop_to_place, stop_times[:, alight, None] + from_stop[None, alight, :], out=stop_to_place)
+
+        # Each build writes to its own temporary file (other processes may
+        # be building the same catalogue) and renames it into place.
+        stop_partial = _partial_path(stop_path)
+        try:
+            with open(stop_partial, "wb") as handle:
+                np.save(handle, stop_to_place.astype(np.float32))
+            os.replace(stop_partial, stop_path)
+        finally:
+            stop_partial.unlink(missing_ok=True)
+
+        # Drop matrices for older catalogues (and the retired place-to-place
+        # files); mapped copies stay readable until closed.
+        for stale in stop_path.parent.glob("*_to_place-*.npy"):
+            if stale != stop_path:
+                stale.unlink(missing_ok=True)
+
+    @staticmethod
+    def _walk_minutes(origins, targets, speed_kmh: float):
+        """Straight-line walking minutes between two arrays of radian coordinates."""
+        dlat = targets[None, :, 0] - origins[:, None, 0]
+        dlng = targets[None, :, 1] - origins[:, None, 1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(origins[:, None, 0]) * np.cos(targets[None, :, 0]) * np.sin(dlng / 2) ** 2
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        return km / speed_kmh * 60.0
+
+
+def _place_coords(rows):
+    return np.radians(np.array([[lat, lng] for _, lat, lng in rows], dtype=np.float64).reshape(-1, 2))
+
+
+def _partial_path(final: Path) -> Path:
+    handle, name = tempfile.mkstemp(prefix=f"{final.stem}.", suffix=".partial", dir=final.parent)
+    os.close(handle)
+    return Path(name)
+
+
+def _km_from_minutes(minutes, speed_kmh: float):
+    return minutes / 60.0 * speed_kmh
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import upsert_insert
+from ..models import Event, EventInterestRollup
+
+settings = get_settings()
+
+MAX_RANKED_EVENTS = 200
+
+
+@dataclass
+class _TrendingState:
+    # Decayed scores of all closed hourly buckets, expressed at ``reference``.
+    scores: dict[int, float] = field(default_factory=dict)
+    reference: datetime | None = None
+    ranking: list[tuple[int, float]] = field(default_factory=list)
+    computed_at: float | None = None
+
+
+class TrendingService:
+    """Ranks events by exponentially decayed interest velocity.
+
+    ``set_interest`` records each net transition in an hourly rollup row.
+    ``refresh`` folds newly closed hours into running scores, so each run
+    only reads the rollups written since the previous one.
+    """
+
+    _state = _TrendingState()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def bucket_for(moment: datetime) -> datetime:
+        moment = TrendingService._ensure_utc(moment)
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def record_interest_delta(db: Session, event_id: int, delta: int, *, at: datetime | None = None) -> None:
+        bucket = TrendingService.bucket_for(at or datetime.now(timezone.utc))
+        for _ in range(2):
+            bumped = db.execute(
+                update(EventInterestRollup)
+                .where(EventInterestRollup.event_id == event_id)
+                .where(EventInterestRollup.bucket_start == bucket)
+                .values(delta=EventInterestRollup.delta + delta)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if bumped:
+                return
+            try:
+                with db.begin_nested():
+                    db.add(EventInterestRollup(event_id=event_id, bucket_start=bucket, delta=delta))
+            except IntegrityError:
+                continue
+            return
+
+    @staticmethod
+    def record_interest_deltas(db: Session, deltas: dict[int, int], *, at: datetime | None = None) -> None:
+        """Add several events' deltas to the current hour in one upsert."""
+        if not deltas:
+            return
+        bucket = TrendingService.bucket_for(at or datetime.now(timezone.utc))
+        stmt = upsert_insert(db, EventInterestRollup).values(
+            [{"event_id": event_id, "bucket_start": bucket, "delta": delta} for event_id, delta in deltas.items()]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EventInterestRollup.event_id, EventInterestRollup.bucket_start],
+                set_={"delta": EventInterestRollup.delta + stmt.excluded.delta},
+            )
+        )
+
+    @classmethod
+    def refresh(cls, db: Session, *, now: datetime | None = None) -> int:
+        """Fold closed hourly buckets into the running scores and re-rank.
+
+        Returns the number of events in the new ranking.
+        """
+        now = cls._ensure_utc(now or datetime.now(timezone.utc))
+        current_hour = cls.bucket_for(now)
+        window_start = current_hour - timedelta(hours=settings.trending_window_hours)
+        decay = 0.5 ** (1 / settings.trending_half_life_hours)
+
+        with cls._lock:
+            state = cls._state
+            if state.reference is None or state.reference < window_start or state.reference > current_hour:
+                state.scores = {}
+                state.reference = window_start
+
+            if state.reference < current_hour:
+                elapsed = (current_hour - state.reference) / timedelta(hours=1)
+                factor = decay**elapsed
+                scores = {event_id: score * factor for event_id, score in state.scores.items()}
+                closed = db.execute(
+                    select(EventInterestRollup.event_id, EventInterestRollup.bucket_start, EventInterestRollup.delta)
+                    .where(EventInterestRollup.bucket_start >= state.reference)
+                    .where(EventInterestRollup.bucket_start < current_hour)
+                ).all()
+                for event_id, bucket_start, delta in closed:
+                    age = (current_hour - cls._ensure_utc(bucket_start)) / timedelta(hours=1)
+                    scores[event_id] = scores.get(event_id, 0.0) + delta * decay**age
+                state.scores = {event_id: score for event_id, score in scores.items() if abs(score) >= 1e-3}
+                state.reference = current_hour
+                db.execute(delete(EventInterestRollup).where(EventInterestRollup.bucket_start < window_start))
+
+            live = dict(state.scores)
+            open_rows = db.execute(
+                select(EventInterestRollup.event_id, EventInterestRollup.delta).where(
+                    EventInterestRollup.bucket_start == current_hour
+                )
+            ).all()
+            for event_id, delta in open_rows:
+                live[event_id] = live.get(event_id, 0.0) + delta
+
+            ranked = sorted(
+                ((event_id, score) for event_id, score in live.items() if score > 0),
+                key=lambda item: (-item[1], item[0]),
+            )
+            state.ranking = ranked[:MAX_RANKED_EVENTS]
+            state.computed_at = time.monotonic()
+            return len(state.ranking)
+
+    @classmethod
+    def trending_events(cls, db: Session, *, limit: int = 20) -> list[Event]:
+        """Events from the current ranking, refreshing it first if it is older than the cache TTL.
+
+        The refresh deletes rollups that left the window, so it runs and
+        commits in its own session instead of the caller's read session.
+        """
+        state = cls._state
+        stale = state.computed_at is None or time.monotonic() - state.computed_at > settings.trending_cache_ttl_seconds
+        if stale:
+            with Session(bind=db.get_bind(), autoflush=False) as session:
+                cls.refresh(session)
+                session.commit()
+        ranking = cls._state.ranking
+        if not ranking:
+            return []
+
+        now = datetime.now(timezone.utc)
+        ids = [event_id for event_id, _ in ranking]
+        events = {
+            event.id: event
+            for event in db.execute(select(Event).where(Event.id.in_(ids)).where(Event.end_time > now)).scalars()
+        }
+        return [events[event_id] for event_id in ids if event_id in events][:limit]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._state = _TrendingState()
+
+    @staticmethod
+    def _ensure_utc(moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from ..models.user import User
 from ..schemas.user import UserCreate, UserProfileUpdate
+from .recommendations import RecommendationService
 
 
 class UserService:
@@ -81,6 +82,8 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        if update.interests is not None:
+            RecommendationService.invalidate_user(user.id)
         return user
 
     @staticmethod
@@ -1,13 +1,48 @@
 from __future__ import annotations
 
+import os
+import tempfile
+
+# Set before the app is imported: keep the scheduler thread and transit warm-up out of tests,
+# and seed the import-time database somewhere other than the repository's app.db.
+os.environ.setdefault("BACKGROUND_JOBS_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='campus-connect-tests-')}/app.db")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
 
 from app.database import Base, get_db
 from app.main import app
+from app.services.ai_cache import AIMemoryCache
+from app.services.ai_sweeper import AICacheSweeper
+from app.services.insight_prewarm import InsightPrewarmer
+from app.services.place_index import PlaceCoordinateIndex, PlaceTagIndex
+from app.services.recommendations import RecommendationService
+from app.services.transit import TransitService
+from app.services.trending import TrendingService
+
+# Per-process caches and queues live on the class, so they outlive each test's database.
+PROCESS_STATE = (
+    AIMemoryCache,
+    AICacheSweeper,
+    InsightPrewarmer,
+    PlaceCoordinateIndex,
+    PlaceTagIndex,
+    RecommendationService,
+    TransitService,
+    TrendingService,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    for holder in PROCESS_STATE:
+        holder.reset()
+    yield
+    for holder in PROCESS_STATE:
+        holder.reset()
 
 
 @pytest.fixture()
@@ -24,11 +59,12 @@ def db_session():
 
 
 @pytest.fixture()
-def client() -> TestClient:
+def client(tmp_path) -> TestClient:
+    # A file rather than a shared in-memory connection: AI job workers and
+    # late-result writers run in their own threads with their own sessions.
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{tmp_path / 'client.db'}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
         future=True,
     )
     testing_session = sessionmaker(
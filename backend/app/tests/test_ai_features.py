@@ -1,8 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
+import httpx
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event as sa_event, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import Base
+from app.fake_gemini import DEFAULT_CANNED, DEFAULT_REPLY, FakeGeminiConfig, create_app
+from app.models import AICacheEntry, MatchIdea, MatchInsight
+from app.models.user import User
+from app.schemas.ai import DateIdeaRequest, MatchInsightRequest
+from app.services import ai_cache, ai_service, ai_sweeper
+from app.services.ai_cache import AIMemoryCache
+from app.services.ai_client import AIClient
+from app.services.ai_jobs import ai_jobs
+from app.services.ai_service import AIService
+from app.services.ai_sweeper import AICacheSweeper
+from app.services.insight_prewarm import InsightPrewarmer
+from app.services.rate_limit import TokenBucket
 
 
 def _build_participants():
@@ -87,6 +110,69 @@ def test_date_ideas_use_cache_and_places(client: TestClient):
     assert len(cached_payload["ideas"]) == 3
 
 
+def test_swept_date_ideas_are_regenerated_on_read(client: TestClient):
+    match_id = "match-swept"
+    request = {"match_id": match_id, "shared_interests": ["coffee"], "participants": _build_participants()}
+    assert client.post("/ideas", json=request).status_code in (200, 201)
+
+    session_factory = client.app.state._session_local
+    with session_factory() as session:
+        past = datetime.now(timezone.utc) - timedelta(minutes=1)
+        session.execute(update(MatchIdea).where(MatchIdea.match_id == match_id).values(expires_at=past))
+        session.commit()
+        assert AICacheSweeper.run(session).match_ideas == 2
+
+    regenerated = client.get("/ideas", params={"match_id": match_id})
+    assert regenerated.status_code == 200
+    assert regenerated.json()["cached"] is False
+    assert len(regenerated.json()["ideas"]) == 3
+
+
+def test_insight_generation_can_be_queued_with_prefer_respond_async(client: TestClient):
+    match_id = "match-queued"
+    body = {"participants": _build_participants(), "shared_interests": ["coffee"], "mood": "calm"}
+    queued = client.post(f"/matches/{match_id}/insight", json=body, headers={"Prefer": "respond-async"})
+    assert queued.status_code == 202
+    job = queued.json()
+    assert job["status"] in ("queued", "running", "succeeded")
+    assert queued.headers["Location"] == job["status_url"] == f"/ai/jobs/{job['job_id']}"
+
+    ai_jobs.shutdown(wait=True)
+    finished = client.get(job["status_url"]).json()
+    assert finished["status"] == "succeeded" and finished["finished_at"]
+    result = client.get(finished["result_url"])
+    assert result.status_code == 200 and result.json()["cached"] is True
+
+    # Once generated, the same request is answered immediately.
+    again = client.post(f"/matches/{match_id}/insight", json=body, headers={"Prefer": "respond-async"})
+    assert again.status_code == 200 and again.json()["cached"] is True
+    assert client.get("/ai/jobs/unknown").status_code == 404
+
+
+def test_queued_insight_job_is_not_held_to_the_latency_budget(client: TestClient, monkeypatch):
+    slow_client = AIClient(
+        get_settings().copy(update={"gemini_api_key": "test-key", "ai_latency_budget_seconds": 0.05})
+    )
+
+    def slow_call(prompt, system_prompt, temperature):
+        time.sleep(0.2)
+        return "You both love coffee, so start at the campus roastery."
+
+    monkeypatch.setattr(slow_client, "_call_gemini", slow_call)
+    monkeypatch.setattr(ai_service, "ai_client", slow_client)
+
+    body = {"participants": _build_participants(), "shared_interests": ["coffee"], "mood": "calm"}
+    queued = client.post("/matches/match-slow-job/insight", json=body, headers={"Prefer": "respond-async"})
+    assert queued.status_code == 202
+
+    ai_jobs.shutdown(wait=True)
+    finished = client.get(queued.json()["status_url"]).json()
+    assert finished["status"] == "succeeded"
+    result = client.get(finished["result_url"]).json()
+    assert result["summary_text"] == "You both love coffee, so start at the campus roastery."
+    slow_client.close()
+
+
 def test_event_nlp_search_interprets_filters(client: TestClient):
     now = datetime.now(timezone.utc).replace(microsecond=0)
     friday = now + timedelta(days=(4 - now.weekday()) % 7)
@@ -116,3 +202,388 @@ def test_event_nlp_search_interprets_filters(client: TestClient):
     cached = client.get("/events/nlp-search", params={"q": query})
     assert cached.status_code == 200
     assert cached.json()["cached"] is True
+    stats = client.get("/ai/cache/stats").json()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["size"] == 1
+
+
+def test_async_ai_routes_keep_database_work_off_the_event_loop(client: TestClient):
+    on_loop: list[str] = []
+
+    def record_loop_statements(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        on_loop.append(statement)
+
+    client.post("/places/", json={"name": "Lowry Cafe", "location": "Lowry Center", "tags": "coffee"})
+    engine = client.app.state._session_local.kw["bind"]
+    sa_event.listen(engine, "before_cursor_execute", record_loop_statements)
+    try:
+        body = {"participants": _build_participants(), "shared_interests": ["coffee"]}
+        assert client.post("/matches/loop-check/insight", json=body).status_code == 200
+        assert client.get("/matches/loop-check/insight").status_code == 200
+        batch = {"items": [{"match_id": "loop-batch", **body}]}
+        assert client.post("/matches/insights/batch", json=batch).status_code == 200
+        ideas = {"match_id": "loop-check", "participants": _build_participants(), "shared_interests": ["coffee"]}
+        assert client.post("/ideas", json=ideas).status_code == 200
+        assert client.get("/ideas", params={"match_id": "loop-check"}).status_code == 200
+        assert client.get("/events/nlp-search", params={"q": "coffee this weekend"}).status_code == 200
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record_loop_statements)
+
+    assert on_loop == []
+
+
+def test_memory_cache_evicts_lru_and_remembers_misses(monkeypatch):
+    monkeypatch.setattr(ai_cache.settings, "ai_memory_cache_max_entries", 2)
+    AIMemoryCache.store("event_search", "a", {"v": 1})
+    AIMemoryCache.store("event_search", "b", {"v": 2})
+    assert AIMemoryCache.lookup("event_search", "a") == (True, {"v": 1})
+    AIMemoryCache.store_missing("event_search", "c")  # evicts "b", the least recently used
+
+    assert AIMemoryCache.lookup("event_search", "b") == (False, None)
+    assert AIMemoryCache.lookup("event_search", "c") == (True, None)
+    AIMemoryCache.store("event_search", "d", {"v": 4}, ttl_seconds=0)  # already expired: not kept
+    assert AIMemoryCache.lookup("event_search", "d") == (False, None)
+    stats = AIMemoryCache.stats()
+    assert (stats.hits, stats.negative_hits, stats.misses, stats.evictions) == (1, 1, 2, 1)
+
+
+def test_async_ai_client_pools_connections_per_event_loop():
+    client = AIClient(get_settings().copy(update={"gemini_api_key": None}))
+
+    async def use_client():
+        first = client._async_http()
+        assert client._async_http() is first
+        assert (await client.generate_text_async("Plan a study date")).startswith("[mock-ai-")
+        return first
+
+    pooled = asyncio.run(use_client())
+    assert asyncio.run(use_client()) is not pooled
+    asyncio.run(client.aclose())
+    assert client._async_client is None
+
+
+def test_identical_generations_share_one_provider_call(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def slow_generate(prompt, **_):
+        calls.append(prompt)
+        release.wait(timeout=5)
+        return f"reply to {prompt}"
+
+    async def slow_generate_async(prompt, **_):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return f"async reply to {prompt}"
+
+    monkeypatch.setattr(ai_service.ai_client, "generate_text", slow_generate)
+    monkeypatch.setattr(ai_service.ai_client, "generate_text_async", slow_generate_async)
+
+    baseline = ai_service.generation_flight.coalesced
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(AIService._generate, "same prompt", max_tokens=200) for _ in range(4)]
+        while ai_service.generation_flight.coalesced < baseline + 3:
+            time.sleep(0.01)
+        release.set()
+        results = {future.result() for future in futures}
+    assert results == {"reply to same prompt"}
+    assert calls == ["same prompt"]
+
+    async def burst():
+        return await asyncio.gather(
+            *(AIService._generate_async(prompt, max_tokens=200) for prompt in ["a", "a", "a", "b"])
+        )
+
+    calls.clear()
+    assert asyncio.run(burst()) == ["async reply to a"] * 3 + ["async reply to b"]
+    assert sorted(calls) == ["a", "b"]
+    assert ai_service.generation_flight.in_flight() == 0
+
+
+def _sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_direct_chat_stream_relays_chunks_then_full_reply(client: TestClient, monkeypatch):
+    request = {"user_name": "Alex Doe", "partner_name": "Jordan", "message": "Coffee after the lecture?"}
+    response = client.post("/chat/direct/stream", json=request)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert events[-1] == ("done", {"reply_text": "".join(tokens).strip()})
+    assert events[-1][1]["reply_text"] == client.post("/chat/direct", json=request).json()["reply_text"]
+
+    async def flagged_stream(prompt, **_):
+        for chunk in ["Let's", " grab", " a", " weapon", " and", " go"]:
+            yield chunk
+
+    monkeypatch.setattr(ai_service.ai_client, "stream_text_async", flagged_stream)
+    events = _sse_events(client.post("/chat/direct/stream", json=request).text)
+    assert [data["text"] for event, data in events if event == "token"] == ["Let's", " grab", " a"]
+    assert events[-1][0] == "moderated"
+    assert events[-1][1]["categories"] == ["weapon"]
+
+
+def test_mutual_swipe_prewarms_insight_through_batch_upsert(client: TestClient):
+    session_factory = client.app.state._session_local
+    with session_factory() as session:
+        users = [
+            User(email=f"{name.lower()}@example.edu", display_name=name, interests=interests, bio=f"{name} bio")
+            for name, interests in [("Avery", ["Coffee", "hiking"]), ("Blake", ["coffee", "chess"])]
+        ]
+        session.add_all(users)
+        session.commit()
+        avery, blake = (user.id for user in users)
+
+    client.post(f"/matches/users/{avery}/swipe", json={"target_user_id": blake, "swiped_right": True})
+    assert InsightPrewarmer.pending() == []
+    mutual = client.post(f"/matches/users/{blake}/swipe", json={"target_user_id": avery, "swiped_right": True})
+    assert mutual.json()["is_mutual_match"] is True
+    assert InsightPrewarmer.pending() == [tuple(sorted((avery, blake)))]
+
+    with session_factory() as session:
+        assert InsightPrewarmer.run(session) == 1
+        session.commit()
+    assert InsightPrewarmer.pending() == []
+
+    # Stored only under the pair's id: another viewer of either user never reads it.
+    for viewed in (avery, blake):
+        assert client.get(f"/matches/{viewed}/insight").status_code == 404
+    insight = client.get(f"/matches/{InsightPrewarmer.pair_match_id(blake, avery)}/insight")
+    assert insight.status_code == 200 and insight.json()["cached"] is True
+
+    # The batch API reuses the pre-warmed insight and generates the new one.
+    batch_items = [
+        {"match_id": "batch-1", "participants": _build_participants(), "shared_interests": ["coffee"]},
+        {"match_id": "batch-2", "participants": _build_participants(), "mood": "curious"},
+    ]
+    first = client.post("/matches/insights/batch", json={"items": batch_items})
+    assert first.status_code == 200
+    assert first.json()["generated"] == 2
+    again = client.post("/matches/insights/batch", json={"items": batch_items})
+    assert again.json()["generated"] == 0
+    assert [item["cached"] for item in again.json()["insights"]] == [True, True]
+    assert again.json()["insights"][1]["summary_text"] == first.json()["insights"][1]["summary_text"]
+
+
+def test_token_bucket_reserves_in_order():
+    bucket = TokenBucket(rate_per_second=50, capacity=1)
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is False
+
+    async def drain():
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return time.monotonic() - started
+
+    # Three more tokens at 50/s need roughly 60ms after the bucket emptied.
+    assert asyncio.run(drain()) >= 0.05
+
+
+def test_sweeper_removes_expired_rows_in_bounded_batches(db_session, monkeypatch):
+    now = datetime.now(timezone.utc)
+    past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+    for index, expires_at in enumerate([past, past, past, future]):
+        db_session.add(AICacheEntry(category="event_search", cache_key=f"k{index}", payload={}, expires_at=expires_at))
+    for match_id, rank, expires_at in [("old", 0, past), ("old", 1, past), ("new", 0, future)]:
+        db_session.add(
+            MatchIdea(
+                match_id=match_id,
+                idea_rank=rank,
+                title="Walk",
+                description="Walk the arboretum",
+                expires_at=expires_at,
+                payload_fingerprint="fp",
+                context_snapshot={},
+            )
+        )
+    db_session.commit()
+
+    plan = db_session.execute(
+        text("EXPLAIN QUERY PLAN SELECT id FROM ai_cache_entries WHERE expires_at < :now"), {"now": now}
+    ).all()
+    assert any("ix_ai_cache_entries_expires_at" in row[-1] for row in plan)
+
+    monkeypatch.setattr(ai_sweeper, "SWEEP_BATCH_SIZE", 2)
+    result = AICacheSweeper.run(db_session)
+    assert (result.ai_cache_entries, result.match_ideas, result.batches) == (3, 1, 3)
+    assert db_session.scalar(select(func.count(AICacheEntry.id))) == 1
+    # The first expired idea stays behind as the snapshot GET /ideas regenerates from.
+    assert sorted(db_session.execute(select(MatchIdea.match_id, MatchIdea.idea_rank)).all()) == [
+        ("new", 0),
+        ("old", 0),
+    ]
+
+    monkeypatch.setattr(ai_sweeper.settings, "ai_sweep_max_batches", 1)
+    assert AICacheSweeper.run(db_session).removed == 0
+    assert AICacheSweeper.total_removed == 4
+
+
+def test_circuit_breaker_serves_fallback_while_open(monkeypatch):
+    client = AIClient(
+        get_settings().copy(
+            update={
+                "gemini_api_key": "test-key",
+                "ai_breaker_failure_threshold": 2,
+                "ai_breaker_reset_seconds": 60,
+                "ai_provider_requests_per_second": 0,
+            }
+        )
+    )
+    calls = []
+
+    async def failing_call(prompt, system_prompt, temperature):
+        calls.append(prompt)
+        raise RuntimeError("provider unavailable")
+
+    monkeypatch.setattr(client, "_call_gemini_async", failing_call)
+    replies = [asyncio.run(client.generate_text_async(f"prompt {idx}")) for idx in range(4)]
+    assert all(reply.startswith("[mock-ai-") for reply in replies)
+    assert len(calls) == 2
+    assert client.breaker.state == "open"
+
+    async def healthy_call(prompt, system_prompt, temperature):
+        calls.append(prompt)
+        return "real reply"
+
+    monkeypatch.setattr(client, "_call_gemini_async", healthy_call)
+    client.breaker._opened_at -= 60  # cooldown elapsed: one trial call goes through
+    assert client.breaker.state == "half_open"
+    assert asyncio.run(client.generate_text_async("trial")) == "real reply"
+    assert client.breaker.state == "closed"
+
+
+def test_stream_abandoned_before_first_chunk_leaves_breaker_half_open():
+    client = AIClient(
+        get_settings().copy(update={"gemini_api_key": "test-key", "ai_provider_requests_per_second": 0})
+    )
+
+    async def never_answers(request):
+        await asyncio.sleep(60)
+
+    async def disconnect_before_first_chunk():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(never_answers)) as http:
+            client._async_http = lambda: http
+            stream = client.stream_text_async("Plan a study date")
+            try:
+                await asyncio.wait_for(anext(stream), timeout=0.05)
+            except asyncio.TimeoutError:
+                pass
+            await stream.aclose()
+
+    client.breaker._state = "open"
+    client.breaker._opened_at -= client.breaker.reset_seconds
+    asyncio.run(disconnect_before_first_chunk())
+    assert client.breaker.state == "half_open"
+    assert client.breaker.allow()  # the trial slot was handed back
+
+
+def test_slow_event_search_serves_heuristic_then_caches_late_result(client: TestClient, monkeypatch):
+    slow_client = AIClient(
+        get_settings().copy(update={"gemini_api_key": "test-key", "ai_latency_budget_seconds": 0.05})
+    )
+
+    async def slow_call(prompt, system_prompt, temperature):
+        await asyncio.sleep(0.3)
+        return json.dumps({"summary": "Friday concerts", "category": "music", "keywords": ["friday"]})
+
+    monkeypatch.setattr(slow_client, "_call_gemini_async", slow_call)
+    monkeypatch.setattr(ai_service, "ai_client", slow_client)
+
+    query = "Any concert on Friday?"
+    first = client.get("/events/nlp-search", params={"q": query})
+    assert first.status_code == 200
+    assert first.json()["interpreted_query"].startswith("Query interpreted locally")
+
+    cache_key = ai_service.AIService._fingerprint({"query": query})
+    deadline = time.monotonic() + 5
+    while AIMemoryCache.lookup("event_search", cache_key)[1]["interpreted_query"] != "Friday concerts":
+        assert time.monotonic() < deadline, "late result was never cached"
+        time.sleep(0.02)
+
+    second = client.get("/events/nlp-search", params={"q": query})
+    assert second.json()["cached"] is True
+    assert second.json()["interpreted_query"] == "Friday concerts"
+
+
+def test_late_results_committed_before_the_request_are_upserted(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'late.db'}", future=True)
+    Base.metadata.create_all(engine)
+    late_ideas = json.dumps([{"title": f"Late idea {rank}", "description": "From the model"} for rank in range(4)])
+
+    def generate_with_late_write(cls, prompt, *, max_tokens, background=False, on_late_result=None):
+        # The late writer commits in its own session before the request stores its fallback.
+        on_late_result(late_ideas if max_tokens == 500 else "Late summary from the model")
+        return "[mock-ai-fallback] Fallback text"
+
+    monkeypatch.setattr(AIService, "_generate", classmethod(generate_with_late_write))
+
+    insight_request = MatchInsightRequest(participants=_build_participants(), shared_interests=["coffee"])
+    ideas_request = DateIdeaRequest(match_id="late-match", participants=_build_participants())
+    with Session(engine, autoflush=False) as db:
+        record, cached = AIService.upsert_match_insight(db, "late-match", insight_request)
+        db.commit()
+        assert not cached and record.summary_text.endswith("Fallback text")
+    with Session(engine, autoflush=False) as db:
+        ideas, _ = AIService.generate_date_ideas(db, ideas_request)
+        db.commit()
+        assert [idea.idea_rank for idea in ideas] == list(range(len(ideas)))
+
+    with Session(engine) as db:
+        assert db.scalar(select(func.count(MatchInsight.id))) == 1
+        assert db.scalar(select(func.count(MatchIdea.id))) == len(ideas)
+    engine.dispose()
+
+
+def test_ai_client_round_trips_through_fake_gemini(monkeypatch):
+    fake = create_app(FakeGeminiConfig(canned={"study date": "Meet me at the library cafe at noon."}))
+    failing = create_app(FakeGeminiConfig(error_rate=1.0))
+    client = AIClient(
+        get_settings().copy(
+            update={
+                "gemini_api_key": "test-key",
+                "gemini_base_url": "http://fake-gemini/v1beta/models/",
+                "ai_provider_requests_per_second": 0,
+            }
+        )
+    )
+    assert client._gemini_url("generateContent").startswith(
+        "http://fake-gemini/v1beta/models/gemini-2.5-flash:generateContent?key=test-key"
+    )
+
+    async def call(server):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server)) as http:
+            monkeypatch.setattr(client, "_async_http", lambda: http)
+            reply = await client.generate_text_async("Plan a study date")
+            chunks = [chunk async for chunk in client.stream_text_async("Plan a study date")]
+            return reply, chunks
+
+    reply, chunks = asyncio.run(call(fake))
+    assert reply == "Meet me at the library cafe at noon."
+    assert len(chunks) > 1 and "".join(chunks) == reply
+    assert fake.state.stats == {"requests": 2, "streams": 1, "errors": 0}
+
+    async def failing_call():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=failing)) as http:
+            monkeypatch.setattr(client, "_async_http", lambda: http)
+            return await client.generate_text_async("Plan a study date")
+
+    assert asyncio.run(failing_call()).startswith("[mock-ai-")
+    assert failing.state.stats["errors"] == 1
+
+
+def test_fake_gemini_custom_replies_override_defaults():
+    needle = "Interpret the following natural language event query"
+    config = FakeGeminiConfig(canned={needle: '{"summary": "custom"}'})
+    assert config.reply_for(f"{needle}: chess club") == '{"summary": "custom"}'
+    assert config.reply_for("Provide 3 JSON ideas") == DEFAULT_CANNED["Provide 3 JSON ideas"]
+    assert config.reply_for("Say hi") == DEFAULT_REPLY
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.models import User
+
+
+def _create_user(client: TestClient, email: str) -> User:
+    session_factory = client.app.state._session_local
+    with session_factory() as session:
+        user = User(email=email, display_name="Feed User")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        return user
+
+
+def test_calendar_feed_streams_interested_events_and_revalidates(client: TestClient) -> None:
+    user = _create_user(client, "feed@example.com")
+    headers = {"Authorization": f"Bearer {user.id}"}
+
+    feed = client.post("/calendar/feeds", headers=headers)
+    assert feed.status_code == 200
+    token = feed.json()["token"]
+    assert feed.json()["url"].endswith(f"/calendar/feeds/{token}.ics")
+    assert client.post("/calendar/feeds", headers=headers).json()["token"] == token
+
+    start = datetime.now(timezone.utc) + timedelta(days=2)
+    event = client.post(
+        "/events/",
+        json={
+            "title": "Late Night Trivia, Round 2",
+            "location": "Lowry Center",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=2)).isoformat(),
+        },
+    ).json()
+    client.post(f"/events/{event['id']}/interest", json={"user_id": user.id, "interested": True})
+
+    response = client.get(f"/calendar/feeds/{token}.ics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n")
+    assert f"UID:event-{event['id']}@campus-connect.app" in body
+    assert "SUMMARY:Late Night Trivia\\, Round 2" in body
+    assert body.rstrip().endswith("END:VCALENDAR")
+
+    etag = response.headers["etag"]
+    cached = client.get(f"/calendar/feeds/{token}.ics", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    since = client.get(
+        f"/calendar/feeds/{token}.ics",
+        headers={"If-Modified-Since": response.headers["last-modified"]},
+    )
+    assert since.status_code == 304
+
+    client.post(f"/events/{event['id']}/interest", json={"user_id": user.id, "interested": False})
+    changed = client.get(f"/calendar/feeds/{token}.ics", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert "BEGIN:VEVENT" not in changed.text
+
+    rotated = client.post("/calendar/feeds", params={"rotate": True}, headers=headers).json()["token"]
+    assert rotated != token
+    assert client.get(f"/calendar/feeds/{token}.ics").status_code == 404
+
+
+def test_calendar_feed_folds_long_lines() -> None:
+    from app.services.calendar_service import CalendarService
+
+    folded = CalendarService._fold_ical("DESCRIPTION:" + "é" * 80)
+    for line in folded.split("\r\n"):
+        assert len(line.encode("utf-8")) <= 75
+    assert folded.replace("\r\n ", "") == "DESCRIPTION:" + "é" * 80
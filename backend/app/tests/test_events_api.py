@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -77,3 +78,151 @@ def test_event_interest_flow(client: TestClient):
     after_interest = client.get("/events/", params={"viewer_id": viewer_id}).json()[0]
     assert after_interest["viewer_interest"] is True
     assert after_interest["interest_count"] == 1
+
+
+def test_joining_an_event_drops_it_from_cached_recommendations(client: TestClient):
+    user = client.post(
+        "/users/", json={"email": "joiner@example.edu", "display_name": "Joiner", "interests": ["music"]}
+    ).json()
+    event_id = client.post("/events/", json=_example_event_payload()).json()["id"]
+
+    recommended = client.get("/events/recommended", params={"user_id": user["id"]}).json()
+    assert [item["event"]["id"] for item in recommended] == [event_id]
+
+    client.post(f"/events/{event_id}/interest", json={"user_id": user["id"], "interested": True})
+    assert client.get("/events/recommended", params={"user_id": user["id"]}).json() == []
+
+
+def test_event_list_keyset_pagination_and_summary(client: TestClient):
+    base = datetime.now(timezone.utc) + timedelta(days=2)
+    created_ids = []
+    for idx in range(3):
+        payload = _example_event_payload()
+        payload["title"] = f"Paged Event {idx}"
+        payload["start_time"] = (base + timedelta(hours=idx)).isoformat()
+        payload["end_time"] = (base + timedelta(hours=idx + 1)).isoformat()
+        created = client.post("/events/", json=payload)
+        assert created.status_code == 201
+        created_ids.append(created.json()["id"])
+
+    client.post(f"/events/{created_ids[2]}/interest", json={"user_id": "viewer", "interested": True})
+
+    first = client.get("/events/", params={"limit": 2, "fields": "summary", "viewer_id": "viewer"})
+    assert first.status_code == 200
+    assert [event["id"] for event in first.json()] == created_ids[:2]
+    assert all(event["description"] is None for event in first.json())
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/events/", params={"limit": 2, "cursor": cursor, "viewer_id": "viewer"})
+    assert second.status_code == 200
+    data = second.json()
+    assert [event["id"] for event in data] == created_ids[2:]
+    assert data[0]["interest_count"] == 1
+    assert data[0]["viewer_interest"] is True
+    assert data[0]["description"] == "Student bands and open mic."
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/events/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_event_list_overlap_mode_includes_in_progress_events(client: TestClient):
+    evening = (datetime.now(timezone.utc) + timedelta(days=3)).replace(hour=18, minute=0, second=0, microsecond=0)
+    in_progress = _example_event_payload()
+    in_progress.update(
+        title="Afternoon Jam",
+        start_time=(evening - timedelta(hours=1)).isoformat(),
+        end_time=(evening + timedelta(hours=1)).isoformat(),
+    )
+    exhibition = _example_event_payload()
+    exhibition.update(
+        title="Month-long Exhibition",
+        start_time=(evening - timedelta(days=30)).isoformat(),
+        end_time=(evening + timedelta(days=5)).isoformat(),
+    )
+    finished = _example_event_payload()
+    finished.update(
+        title="Lunch Talk",
+        start_time=(evening - timedelta(hours=6)).isoformat(),
+        end_time=(evening - timedelta(hours=5)).isoformat(),
+    )
+    for payload in (in_progress, exhibition, finished):
+        assert client.post("/events/", json=payload).status_code == 201
+
+    window = {
+        "start_time": evening.isoformat(),
+        "end_time": (evening + timedelta(hours=3)).isoformat(),
+    }
+    starting = client.get("/events/", params=window).json()
+    assert starting == []
+
+    overlapping = client.get("/events/", params={**window, "overlap": True}).json()
+    assert sorted(event["title"] for event in overlapping) == ["Afternoon Jam", "Month-long Exhibition"]
+
+
+def test_bulk_import_dedupes_and_reports_counts(client: TestClient):
+    start = (datetime.now(timezone.utc) + timedelta(days=4)).replace(microsecond=0)
+    rows = [
+        {"title": "Robotics Demo", "location": "Taylor Hall", "start_time": start.isoformat(), "tags": ["tech"]},
+        {"title": "Poetry Slam", "location": "Lowry Center", "start_time": (start + timedelta(hours=3)).isoformat()},
+        {"title": "robotics  demo", "location": "TAYLOR HALL", "start_time": start.isoformat()},
+        {"title": "Missing start", "location": "Nowhere"},
+    ]
+    ndjson = "\n".join(json.dumps(row) for row in rows)
+    first = client.post("/events/import", files={"file": ("feed.ndjson", ndjson, "application/x-ndjson")})
+    assert first.status_code == 200, first.text
+    assert first.json() == {"format": "ndjson", "inserted": 2, "updated": 0, "skipped": 1, "invalid": 1}
+
+    csv_feed = (
+        "title,location,start_time,description,tags\n"
+        f'Robotics Demo,Taylor Hall,{start.isoformat()},Now with drones,"tech,robots"\n'
+        f"Poetry Slam,Lowry Center,{(start + timedelta(hours=3)).isoformat()},,\n"
+    )
+    second = client.post("/events/import", files={"file": ("feed.csv", csv_feed, "text/csv")})
+    assert second.json() == {"format": "csv", "inserted": 0, "updated": 1, "skipped": 1, "invalid": 0}
+
+    ics_start = (start + timedelta(days=1)).strftime("%Y%m%dT%H%M%SZ")
+    ics_feed = "\r\n".join(
+        [
+            "BEGIN:VCALENDAR",
+            "BEGIN:VEVENT",
+            "SUMMARY:Jazz Ensemble\\, Spring",
+            f"DTSTART:{ics_start}",
+            "DURATION:PT2H",
+            "LOCATION:Gault Recital",
+            "  Hall",
+            "CATEGORIES:music,jazz",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        ]
+    )
+    third = client.post("/events/import", files={"file": ("club.ics", ics_feed, "text/calendar")})
+    assert third.json()["inserted"] == 1
+
+    titles = {event["title"]: event for event in client.get("/events/").json()}
+    assert titles["Robotics Demo"]["description"] == "Now with drones"
+    assert sorted(titles["Robotics Demo"]["tags"]) == ["robots", "tech"]
+    jazz = titles["Jazz Ensemble, Spring"]
+    assert jazz["location"] == "Gault Recital Hall"
+    assert jazz["category"] == "music"
+
+
+def test_reimport_of_api_events_matches_the_oldest_duplicate(client: TestClient):
+    start = (datetime.now(timezone.utc) + timedelta(days=6)).replace(microsecond=0)
+    payload = {"title": "Jazz Night", "location": "Lowry Center", "start_time": start.isoformat()}
+    created = client.post("/events/", json={**payload, "tags": ["Live Music", " Jazz"]})
+    assert created.status_code == 201
+    # The API does not enforce the import key; the same event may be created twice.
+    duplicate = client.post("/events/", json={**payload, "title": "jazz  night", "description": "Copy"})
+    assert duplicate.status_code == 201
+
+    row = {**payload, "tags": ["live music", "jazz"]}
+    feed = client.post("/events/import", files={"file": ("feed.ndjson", json.dumps(row), "application/x-ndjson")})
+    assert feed.json() == {"format": "ndjson", "inserted": 0, "updated": 0, "skipped": 1, "invalid": 0}
+
+    changed = {**row, "description": "Trio set"}
+    feed = client.post(
+        "/events/import", files={"file": ("feed.ndjson", json.dumps(changed), "application/x-ndjson")}
+    )
+    assert feed.json()["updated"] == 1
+    assert client.get(f"/events/{created.json()['id']}").json()["description"] == "Trio set"
+    assert client.get(f"/events/{duplicate.json()['id']}").json()["description"] == "Copy"
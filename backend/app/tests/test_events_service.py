@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event as orm_event, func, insert, select, update
+
+from app.models import Event, EventInterest, EventInterestRollup, User
+from app.models.user_match import UserMatch
+from app.schemas.events import EventCreate, EventInterestRequest, EventUpdate
+from app.services.events import EventService
+from app.services.recommendations import RecommendationService
+from app.services.trending import TrendingService
+
+
+def _create_event(
+    db_session,
+    title: str = "Trivia Night",
+    offset_hours: int = 24,
+    tags: list[str] | None = None,
+) -> Event:
+    start = datetime.now(timezone.utc) + timedelta(hours=offset_hours)
+    event = EventService.create_event(
+        db_session,
+        EventCreate(title=title, location="Student Union", start_time=start, tags=tags or ["games"]),
+    )
+    db_session.commit()
+    return event
+
+
+def test_set_interest_maintains_counter_on_transitions(db_session):
+    event = _create_event(db_session)
+
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="a", interested=True))
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="a", interested=True))
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="b", interested=True))
+    db_session.commit()
+    assert EventService.interest_count(db_session, event.id) == 2
+
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="a", interested=False))
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="a", interested=False))
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="c", interested=False))
+    db_session.commit()
+    assert EventService.interest_count(db_session, event.id) == 1
+
+
+def test_bulk_interest_upsert_counts_only_real_transitions(db_session):
+    first = _create_event(db_session, title="Open Mic")
+    second = _create_event(db_session, title="Board Games")
+    EventService.set_interest(db_session, first.id, EventInterestRequest(user_id="a", interested=True))
+    db_session.commit()
+
+    result = EventService.set_interests_bulk(
+        db_session,
+        "a",
+        [(first.id, True), (second.id, False), (second.id, True), (9999, True)],
+    )
+    db_session.commit()
+    assert result.changed == 1
+    assert result.missing == [9999]
+    assert EventService.interest_count(db_session, first.id) == 1
+    assert EventService.interest_count(db_session, second.id) == 1
+
+    result = EventService.set_interests_bulk(db_session, "a", [(first.id, False), (second.id, False)])
+    db_session.commit()
+    assert result.changed == 2
+    assert EventService.interest_count(db_session, first.id) == 0
+    assert EventService.interest_count(db_session, second.id) == 0
+    assert EventService.get_interest(db_session, second.id, "a").interested is False
+
+    result = EventService.set_interests_bulk(db_session, "b", [(first.id, False)])
+    db_session.commit()
+    assert result.changed == 0
+    assert EventService.interest_count(db_session, first.id) == 0
+    assert EventService.reconcile_interest_counts(db_session) == 0
+
+
+def test_bulk_unset_counts_a_row_inserted_concurrently(db_session):
+    event = _create_event(db_session, title="Poetry Slam")
+    raced = []
+
+    def insert_first(state):
+        # Another request marks the user interested just before our insert runs.
+        if not raced and state.is_insert and state.statement.table.name == "event_interests":
+            raced.append(True)
+            connection = state.session.connection()
+            connection.execute(insert(EventInterest).values(event_id=event.id, user_id="c", interested=True))
+            connection.execute(update(Event).where(Event.id == event.id).values(interest_count=Event.interest_count + 1))
+
+    orm_event.listen(db_session, "do_orm_execute", insert_first)
+    try:
+        result = EventService.set_interests_bulk(db_session, "c", [(event.id, False)])
+    finally:
+        orm_event.remove(db_session, "do_orm_execute", insert_first)
+    db_session.commit()
+
+    assert raced and result.changed == 1
+    assert EventService.get_interest(db_session, event.id, "c").interested is False
+    assert EventService.interest_count(db_session, event.id) == 0
+    assert EventService.reconcile_interest_counts(db_session) == 0
+
+
+def test_reconcile_interest_counts_repairs_drift(db_session):
+    event = _create_event(db_session)
+    EventService.set_interest(db_session, event.id, EventInterestRequest(user_id="a", interested=True))
+    db_session.execute(update(Event).where(Event.id == event.id).values(interest_count=7))
+    db_session.commit()
+
+    assert EventService.reconcile_interest_counts(db_session) == 1
+    db_session.commit()
+    assert EventService.interest_count(db_session, event.id) == 1
+    assert EventService.reconcile_interest_counts(db_session) == 0
+
+
+def test_trending_ranks_recent_interest_above_stale_interest(db_session):
+    stale = _create_event(db_session, title="Last Week's Buzz")
+    fresh = _create_event(db_session, title="Tonight's Buzz")
+    now = datetime.now(timezone.utc)
+
+    TrendingService.record_interest_delta(db_session, stale.id, 3, at=now - timedelta(hours=20))
+    for user_id in ("a", "b"):
+        EventService.set_interest(db_session, fresh.id, EventInterestRequest(user_id=user_id, interested=True))
+    db_session.commit()
+
+    assert TrendingService.refresh(db_session, now=now) == 2
+    ranked = TrendingService.trending_events(db_session, limit=5)
+    assert [event.id for event in ranked] == [fresh.id, stale.id]
+
+    EventService.set_interest(db_session, fresh.id, EventInterestRequest(user_id="a", interested=False))
+    EventService.set_interest(db_session, fresh.id, EventInterestRequest(user_id="b", interested=False))
+    db_session.commit()
+    TrendingService.refresh(db_session, now=now)
+    assert [event.id for event in TrendingService.trending_events(db_session)] == [stale.id]
+
+
+def test_recommendations_score_tag_overlap_and_friend_interest(db_session):
+    viewer = User(id="viewer", email="viewer@example.edu", display_name="Viewer", interests=["Live Music", "coffee"])
+    friend = User(id="friend", email="friend@example.edu", display_name="Friend", interests=[])
+    db_session.add_all([viewer, friend])
+    db_session.add_all(
+        [
+            UserMatch(id="m1", user_id="viewer", target_user_id="friend", swiped_right=True),
+            UserMatch(id="m2", user_id="friend", target_user_id="viewer", swiped_right=True),
+        ]
+    )
+    db_session.commit()
+
+    both = _create_event(db_session, title="Coffee House Set", tags=["live music", "Coffee"])
+    music = _create_event(db_session, title="Quad Concert", tags=["LIVE MUSIC"])
+    social = _create_event(db_session, title="Board Games", tags=["games"])
+    EventService.set_interest(db_session, social.id, EventInterestRequest(user_id="friend", interested=True))
+    db_session.commit()
+
+    recommendations = RecommendationService.recommend_events(db_session, "viewer")
+    assert [item.event.id for item in recommendations] == [both.id, music.id, social.id]
+    assert recommendations[0].matched_tags == ["coffee", "live music"]
+    assert recommendations[2].friends_interested == 1
+
+    EventService.update_event(db_session, music.id, EventUpdate(tags=["lecture"]))
+    db_session.commit()
+    RecommendationService.invalidate_events()  # the router invalidates once the update is committed
+    refreshed = RecommendationService.recommend_events(db_session, "viewer")
+    assert [item.event.id for item in refreshed] == [both.id, social.id]
+
+
+def test_trending_read_commits_its_own_refresh(db_session):
+    event = _create_event(db_session, title="Ancient Buzz")
+    TrendingService.record_interest_delta(
+        db_session, event.id, 2, at=datetime.now(timezone.utc) - timedelta(days=30)
+    )
+    db_session.commit()
+
+    assert TrendingService.trending_events(db_session) == []
+    db_session.rollback()  # routers never commit GET sessions
+    assert db_session.scalar(select(func.count()).select_from(EventInterestRollup)) == 0
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import random
+import threading
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, update
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -9,6 +12,12 @@ from fastapi.testclient import TestClient
 
 from app.database import Base, get_db
 from app.main import app
+from app.models import Place
+from app.services import place_index, transit
+from app.services.place_index import PlaceCoordinateIndex, PlaceTagIndex
+from app.services.places import DEFAULT_PLACE_PAGE_SIZE, PlaceService, haversine_km
+from app.services.tags import TagService
+from app.services.transit import TransitService
 
 
 @pytest.fixture()
@@ -91,3 +100,271 @@ def test_nearby_places_filter(client: TestClient):
     data = response.json()
     assert len(data) == 1
     assert data[0]["name"] == "Library Terrace"
+
+
+def test_recommend_and_date_ideas_use_tag_index(client: TestClient):
+    def create(name: str, tags: list[str]) -> int:
+        return client.post("/places/", json={"name": name, "location": "Campus", "tags": tags}).json()["id"]
+
+    cafe = create("Bean Counter", ["Coffee", "Study"])
+    library = create("Quiet Stacks", ["study"])
+    create("Night Owl Bar", ["nightlife"])
+    client.post(f"/places/{library}/reviews", json={"reviewer_name": "Alex", "rating": 5})
+
+    recommended = client.get("/places/recommend", params={"interests": "study, coffee"}).json()
+    assert [place["id"] for place in recommended] == [cafe, library]
+    assert recommended[0]["tags"] == ["Coffee", "Study"]
+    assert client.get("/places/recommend", params={"interests": "karaoke"}).json() == []
+
+    ideas = client.get("/places/date-ideas", params={"interests": "Study", "limit": 5}).json()
+    assert [idea["place"]["id"] for idea in ideas] == [library, cafe]
+    assert ideas[0]["reason"] == "Great for study"
+    assert len(client.get("/places/date-ideas", params={"limit": 5}).json()) == 3
+
+
+def test_tag_index_merges_posting_lists_and_ranks_by_overlap_then_rating(db_session):
+    specs = [("a", 4.0, "coffee"), ("b", 3.0, "coffee,study"), ("c", 5.0, "study"), ("d", 4.5, "coffee,study,wifi")]
+    ids = {}
+    for name, rating, tags in specs:
+        place = Place(name=name, rating=rating, tags=tags)
+        db_session.add(place)
+        db_session.flush()
+        ids[name] = place.id
+    TagService.rebuild_place_tags(db_session)
+    db_session.commit()
+
+    ranked = PlaceTagIndex.rank(db_session, ["coffee", "study", "karaoke"], limit=3)
+    assert ranked == [(ids["d"], 2), (ids["b"], 2), (ids["c"], 1)]
+    assert PlaceTagIndex.rank(db_session, ["karaoke"], limit=3) == []
+
+    # Per-tag rating lists merge without duplicates; rare tags still answer.
+    assert PlaceTagIndex.top_rated(db_session, ["coffee", "study"], limit=10) == [
+        ids["c"], ids["d"], ids["a"], ids["b"]
+    ]
+    assert PlaceTagIndex.top_rated(db_session, ["wifi", "karaoke"], limit=3) == [ids["d"]]
+    assert PlaceTagIndex.top_rated(db_session, [], limit=2) == [ids["c"], ids["d"]]
+
+
+def test_place_indexes_pick_up_writes_from_other_workers(db_session, monkeypatch):
+    monkeypatch.setattr(place_index.settings, "place_index_check_seconds", 60)
+    first = Place(name="First", rating=4.0, tags="coffee", latitude=40.80, longitude=-81.93)
+    db_session.add(first)
+    db_session.flush()
+    PlaceService.invalidate_indexes()
+    db_session.commit()
+    assert PlaceTagIndex.top_rated(db_session, [], limit=5) == [first.id]
+    assert [place_id for place_id, _ in PlaceCoordinateIndex.nearest(db_session, 40.80, -81.93, k=5)] == [first.id]
+
+    # Another worker adds a place; nothing invalidates this process's indexes.
+    second = Place(name="Second", rating=5.0, latitude=40.80, longitude=-81.931)
+    db_session.add(second)
+    db_session.commit()
+    assert PlaceTagIndex.top_rated(db_session, [], limit=5) == [first.id]
+
+    monkeypatch.setattr(place_index.settings, "place_index_check_seconds", 0)
+    assert PlaceTagIndex.top_rated(db_session, [], limit=5) == [second.id, first.id]
+    assert len(PlaceCoordinateIndex.nearest(db_session, 40.80, -81.93, k=5)) == 2
+
+    PlaceService.add_review(db_session, first.id, reviewer_name="r", rating=5.0, comment=None)
+    PlaceService.add_review(db_session, second.id, reviewer_name="r", rating=1.0, comment=None)
+    db_session.commit()
+    assert PlaceTagIndex.top_rated(db_session, [], limit=5) == [first.id, second.id]
+
+
+def test_nearby_geohash_index_matches_brute_force(db_session):
+    rng = random.Random(7)
+    for index in range(400):
+        db_session.add(
+            Place(
+                name=f"Spot {index}",
+                latitude=40.80 + rng.uniform(-0.2, 0.2),
+                longitude=-81.93 + rng.uniform(-0.2, 0.2),
+            )
+        )
+    db_session.commit()
+
+    for radius_km in (0.5, 2.0, 7.5, 40.0):
+        found = PlaceService.nearby(db_session, 40.80, -81.93, radius_km=radius_km, limit=500)
+        expected = sorted(
+            (
+                place
+                for place in db_session.query(Place).all()
+                if haversine_km(40.80, -81.93, place.latitude, place.longitude) <= radius_km
+            ),
+            key=lambda place: haversine_km(40.80, -81.93, place.latitude, place.longitude),
+        )
+        assert [place.id for place in found] == [place.id for place in expected]
+
+
+def test_nearest_returns_exact_k_without_radius(client: TestClient):
+    offsets = [0.30, 0.01, 0.12, 0.05, 2.0]
+    ids = [
+        client.post(
+            "/places/",
+            json={"name": f"Stop {index}", "latitude": 40.80 + offset, "longitude": -81.93},
+        ).json()["id"]
+        for index, offset in enumerate(offsets)
+    ]
+    expected = [ids[1], ids[3], ids[2]]
+
+    response = client.get("/places/nearest", params={"lat": 40.80, "lng": -81.93, "k": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert [place["id"] for place in data] == expected
+    assert data[0]["distance_km"] < data[1]["distance_km"] < data[2]["distance_km"]
+
+    capped = client.get("/places/nearest", params={"lat": 40.80, "lng": -81.93, "k": 10, "radius_km": 15})
+    assert [place["id"] for place in capped.json()] == expected
+
+    new_id = client.post("/places/", json={"name": "Doorstep", "latitude": 40.80, "longitude": -81.93}).json()["id"]
+    refreshed = client.get("/places/nearest", params={"lat": 40.80, "lng": -81.93, "k": 1}).json()
+    assert refreshed[0]["id"] == new_id
+
+
+def test_review_aggregate_is_exact_and_recompute_repairs_drift(db_session):
+    place = Place(name="Dining Hall", rating=0.0, review_count=0)
+    db_session.add(place)
+    db_session.commit()
+
+    for rating in (5, 4, 4):
+        PlaceService.add_review(db_session, place.id, reviewer_name="r", rating=rating, comment=None)
+    db_session.commit()
+    db_session.refresh(place)
+    assert place.review_count == 3
+    assert place.rating_sum == 13
+    assert place.rating == 13 / 3
+
+    db_session.execute(update(Place).where(Place.id == place.id).values(review_count=9, rating_sum=1.0, rating=0.1))
+    db_session.commit()
+    assert PlaceService.recompute_ratings(db_session) == 1
+    db_session.commit()
+    db_session.refresh(place)
+    assert (place.review_count, place.rating_sum) == (3, 13)
+    assert PlaceService.recompute_ratings(db_session) == 0
+
+
+def test_place_listing_without_paging_params_returns_every_place(client: TestClient):
+    for index in range(DEFAULT_PLACE_PAGE_SIZE + 3):
+        client.post("/places/", json={"name": f"Spot {index}"})
+    everything = client.get("/places/")
+    assert everything.status_code == 200
+    assert len(everything.json()) == DEFAULT_PLACE_PAGE_SIZE + 3
+    assert "x-next-cursor" not in everything.headers
+
+
+def test_place_and_review_listings_paginate_with_etags(client: TestClient):
+    ids = [client.post("/places/", json={"name": f"Spot {index}"}).json()["id"] for index in range(5)]
+    for place_id, rating in zip(ids, (3, 5, 4, 5, 1)):
+        client.post(f"/places/{place_id}/reviews", json={"reviewer_name": "r", "rating": rating})
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/places/", params=params)
+        assert page.status_code == 200
+        seen.extend(place["id"] for place in page.json())
+        cursor = page.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == [ids[3], ids[1], ids[2], ids[0], ids[4]]
+    assert client.get("/places/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    first = client.get("/places/", params={"limit": 2})
+    etag = first.headers["etag"]
+    assert client.get("/places/", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 304
+
+    for index in range(3):
+        client.post(f"/places/{ids[0]}/reviews", json={"reviewer_name": f"later {index}", "rating": 4})
+    changed = client.get("/places/", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+    reviews = client.get(f"/places/{ids[0]}/reviews", params={"limit": 3})
+    assert [review["reviewer_name"] for review in reviews.json()] == ["later 2", "later 1", "later 0"]
+    rest = client.get(f"/places/{ids[0]}/reviews", params={"limit": 3, "cursor": reviews.headers["x-next-cursor"]})
+    assert [review["reviewer_name"] for review in rest.json()] == ["r"]
+    everything = client.get(f"/places/{ids[0]}/reviews")
+    assert [review["reviewer_name"] for review in everything.json()] == ["later 2", "later 1", "later 0", "r"]
+    assert "x-next-cursor" not in rest.headers
+
+    detail = client.get(f"/places/{ids[0]}")
+    assert client.get(f"/places/{ids[0]}", headers={"If-None-Match": detail.headers["etag"]}).status_code == 304
+    client.post(f"/places/{ids[0]}/reviews", json={"reviewer_name": "newest", "rating": 2})
+    assert client.get(f"/places/{ids[0]}", headers={"If-None-Match": detail.headers["etag"]}).status_code == 200
+
+
+def test_travel_time_ranking_prefers_places_on_the_shuttle_loop(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(transit.settings, "transit_cache_dir", str(tmp_path))
+
+    network = TransitService.network()
+    stop_times = TransitService.stop_matrix(network)
+    # Library (minute 0) to Walmart (minute 22): half the 60 minute headway plus the ride.
+    assert stop_times[0, 10] == pytest.approx(30 + 22)
+
+    def create(name: str, lat: float, lng: float) -> int:
+        payload = {"name": name, "location": "Wooster", "latitude": lat, "longitude": lng}
+        return client.post("/places/", json=payload).json()["id"]
+
+    library = create("Library Steps", 40.7986, -81.9392)
+    walmart = create("Walmart Cafe", 40.8478, -81.9418)
+    orchard = create("Orchard Trail", 40.7986, -81.877)  # slightly closer, but off the route
+
+    by_distance = client.get(
+        "/places/nearby", params={"lat": 40.7986, "lng": -81.9392, "radius_km": 6, "limit": 3}
+    ).json()
+    assert [place["id"] for place in by_distance] == [library, orchard, walmart]
+
+    by_time = client.get(
+        "/places/nearby",
+        params={"lat": 40.7986, "lng": -81.9392, "radius_km": 6, "limit": 3, "rank_by": "travel_time"},
+    ).json()
+    assert [place["id"] for place in by_time] == [library, walmart, orchard]
+
+    ideas = client.get("/places/date-ideas", params={"from_place_id": library, "limit": 2}).json()
+    assert [idea["place"]["id"] for idea in ideas] == [walmart, orchard]
+    assert ideas[0]["travel_minutes"] == pytest.approx(52, abs=1)
+    assert ideas[1]["travel_minutes"] > ideas[0]["travel_minutes"]
+    assert [path.name.split("-")[0] for path in tmp_path.glob("*.npy")] == ["stop_to_place"]
+
+
+def test_travel_time_ranking_falls_back_to_distance_without_matrices(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(transit.settings, "transit_cache_dir", str(tmp_path))
+    monkeypatch.setattr(transit.settings, "transit_data_path", str(tmp_path / "missing.json"))
+
+    near = client.post("/places/", json={"name": "Near", "latitude": 40.7986, "longitude": -81.9392}).json()["id"]
+    far = client.post("/places/", json={"name": "Far", "latitude": 40.8086, "longitude": -81.9392}).json()["id"]
+
+    response = client.get(
+        "/places/nearby", params={"lat": 40.7986, "lng": -81.9392, "radius_km": 6, "rank_by": "travel_time"}
+    )
+    assert response.status_code == 200
+    assert [place["id"] for place in response.json()] == [near, far]
+    assert client.get("/places/date-ideas", params={"from_place_id": near}).status_code == 200
+
+
+def test_concurrent_transit_refreshes_build_once(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(transit.settings, "transit_cache_dir", str(tmp_path))
+    client.post("/places/", json={"name": "Library Steps", "latitude": 40.7986, "longitude": -81.9392})
+
+    builds = []
+    original = TransitService._build.__func__
+
+    def counting_build(cls, *args):
+        builds.append(args)
+        original(cls, *args)
+
+    monkeypatch.setattr(TransitService, "_build", classmethod(counting_build))
+    session_factory = client.app.dependency_overrides[get_db]
+
+    def refresh() -> None:
+        for session in session_factory():
+            TransitService.refresh(session)
+
+    threads = [threading.Thread(target=refresh) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert [path.suffix for path in tmp_path.iterdir()] == [".npy"]
@@ -9,7 +9,7 @@ import { useToast } from '../components/ToastProvider';
 import { DEFAULT_AVATAR } from '../lib/media';
 import { useAuthStore, User as AuthUser } from '../store/auth';
 import { useNotifications } from '../store/notifications';
-import { aiApi, MatchInsightRequest, ParticipantProfile } from '../services/ai';
+import { aiApi, MatchInsightRequest, pairMatchId, ParticipantProfile } from '../services/ai';
 import { useGroupMatches, useGroups, useUserMatches, useRecordSwipe } from '../hooks/useGroups';
 import { useBreadcrumb } from '../hooks/useBreadcrumb';
 import { useViewNavigate } from '../hooks/useViewNavigate';
@@ -131,8 +131,9 @@ export default function Matches() {
         return;
       }
       setInsightLoading(true);
+      const insightId = currentUser?.id ? pairMatchId(currentUser.id, current.id) : current.id;
       try {
-        const cached = await aiApi.getMatchInsight(current.id);
+        const cached = await aiApi.getMatchInsight(insightId);
         if (!cancelled) {
           setInsight(cached.data.summary_text);
         }
@@ -140,7 +141,7 @@ export default function Matches() {
         if (axios.isAxiosError(error) && error.response?.status === 404) {
           try {
             const payload = buildInsightRequest(current, currentUser);
-            const response = await aiApi.generateMatchInsight(current.id, payload);
+            const response = await aiApi.generateMatchInsight(insightId, payload);
             if (!cancelled) setInsight(response.data.summary_text);
           } catch (generationError) {
             console.error('Unable to generate insight', generationError);
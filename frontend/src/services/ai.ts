@@ -102,6 +102,10 @@ export interface DirectChatResponse {
   reply_text: string;
 }
 
+/** Insights are stored per pair of users, so only the two of them read one. */
+export const pairMatchId = (userId: string, otherUserId: string) =>
+  [userId, otherUserId].sort().join(':');
+
 export const aiApi = {
   getMatchInsight: (matchId: string, refresh = false) =>
     api.get<MatchInsightResponse>(`/matches/${matchId}/insight`, {